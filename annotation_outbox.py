@@ -0,0 +1,134 @@
+import asyncio
+import random
+import re
+import time
+
+# Phoenix only accepts 16-hex-digit span ids; all zeros is OpenTelemetry's invalid span id.
+_SPAN_ID = re.compile(r"[0-9a-f]{16}")
+INVALID_SPAN_ID = "0" * 16
+
+
+def is_valid_span_id(span_id) -> bool:
+    """True if span_id can name a recorded span (no-op spans from before tracing started cannot)."""
+    return isinstance(span_id, str) and bool(_SPAN_ID.fullmatch(span_id)) and span_id != INVALID_SPAN_ID
+
+
+class AnnotationOutbox:
+    """Delivers queued Phoenix span annotations from the annotation_outbox table in the background.
+
+    Handlers only insert rows (Database.assess_module_user) and call notify(); this
+    worker posts due rows to Phoenix in batches with a request timeout. Failed rows
+    are retried with exponential backoff and jitter and marked 'failed' after
+    max_attempts. Rows survive restarts, so nothing is lost while Phoenix is down.
+    """
+
+    def __init__(self, db, phoenix_host: str = "http://localhost:6006", batch_size: int = 50, interval: float = 5.0,
+                 timeout: float = 10.0, max_attempts: int = 8, base_backoff: float = 5.0, max_backoff: float = 600.0):
+        self.db = db
+        self.url = f"{phoenix_host.rstrip('/')}/v1/span_annotations?sync=false"
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._task = None
+        self._wakeup = None
+        self._client = None
+        self._stats = {"delivered": 0, "retried": 0, "failed": 0, "batches": 0}
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def notify(self):
+        """Flush soon instead of waiting for the next interval."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                # Keep going while full batches come back; the queue may hold more.
+                while await self.flush() >= self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Warning: annotation outbox flush failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _get_client(self):
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    async def _post(self, payloads: list):
+        """Return None on success, otherwise a short error description."""
+        try:
+            response = await self._get_client().post(self.url, json={"data": payloads})
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+        if response.is_success:
+            return None
+        return f"HTTP {response.status_code}: {response.text[:200]}"
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.base_backoff * (2 ** attempts), self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def flush(self) -> int:
+        """Send one batch of due annotations; returns how many rows were attempted."""
+        rows = await self.db.get_due_annotations(time.time(), self.batch_size)
+        if not rows:
+            return 0
+        # Rows queued before span ids were validated can never be accepted; drop them instead of retrying.
+        invalid = [row["outbox_id"] for row in rows if not is_valid_span_id(row["payload"].get("span_id"))]
+        if invalid:
+            await self.db.delete_annotations(invalid)
+            self._stats["failed"] += len(invalid)
+            rows = [row for row in rows if row["outbox_id"] not in invalid]
+            if not rows:
+                return len(invalid)
+        self._stats["batches"] += 1
+        error = await self._post([row["payload"] for row in rows])
+        if error is None:
+            await self.db.delete_annotations([row["outbox_id"] for row in rows])
+            self._stats["delivered"] += len(rows)
+            return len(rows) + len(invalid)
+
+        # Retry rows one by one so a single rejected annotation cannot hold back the rest.
+        delivered = []
+        for row in rows:
+            row_error = error if len(rows) == 1 else await self._post([row["payload"]])
+            if row_error is None:
+                delivered.append(row["outbox_id"])
+                continue
+            attempts = row["attempts"] + 1
+            await self.db.reschedule_annotation(row["outbox_id"], time.time() + self._backoff(attempts), row_error, self.max_attempts)
+            if attempts >= self.max_attempts:
+                self._stats["failed"] += 1
+                print(f"Warning: giving up on Phoenix annotation for span {row['payload'].get('span_id')}: {row_error}")
+            else:
+                self._stats["retried"] += 1
+        if delivered:
+            await self.db.delete_annotations(delivered)
+            self._stats["delivered"] += len(delivered)
+        return len(rows) + len(invalid)
+
+    def stats(self) -> dict:
+        return dict(self._stats)
@@ -0,0 +1,61 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from database import Database
+
+
+class AsyncDatabase:
+    """Awaitable facade over Database that runs queries on a dedicated, bounded executor."""
+
+    def __init__(self, database: Database, max_workers: int = None, max_pending: int = 64):
+        self.sync = database
+        self.max_workers = max_workers or database.pool.pool_size
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db")
+        self._slots = None
+        self._pending = 0
+        self._methods = {}
+
+    def _get_slots(self):
+        # Created lazily so the semaphore binds to the running event loop.
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_pending)
+        return self._slots
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the database executor."""
+        slots = self._get_slots()
+        self._pending += 1
+        try:
+            async with slots:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self.sync, name)
+        if not callable(attr):
+            return attr
+
+        method = self._methods.get(name)
+        if method is None:
+            @functools.wraps(attr)
+            async def method(*args, **kwargs):
+                return await self.run(attr, *args, **kwargs)
+            self._methods[name] = method
+        return method
+
+    def executor_stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.sync.close()
@@ -0,0 +1,27 @@
+import importlib
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# test.py and test_db.py are manual scripts: they call live LLMs or edit English_courses.db on import.
+collect_ignore = ["test.py", "test_db.py", "main_depricated.py"]
+
+
+@pytest.fixture(scope="session")
+def fluent_app(tmp_path_factory):
+    """main_class's app, run from a scratch directory so its relative database paths stay throwaway.
+
+    The directory stays current for the rest of the session: the pools open
+    their connections lazily, long after the import.
+    """
+    workdir = tmp_path_factory.mktemp("fluent_app")
+    os.symlink(os.path.join(ROOT, "static"), workdir / "static")
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        main_class = importlib.import_module("main_class")
+        yield main_class.fluent_app
+    finally:
+        os.chdir(previous)
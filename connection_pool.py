@@ -0,0 +1,162 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -16000,
+    "temp_store": "MEMORY",
+    "mmap_size": 134217728,
+}
+
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections with per-thread leasing."""
+
+    def __init__(self, db_name: str, pool_size: int = 5, timeout: float = 30.0, pragmas: dict = None):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        self.db_name = db_name
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = set()
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "waits": 0,
+            "wait_time_ms": 0.0,
+            "leases": 0,
+            "discarded": 0,
+        }
+
+    def _create_connection(self):
+        connection = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            connection.execute(f"PRAGMA {name} = {value}")
+        return connection
+
+    def _acquire(self):
+        try:
+            connection = self._idle.get_nowait()
+            with self._lock:
+                self._stats["reused"] += 1
+            return connection
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed.")
+            can_create = len(self._all) < self.pool_size
+            if can_create:
+                # Reserve the slot before connecting so concurrent callers cannot overshoot pool_size.
+                placeholder = object()
+                self._all.add(placeholder)
+
+        if can_create:
+            try:
+                connection = self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._all.discard(placeholder)
+                raise
+            with self._lock:
+                self._all.discard(placeholder)
+                self._all.add(connection)
+                self._stats["created"] += 1
+            return connection
+
+        started = time.perf_counter()
+        try:
+            connection = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Timed out after {self.timeout}s waiting for a database connection.")
+        with self._lock:
+            self._stats["waits"] += 1
+            self._stats["wait_time_ms"] += (time.perf_counter() - started) * 1000
+            self._stats["reused"] += 1
+        return connection
+
+    def _release(self, connection, broken: bool = False):
+        if not broken and connection.in_transaction:
+            try:
+                connection.rollback()
+            except sqlite3.Error:
+                broken = True
+
+        with self._lock:
+            closed = self._closed
+            if broken or closed:
+                self._all.discard(connection)
+                if broken:
+                    self._stats["discarded"] += 1
+
+        if broken or closed:
+            connection.close()
+        else:
+            self._idle.put(connection)
+
+    @contextmanager
+    def connection(self):
+        """Lease a connection; nested calls on the same thread share one lease."""
+        lease = getattr(self._local, "lease", None)
+        if lease is not None:
+            self._local.depth += 1
+            try:
+                yield lease
+            finally:
+                self._local.depth -= 1
+            return
+
+        connection = self._acquire()
+        self._local.lease = connection
+        self._local.depth = 1
+        with self._lock:
+            self._stats["leases"] += 1
+
+        broken = False
+        try:
+            yield connection
+        except sqlite3.InterfaceError:
+            broken = True
+            raise
+        finally:
+            self._local.lease = None
+            self._local.depth = 0
+            self._release(connection, broken=broken)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            open_connections = len(self._all)
+        idle = self._idle.qsize()
+        stats.update({
+            "pool_size": self.pool_size,
+            "open": open_connections,
+            "idle": idle,
+            "in_use": max(open_connections - idle, 0),
+            "wait_time_ms": round(stats["wait_time_ms"], 3),
+        })
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._all.discard(connection)
+            connection.close()
@@ -0,0 +1,175 @@
+import ast
+import json
+import re
+
+
+def parse_course_content(course_content) -> dict:
+    """Parse an LLM course response into a dict; raises ValueError if it is not a course object."""
+    if isinstance(course_content, str):
+        to_parse = course_content.strip()
+        match = re.search(r"\{.*\}", to_parse, re.DOTALL)
+        if match:
+            to_parse = match.group(0)
+
+        if to_parse.startswith("```"):
+            parts = to_parse.split("\n", 1)
+            if len(parts) > 1:
+                to_parse = parts[1]
+            to_parse = to_parse.strip()
+            if to_parse.endswith("```"):
+                 to_parse = to_parse[:-3]
+
+        try:
+            course_content = json.loads(to_parse)
+        except json.JSONDecodeError:
+            try:
+                course_content = ast.literal_eval(to_parse)
+            except (ValueError, SyntaxError) as e:
+                raise ValueError(str(e))
+
+    if not isinstance(course_content, dict):
+        raise ValueError("Course content is not a valid dictionary.")
+    return course_content
+
+
+def parse_course_plan(plan):
+    """Decode a stored course_plan (Python repr or JSON) into a list, or None."""
+    if not isinstance(plan, str):
+        return plan if isinstance(plan, list) else None
+    try:
+        plan_list = ast.literal_eval(plan)
+    except (ValueError, SyntaxError):
+        try:
+            plan_list = json.loads(plan)
+        except json.JSONDecodeError:
+            return None
+    return plan_list if isinstance(plan_list, list) else None
+
+
+def course_plan_items(plan_list: list) -> list:
+    """Split a parsed course plan into (module_number, title, plan_json) rows, one per planned module."""
+    items = []
+    for position, item in enumerate(plan_list, start=1):
+        if not isinstance(item, dict):
+            continue
+        module_number = item.get("module")
+        if not isinstance(module_number, int):
+            module_number = position
+        items.append((module_number, item.get("title", f"Module {module_number}"), json.dumps(item)))
+    return items
+
+
+def parse_exam_content(exam_content) -> dict:
+    """Parse and validate a generated placement exam; raises ValueError if it has no questions."""
+    to_parse = exam_content.strip() if isinstance(exam_content, str) else ""
+    code_block_match = re.search(r"```(?:json)?\s*(.*?)```", to_parse, re.DOTALL)
+    if code_block_match:
+        to_parse = code_block_match.group(1).strip()
+    start = to_parse.find('{')
+    end = to_parse.rfind('}')
+    if start == -1 or end == -1:
+        raise ValueError("Exam content does not contain a JSON object.")
+
+    try:
+        exam = json.loads(to_parse[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Exam content is not valid JSON: {e}")
+
+    questions = exam.get("questions") if isinstance(exam, dict) else None
+    if not isinstance(questions, list) or not questions:
+        raise ValueError("Exam content has no questions.")
+    for question in questions:
+        if not isinstance(question, dict) or not question.get("question") or not isinstance(question.get("options"), dict):
+            raise ValueError("Exam question is missing its text or options.")
+    return exam
+
+
+def parse_module_content(module_content):
+    """Parse an LLM module response into a dict; falls back to {"html": ...} or the raw text."""
+    parsed_json = None
+    if isinstance(module_content, str):
+        content_to_parse = module_content.strip()
+        
+        code_block_match = re.search(r"```(?:json)?\s*(.*?)```", content_to_parse, re.DOTALL)
+        if code_block_match:
+            content_to_parse = code_block_match.group(1).strip()
+        
+        try:
+            parsed_json = json.loads(content_to_parse)
+        except json.JSONDecodeError:
+            try:
+                start = content_to_parse.find('{')
+                end = content_to_parse.rfind('}')
+                if start != -1 and end != -1:
+                    json_str = content_to_parse[start:end+1]
+                    parsed_json = json.loads(json_str)
+            except json.JSONDecodeError:
+                pass
+
+        if parsed_json is None:
+             print(f"Error parsing module content JSON. Raw content preview: {module_content[:200]}")
+             if "<div" in module_content or "<h" in module_content:
+                 parsed_json = {"html": module_content}
+    
+    if parsed_json:
+        return parsed_json
+    return module_content
+
+
+def decode_stored_module_content(raw_content: str):
+    """Best-effort decode of a legacy module.content_html value (JSON, str(dict), or "+"-concatenated JSON)."""
+    try:
+        cleaned_raw = raw_content
+        if '" + "' in cleaned_raw or "' + '" in cleaned_raw:
+            cleaned_raw = re.sub(r'"\s*\+\s*"', "", cleaned_raw)
+            cleaned_raw = re.sub(r"'\s*\+\s*'", "", cleaned_raw)
+
+        return json.loads(cleaned_raw)
+    except (json.JSONDecodeError, TypeError):
+        pass
+    try:
+        cleaned = raw_content.strip()
+        cleaned = re.sub(r'"\s*\+\s*"', "", cleaned)
+        cleaned = re.sub(r"'\s*\+\s*'", "", cleaned)
+
+        if cleaned.startswith('{') and cleaned.endswith('"'):
+            cleaned = cleaned[:-1]
+        return json.loads(cleaned)
+    except (json.JSONDecodeError, AttributeError):
+        pass
+    try:
+        return ast.literal_eval(raw_content)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def render_module_html(content_data, raw_content: str = "") -> str:
+    """Render parsed module content to the HTML shown on the module page."""
+    if isinstance(content_data, dict):
+        rendered_html = ""
+        if "html" in content_data:
+            rendered_html += content_data["html"]
+        elif "content" in content_data:
+            rendered_html += str(content_data["content"])
+        else:
+            for k, v in content_data.items():
+                if isinstance(v, list):
+                    rendered_html += f"<h3>{k.capitalize().replace('_', ' ')}</h3><ul>"
+                    for item in v:
+                        rendered_html += f"<li>{item}</li>"
+                    rendered_html += "</ul>"
+                elif isinstance(v, str):
+                    if v.strip().startswith("<"):
+                        rendered_html += v
+                    else:
+                        rendered_html += f"<p><strong>{k}:</strong> {v}</p>"
+        return rendered_html
+    if isinstance(content_data, str):
+        return content_data
+    return raw_content
+
+
+def normalize_module_content(module_content):
+    """Return (canonical_json, rendered_html) for a parsed module, computed once at write time."""
+    canonical_json = json.dumps(module_content, ensure_ascii=False)
+    return canonical_json, render_module_html(module_content, canonical_json)
@@ -1,187 +1,112 @@
 import sqlite3
-import hashlib
 import json
 from datetime import datetime
-from pwdlib import PasswordHash
+from connection_pool import ConnectionPool
+from content_parsing import course_plan_items, parse_course_plan
+from migrations import apply_migrations
+from password_service import shared_password_hash
+from vocabulary_levels import VOCABULARY_LEVEL_KEY, lookup_cefr_level
+
+VOCABULARY_SORTS = {
+    "alpha": {"keys": ("word",), "order": "word", "after": "word > ?"},
+    "recent": {"keys": ("word_id",), "order": "word_id DESC", "after": "word_id < ?"},
+    "level": {"keys": (VOCABULARY_LEVEL_KEY, "word"), "order": f"{VOCABULARY_LEVEL_KEY}, word",
+              "after": f"({VOCABULARY_LEVEL_KEY}, word) > (?, ?)"},
+}
+
+# Column sets for listing ("summary") versus single-item ("full") reads; summaries never carry large text bodies.
+COURSE_PROJECTIONS = {
+    "summary": ("course_id", "level", "title", "description", "duration_weeks"),
+    "full": ("course_id", "level", "title", "description", "duration_weeks", "course_plan"),
+}
+MODULE_PROJECTIONS = {
+    "summary": ("module_id", "course_id", "title", "week_number", "phoenix_id"),
+    "full": ("module_id", "course_id", "title", "week_number", "phoenix_id", "content_html", "rendered_html"),
+}
 
 class Database:
-    def __init__(self, db_name='English_courses.db'):
+    def __init__(self, db_name='English_courses.db', pool_size=5, pragmas=None):
         self.db_name = db_name
+        self.pool = ConnectionPool(db_name, pool_size=pool_size, pragmas=pragmas)
+
+    def pool_stats(self):
+        """Connection pool counters (open/idle/in-use connections, reuse and wait totals)."""
+        return self.pool.stats()
+
+    def close(self):
+        self.pool.close()
 
     def init_db(self):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-
-        cursor.executescript('''
-    CREATE TABLE IF NOT EXISTS user (
-    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    surname TEXT NOT NULL,
-    email TEXT UNIQUE NOT NULL,
-    password_hash TEXT NOT NULL,
-    proficiency_level TEXT CHECK(proficiency_level IN ('A0', 'A1', 'A2', 'B1', 'B2', 'C1', 'C2')),
-    pp_image TEXT default 'img/settings/avatar-outline.svg',
-    native_language TEXT,
-    interface_language TEXT,
-    role TEXT CHECK(role IN ('Student', 'Technical Support')) DEFAULT 'Student',
-    join_date TEXT DEFAULT CURRENT_TIMESTAMP
-    );
-
-    CREATE TABLE IF NOT EXISTS course (
-    course_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    level TEXT CHECK(level IN ('A0', 'A1', 'A2', 'B1', 'B2', 'C1', 'C2')),
-    title TEXT,
-    description TEXT,
-    duration_weeks INTEGER,
-    course_plan TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS user_course (
-    user_id INTEGER,
-    course_id INTEGER,
-    start_date TEXT,
-    progress_percent REAL DEFAULT 0,
-    FOREIGN KEY (user_id) REFERENCES user(user_id),
-    FOREIGN KEY (course_id) REFERENCES course(course_id)
-    );
-
-    CREATE TABLE IF NOT EXISTS module (
-    module_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    course_id INTEGER,
-    title TEXT,
-    week_number INTEGER,
-    content_html TEXT,
-    phoenix_id TEXT,
-    FOREIGN KEY (course_id) REFERENCES course(course_id)
-    );
-
-    CREATE TABLE IF NOT EXISTS test (
-    test_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER,
-    test_html TEXT,
-    submitted_answers_json TEXT,
-    submitted_at TEXT DEFAULT CURRENT_TIMESTAMP,
-    assessed BOOLEAN DEFAULT 0,
-    assessed_level TEXT CHECK(assessed_level IN ('A0', 'A1', 'A2', 'B1', 'B2', 'C1', 'C2')),
-    assessed_by_model TEXT,
-    phoenix_run_id TEXT,
-    FOREIGN KEY (user_id) REFERENCES user(user_id)
-    );
-
-    CREATE TABLE IF NOT EXISTS module_rating (
-    module_id INTEGER,
-    user_id INTEGER,
-    course_id INTEGER,
-    rating BOOLEAN DEFAULT 0,
-    review TEXT,
-    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (module_id) REFERENCES module(module_id),
-    FOREIGN KEY (user_id) REFERENCES user(user_id),
-    FOREIGN KEY (course_id) REFERENCES course(course_id)
-    );
-
-    CREATE TABLE IF NOT EXISTS progress_tracking (
-        module_attempt_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        module_id INTEGER,
-        course_id INTEGER,
-        answers_json TEXT,
-        submitted_at TEXT DEFAULT CURRENT_TIMESTAMP,
-        assessed BOOLEAN DEFAULT 0,
-        assessed_score REAL CHECK(assessed_score BETWEEN 0 AND 100),
-        assessed_by_model TEXT,
-        comments_from_model TEXT,
-        phoenix_run_id TEXT,
-        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES user(user_id),
-        FOREIGN KEY (module_id) REFERENCES module(module_id),
-        FOREIGN KEY (course_id) REFERENCES course(course_id)
-    );
-    CREATE TABLE IF NOT EXISTS certificate (
-    certificate_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        certificate TEXT,
-        status BOOLEAN DEFAULT 0,
-        FOREIGN KEY (user_id) REFERENCES user(user_id)
-    );
-    CREATE TABLE IF NOT EXISTS vocabulary (
-        vocabulary_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        words TEXT,
-        FOREIGN KEY (user_id) REFERENCES user(user_id)
-    );
-    ''')
-        
-        cursor.execute("PRAGMA table_info(user)")
-        columns = [info[1] for info in cursor.fetchall()]
-        if 'role' not in columns:
-            cursor.execute("ALTER TABLE user ADD COLUMN role TEXT CHECK(role IN ('Student', 'Technical Support')) DEFAULT 'Student'")
-            
-        connection.commit()
-        connection.close()
+        """Bring the schema up to date (see migrations.py); only checks schema_version once it is current."""
+        with self.pool.connection() as connection:
+            return apply_migrations(connection)
 
     def create_user(self, name, surname, email, password, role='Student'):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        password_hash = PasswordHash.recommended().hash(password)
+        """Hash inline and insert; the web app hashes on PasswordService and calls add_user instead."""
+        return self.add_user(name, surname, email, shared_password_hash().hash(password), role)
+
+    def add_user(self, name, surname, email, password_hash, role='Student'):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(
+                    "INSERT INTO user (name, surname, email, password_hash, role) VALUES (?, ?, ?, ?, ?)",
+                    (name, surname, email, password_hash, role)
+                )
+                connection.commit()
+                return True, "User registered successfully."
+            except sqlite3.IntegrityError:
+                return False, "Email already exists."
+
+    def get_credentials(self, email):
+        """Return the login row for email (including password_hash), or None."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
 
-        try:
             cursor.execute(
-                "INSERT INTO user (name, surname, email, password_hash, role) VALUES (?, ?, ?, ?, ?)",
-                (name, surname, email, password_hash, role)
+                "SELECT user_id, name, surname, email, password_hash, role FROM user WHERE email = ?",
+                (email,)
             )
-            connection.commit()
-            return True, "User registered successfully."
-        except sqlite3.IntegrityError:
-            return False, "Email already exists."
-        finally:
-            connection.close()
-        
-    def login_user(self, email, password):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-
-        cursor.execute(
-            "SELECT user_id, name, surname, email, password_hash, role FROM user WHERE email = ?",
-            (email,)
-        )
-        row = cursor.fetchone()
-        connection.close()
-
+            row = cursor.fetchone()
         if not row:
-            return False, "User not found."
-
-        stored_hash = row[4]
-        if not PasswordHash.recommended().verify(password, stored_hash):
-            return False, "Incorrect password."
-
-        return True, {
+            return None
+        return {
             "id": row[0],
             "name": row[1],
             "surname": row[2],
             "email": row[3],
+            "password_hash": row[4],
             "role": row[5]
         }
 
+    def login_user(self, email, password):
+        credentials = self.get_credentials(email)
+        if not credentials:
+            return False, "User not found."
+
+        stored_hash = credentials.pop("password_hash")
+        if not shared_password_hash().verify(password, stored_hash):
+            return False, "Incorrect password."
+
+        return True, credentials
+
     def get_user_id_by_email(self, email: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute("SELECT user_id FROM user WHERE email = ?", (email,))
-        row = cursor.fetchone()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT user_id FROM user WHERE email = ?", (email,))
+            row = cursor.fetchone()
         if row:
             return row[0]
         return None
 
     def get_user_by_id(self, user_id: int):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "SELECT user_id, name, surname, email, password_hash, native_language, interface_language, proficiency_level, pp_image, role FROM user WHERE user_id = ?",
-            (user_id,)
-        )
-        row = cursor.fetchone()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT user_id, name, surname, email, password_hash, native_language, interface_language, proficiency_level, pp_image, role FROM user WHERE user_id = ?",
+                (user_id,)
+            )
+            row = cursor.fetchone()
         if not row:
             return None
         return {
@@ -197,219 +122,435 @@ class Database:
             "role": row[9]
         }
         
+    def get_user_profile(self, user_id: int):
+        """get_user_by_id without the password hash; this is what UserProfileCache stores."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT user_id, name, surname, email, native_language, interface_language, proficiency_level, pp_image, role FROM user WHERE user_id = ?",
+                (user_id,)
+            )
+            row = cursor.fetchone()
+        if not row:
+            return None
+        return {
+            "id": row[0],
+            "name": row[1],
+            "surname": row[2],
+            "email": row[3],
+            "native_language": row[4],
+            "interface_language": row[5],
+            "proficiency_level": row[6],
+            "pp_image": row[7],
+            "role": row[8]
+        }
+
     def rechange_password(self, user_id: int, new_password: str):
-        new_password_hash = PasswordHash.recommended().hash(new_password)
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE user SET password_hash = ? WHERE user_id = ?",
-            (new_password_hash, user_id)
-        )
-        connection.commit()
-        connection.close()
+        self.set_password_hash(user_id, shared_password_hash().hash(new_password))
+
+    def set_password_hash(self, user_id: int, password_hash: str):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE user SET password_hash = ? WHERE user_id = ?",
+                (password_hash, user_id)
+            )
+            connection.commit()
 
     def upload_certificate(self, user_id: int, certificate: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO certificate (user_id, certificate) VALUES (?, ?)" ,
-            (user_id, certificate)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO certificate (user_id, certificate) VALUES (?, ?)" ,
+                (user_id, certificate)
+            )
+            connection.commit()
 
     def upload_image(self, user_id: int, image_data: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE user SET pp_image = ? WHERE user_id = ?",
-            (image_data, user_id)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE user SET pp_image = ? WHERE user_id = ?",
+                (image_data, user_id)
+            )
+            connection.commit()
 
 
     def get_vocabulary_by_user(self, user_id: int):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "SELECT words FROM vocabulary WHERE user_id = ?",
-            (user_id,)
-        )
-        row = cursor.fetchone()
-        connection.close()
-
-        if not row or row[0] is None:
-            return {}
-
-        try:
-            data = json.loads(row[0])
-        except json.JSONDecodeError:
-            return {}
-
-        if isinstance(data, dict):
-            return data
-
-        return {}
-
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT word, definition FROM vocabulary_word WHERE user_id = ? ORDER BY word_id",
+                (user_id,)
+            )
+            rows = cursor.fetchall()
+        return {word: definition for word, definition in rows}
 
     def save_vocabulary_by_user(self, user_id: int, words: dict):
-        serialized = json.dumps(words, ensure_ascii=False)
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-
-        cursor.execute(
-            "SELECT vocabulary_id FROM vocabulary WHERE user_id = ?",
-            (user_id,)
-        )
-        row = cursor.fetchone()
+        """Replace a user's whole vocabulary; prefer upsert_vocabulary_word/delete_vocabulary_word for edits."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM vocabulary_word WHERE user_id = ?", (user_id,))
+            cursor.executemany(
+                "INSERT INTO vocabulary_word (user_id, word, definition, cefr_level) VALUES (?, ?, ?, ?) ON CONFLICT(user_id, word) DO UPDATE SET definition = excluded.definition",
+                [(user_id, word, definition, lookup_cefr_level(word)) for word, definition in words.items()]
+            )
+            connection.commit()
 
-        if row:
+    @staticmethod
+    def _vocabulary_filter(query: str, match: str):
+        if not query:
+            return "", ()
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%" if match == "substring" else f"{escaped}%"
+        return " AND word LIKE ? ESCAPE '\\'", (pattern,)
+
+    def get_vocabulary_page(self, user_id: int, limit: int = 50, sort: str = "alpha", after: list = None,
+                            query: str = None, match: str = "prefix"):
+        """Return (entries, next_after) for one keyset page of a user's vocabulary.
+
+        `after` is the sort key of the last entry on the previous page; next_after is
+        None on the last page. Prefix search uses the (user_id, word) NOCASE index.
+        """
+        spec = VOCABULARY_SORTS[sort]
+        search_sql, search_params = self._vocabulary_filter(query, match)
+        after_sql, after_params = "", ()
+        if after:
+            after_sql = f" AND {spec['after']}"
+            after_params = tuple(after)
+        key_columns = ", ".join(spec["keys"])
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
             cursor.execute(
-                "UPDATE vocabulary SET words = ? WHERE vocabulary_id = ?",
-                (serialized, row[0])
+                f'''
+                SELECT word_id, word, definition, cefr_level, created_at, {key_columns}
+                FROM vocabulary_word
+                WHERE user_id = ?{search_sql}{after_sql}
+                ORDER BY {spec['order']}
+                LIMIT ?
+                ''',
+                (user_id, *search_params, *after_params, limit + 1)
             )
-        else:
+            rows = cursor.fetchall()
+        entries = [
+            {"word_id": row[0], "word": row[1], "definition": row[2], "cefr_level": row[3], "created_at": row[4]}
+            for row in rows[:limit]
+        ]
+        next_after = list(rows[limit - 1][5:]) if len(rows) > limit else None
+        return entries, next_after
+
+    def count_vocabulary(self, user_id: int, query: str = None, match: str = "prefix") -> int:
+        search_sql, search_params = self._vocabulary_filter(query, match)
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
             cursor.execute(
-                "INSERT INTO vocabulary (user_id, words) VALUES (?, ?)",
-                (user_id, serialized)
+                f"SELECT COUNT(*) FROM vocabulary_word WHERE user_id = ?{search_sql}",
+                (user_id, *search_params)
             )
+            return cursor.fetchone()[0]
 
-        connection.commit()
-        connection.close()
+    def upsert_vocabulary_word(self, user_id: int, word: str, definition: str):
+        """Insert or update a single word (case-insensitive match) and return the stored row."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                '''
+                INSERT INTO vocabulary_word (user_id, word, definition, cefr_level) VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id, word) DO UPDATE SET definition = excluded.definition, updated_at = CURRENT_TIMESTAMP
+                RETURNING word_id, word, definition, cefr_level, created_at
+                ''',
+                (user_id, word, definition, lookup_cefr_level(word))
+            )
+            row = cursor.fetchone()
+            connection.commit()
+        return {
+            "word_id": row[0],
+            "word": row[1],
+            "definition": row[2],
+            "cefr_level": row[3],
+            "created_at": row[4]
+        }
+
+    def delete_vocabulary_word(self, user_id: int, word: str):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "DELETE FROM vocabulary_word WHERE user_id = ? AND word = ? RETURNING word",
+                (user_id, word)
+            )
+            row = cursor.fetchone()
+            connection.commit()
+        if not row:
+            return None
+        return row[0]
 
     def update_native_language(self, user_id: int, native_language: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE user SET native_language = ? WHERE user_id = ?",
-            (native_language, user_id)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE user SET native_language = ? WHERE user_id = ?",
+                (native_language, user_id)
+            )
+            connection.commit()
 
     def update_interface_language(self, user_id: int, interface_language: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE user SET interface_language = ? WHERE user_id = ?",
-            (interface_language, user_id)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE user SET interface_language = ? WHERE user_id = ?",
+                (interface_language, user_id)
+            )
+            connection.commit()
 
     def update_email(self, user_id: int, email: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE user SET email = ? WHERE user_id = ?",
-            (email, user_id)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE user SET email = ? WHERE user_id = ?",
+                (email, user_id)
+            )
+            connection.commit()
 
     def update_user_role(self, email: str, role: str):
         allowed_roles = {"Student", "Technical Support"}
         if role not in allowed_roles:
             return False
 
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE user SET role = ? WHERE email = ?",
-            (role, email)
-        )
-        connection.commit()
-        updated = cursor.rowcount > 0
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE user SET role = ? WHERE email = ?",
+                (role, email)
+            )
+            connection.commit()
+            updated = cursor.rowcount > 0
         return updated
 
 
     def add_test(self, user_id: int, test_html: str, submitted_answers_json: str, assessed: bool,
                     assessed_level: str, assessed_by_model: str, phoenix_run_id: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO test (user_id, test_html, submitted_answers_json, assessed, assessed_level, assessed_by_model, phoenix_run_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (user_id, test_html, submitted_answers_json, assessed, assessed_level, assessed_by_model, phoenix_run_id)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO test (user_id, test_html, submitted_answers_json, assessed, assessed_level, assessed_by_model, phoenix_run_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (user_id, test_html, submitted_answers_json, assessed, assessed_level, assessed_by_model, phoenix_run_id)
+            )
+            connection.commit()
     
     def add_progress_tracking(self, user_id: int, module_id: int, course_id: int, answers_json: str, assessed: bool,
                     assessed_score: float, assessed_by_model: str, comments_from_model: str, phoenix_run_id: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO progress_tracking (user_id, module_id, course_id, answers_json, assessed, assessed_score, assessed_by_model, comments_from_model, phoenix_run_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (user_id, module_id, course_id, answers_json, assessed, assessed_score, assessed_by_model, comments_from_model, phoenix_run_id)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO progress_tracking (user_id, module_id, course_id, answers_json, assessed, assessed_score, assessed_by_model, comments_from_model, phoenix_run_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, module_id, course_id, answers_json, assessed, assessed_score, assessed_by_model, comments_from_model, phoenix_run_id)
+            )
+            connection.commit()
     
-    def add_course(self, level: str, title: str, description: str, duration_weeks: int, course_plan: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO course (level, title, description, duration_weeks, course_plan) VALUES (?, ?, ?, ?, ?)",
-            (level, title, description, duration_weeks, course_plan)
-        )
-        course_id = cursor.lastrowid
-        connection.commit()
-        connection.close()
+    def add_course(self, level: str, title: str, description: str, duration_weeks: int, course_plan):
+        """Store a course; a parseable plan is saved as JSON plus one course_plan_item row per module."""
+        plan_list = parse_course_plan(course_plan)
+        if plan_list is not None:
+            course_plan = json.dumps(plan_list, ensure_ascii=False)
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO course (level, title, description, duration_weeks, course_plan) VALUES (?, ?, ?, ?, ?)",
+                (level, title, description, duration_weeks, course_plan)
+            )
+            course_id = cursor.lastrowid
+            if plan_list:
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO course_plan_item (course_id, module_number, title, plan_json) VALUES (?, ?, ?, ?)",
+                    [(course_id, *item) for item in course_plan_items(plan_list)]
+                )
+            connection.commit()
         return course_id
     
     def enroll_user_in_course(self, user_id: int, course_id: int, start_date: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO user_course (user_id, course_id, start_date) VALUES (?, ?, ?)",
-            (user_id, course_id, start_date)
-        )
-        connection.commit()
-        connection.close()
-
-    def add_module(self, course_id: int, title: str, week_number: int, content_html: str, phoenix_id: str = None):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO module (course_id, title, week_number, content_html, phoenix_id) VALUES (?, ?, ?, ?, ?)",
-            (course_id, title, week_number, content_html, phoenix_id)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO user_course (user_id, course_id, start_date) VALUES (?, ?, ?)",
+                (user_id, course_id, start_date)
+            )
+            connection.commit()
+
+    def add_module(self, course_id: int, title: str, week_number: int, content_html: str, phoenix_id: str = None,
+                   rendered_html: str = None, source_module_id: int = None):
+        """content_html holds the canonical JSON of the module; rendered_html its pre-rendered page body.
+
+        source_module_id links a copy reused from another course to the module it was generated as.
+        """
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO module (course_id, title, week_number, content_html, phoenix_id, rendered_html, source_module_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (course_id, title, week_number, content_html, phoenix_id, rendered_html, source_module_id)
+            )
+            module_id = cursor.lastrowid
+            connection.commit()
+        return module_id
+
+    def set_module_signature(self, module_id: int, plan_signature: str):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE module SET plan_signature = ? WHERE module_id = ?",
+                (plan_signature, module_id)
+            )
+            connection.commit()
+
+    def get_module_by_id(self, module_id: int):
+        columns = MODULE_PROJECTIONS["full"]
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                f"SELECT {', '.join(columns)} FROM module WHERE module_id = ?",
+                (module_id,)
+            )
+            row = cursor.fetchone()
+        return dict(zip(columns, row)) if row else None
+
+    def get_module_by_signature(self, plan_signature: str, exclude_course_id: int = None):
+        """Earliest generated (not copied) module with this plan signature outside exclude_course_id, or None."""
+        columns = MODULE_PROJECTIONS["full"]
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                f"""
+                SELECT {', '.join(columns)} FROM module
+                WHERE plan_signature = ? AND source_module_id IS NULL AND course_id IS NOT ?
+                ORDER BY module_id LIMIT 1
+                """,
+                (plan_signature, exclude_course_id)
+            )
+            row = cursor.fetchone()
+        return dict(zip(columns, row)) if row else None
 
     def rate_module(self, module_id: int, user_id: int, course_id: int, rating: bool, review: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO module_rating (module_id, user_id, course_id, rating, review) VALUES (?, ?, ?, ?, ?)",
-            (module_id, user_id, course_id, rating, review)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO module_rating (module_id, user_id, course_id, rating, review) VALUES (?, ?, ?, ?, ?)",
+                (module_id, user_id, course_id, rating, review)
+            )
+            connection.commit()
 
     def create_pending_test(self, user_id: int, test_html: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO test (user_id, test_html) VALUES (?, ?)",
-            (user_id, test_html)
-        )
-        test_id = cursor.lastrowid
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO test (user_id, test_html) VALUES (?, ?)",
+                (user_id, test_html)
+            )
+            test_id = cursor.lastrowid
+            connection.commit()
         return test_id
 
+    def add_pool_item(self, kind: str, level: str, ref_id: int, reservation_id: int = None):
+        """Register a pre-generated test/course row as available in the template pool.
+
+        reservation_id, from reserve_pool_slot, is released in the same transaction.
+        """
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO template_pool (kind, level, ref_id) VALUES (?, ?, ?)",
+                (kind, level, ref_id)
+            )
+            if reservation_id is not None:
+                cursor.execute("DELETE FROM template_pool_reservation WHERE reservation_id = ?", (reservation_id,))
+            connection.commit()
+
+    def reserve_pool_slot(self, kind: str, level: str, target: int, now: float, lease_seconds: float):
+        """Reserve the right to generate one pool item, or return None if the pool is full.
+
+        Pooled items plus unexpired reservations are counted under BEGIN IMMEDIATE,
+        so workers in other processes cannot both take the last free slot. A
+        reservation expires after lease_seconds in case its worker dies mid-generation.
+        """
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute(
+                    "DELETE FROM template_pool_reservation WHERE kind = ? AND level IS ? AND expires_at <= ?",
+                    (kind, level, now)
+                )
+                cursor.execute(
+                    """
+                    SELECT (SELECT COUNT(*) FROM template_pool WHERE kind = ? AND level IS ?)
+                         + (SELECT COUNT(*) FROM template_pool_reservation WHERE kind = ? AND level IS ?)
+                    """,
+                    (kind, level, kind, level)
+                )
+                if cursor.fetchone()[0] >= target:
+                    connection.rollback()
+                    return None
+                cursor.execute(
+                    "INSERT INTO template_pool_reservation (kind, level, expires_at) VALUES (?, ?, ?)",
+                    (kind, level, now + lease_seconds)
+                )
+                reservation_id = cursor.lastrowid
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+        return reservation_id
+
+    def release_pool_slot(self, reservation_id: int):
+        """Drop a reservation whose generation failed, freeing the slot for any worker."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM template_pool_reservation WHERE reservation_id = ?", (reservation_id,))
+            connection.commit()
+
+    def count_pool_items(self, kind: str, level: str = None):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT COUNT(*) FROM template_pool WHERE kind = ? AND level IS ?",
+                (kind, level)
+            )
+            return cursor.fetchone()[0]
+
+    def claim_pool_item(self, kind: str, level: str = None):
+        """Atomically remove the oldest pooled item of this kind/level and return its ref_id."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                '''
+                DELETE FROM template_pool WHERE pool_item_id = (
+                    SELECT pool_item_id FROM template_pool WHERE kind = ? AND level IS ? ORDER BY pool_item_id LIMIT 1
+                )
+                RETURNING ref_id
+                ''',
+                (kind, level)
+            )
+            row = cursor.fetchone()
+            connection.commit()
+        if not row:
+            return None
+        return row[0]
+
+    def assign_test_to_user(self, test_id: int, user_id: int):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE test SET user_id = ? WHERE test_id = ?",
+                (user_id, test_id)
+            )
+            connection.commit()
+
     def get_test(self, test_id: int):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "SELECT test_id, user_id, test_html, submitted_answers_json FROM test WHERE test_id = ?",
-            (test_id,)
-        )
-        row = cursor.fetchone()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT test_id, user_id, test_html, submitted_answers_json FROM test WHERE test_id = ?",
+                (test_id,)
+            )
+            row = cursor.fetchone()
         if not row:
             return None
         return {
@@ -420,70 +561,56 @@ class Database:
         }
 
     def update_test_submission(self, test_id: int, submitted_answers_json: str, assessed_level: str, assessed_by_model: str, phoenix_run_id: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE test SET submitted_answers_json = ?, assessed = 1, assessed_level = ?, assessed_by_model = ?, phoenix_run_id = ?, submitted_at = CURRENT_TIMESTAMP WHERE test_id = ?",
-            (submitted_answers_json, assessed_level, assessed_by_model, phoenix_run_id, test_id)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE test SET submitted_answers_json = ?, assessed = 1, assessed_level = ?, assessed_by_model = ?, phoenix_run_id = ?, submitted_at = CURRENT_TIMESTAMP WHERE test_id = ?",
+                (submitted_answers_json, assessed_level, assessed_by_model, phoenix_run_id, test_id)
+            )
+            connection.commit()
     
     def update_english_level(self, user_id: int, new_level: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE user SET proficiency_level = ? WHERE user_id = ?",
-            (new_level, user_id)
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE user SET proficiency_level = ? WHERE user_id = ?",
+                (new_level, user_id)
+            )
+            connection.commit()
     
-    def get_user_courses(self, user_id: int):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            '''
-            SELECT c.course_id, c.level, c.title, c.description, c.duration_weeks, c.course_plan
-            FROM course c
-            JOIN user_course uc ON c.course_id = uc.course_id
-            WHERE uc.user_id = ?
-            ''',
-            (user_id,)
-        )
-        rows = cursor.fetchall()
-        connection.close()
-        courses = []
-        for row in rows:
-            courses.append({
-                "course_id": row[0],
-                "level": row[1],
-                "title": row[2],
-                "description": row[3],
-                "duration_weeks": row[4],
-                "course_plan": row[5]
-            })
-        return courses
+    def get_user_courses(self, user_id: int, projection: str = "summary"):
+        columns = COURSE_PROJECTIONS[projection]
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                f'''
+                SELECT {", ".join(f"c.{column}" for column in columns)}
+                FROM course c
+                JOIN user_course uc ON c.course_id = uc.course_id
+                WHERE uc.user_id = ?
+                ''',
+                (user_id,)
+            )
+            rows = cursor.fetchall()
+        return [dict(zip(columns, row)) for row in rows]
     
     def add_user_to_course(self, user_id: int, course_id: int):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO user_course (user_id, course_id, start_date) VALUES (?, ?, ?)",
-            (user_id, course_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-        )
-        connection.commit()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO user_course (user_id, course_id, start_date) VALUES (?, ?, ?)",
+                (user_id, course_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            connection.commit()
 
     def get_course_by_id(self, course_id: int):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "SELECT course_id, level, title, description, duration_weeks, course_plan FROM course WHERE course_id = ?",
-            (course_id,)
-        )
-        row = cursor.fetchone()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT course_id, level, title, description, duration_weeks, course_plan FROM course WHERE course_id = ?",
+                (course_id,)
+            )
+            row = cursor.fetchone()
         if not row:
             return None
         return {
@@ -494,62 +621,189 @@ class Database:
             "duration_weeks": row[4],
             "course_plan": row[5]
         }
-    def get_modules_by_course(self, course_id: int):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "SELECT module_id, course_id, title, week_number, content_html, phoenix_id FROM module WHERE course_id = ? ORDER BY week_number",
-            (course_id,)
-        )
-        rows = cursor.fetchall()
-        connection.close()
-        modules = []
+    def get_modules_by_course(self, course_id: int, projection: str = "summary"):
+        """Modules of a course ordered by week; use projection="full" only when the bodies are needed."""
+        columns = MODULE_PROJECTIONS[projection]
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                f"SELECT {', '.join(columns)} FROM module WHERE course_id = ? ORDER BY week_number",
+                (course_id,)
+            )
+            rows = cursor.fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get_course_view(self, course_id: int, module_number: int = None):
+        """Course metadata, module summaries and (optionally) one module's body in a single query.
+
+        Returns {"course", "modules", "module"} or None if the course does not exist;
+        "modules" has the first module stored for each week, and "module" is the
+        summary of week `module_number` plus its rendered_html.
+        """
+        course_columns = COURSE_PROJECTIONS["full"]
+        module_columns = MODULE_PROJECTIONS["summary"]
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                f'''
+                SELECT {", ".join(f"c.{column}" for column in course_columns)},
+                       {", ".join(f"m.{column}" for column in module_columns)},
+                       CASE WHEN m.week_number = ? THEN m.rendered_html END
+                FROM course c
+                LEFT JOIN module m ON m.course_id = c.course_id
+                WHERE c.course_id = ?
+                ORDER BY m.week_number, m.module_id
+                ''',
+                (module_number, course_id)
+            )
+            rows = cursor.fetchall()
+        if not rows:
+            return None
+        split = len(course_columns)
+        view = {"course": dict(zip(course_columns, rows[0][:split])), "modules": [], "module": None}
+        weeks = set()
         for row in rows:
-            modules.append({
-                "module_id": row[0],
-                "course_id": row[1],
-                "title": row[2],
-                "week_number": row[3],
-                "content_html": row[4],
-                "phoenix_id": row[5]
-            })
-        return modules
+            summary = dict(zip(module_columns, row[split:-1]))
+            if summary["module_id"] is None or summary["week_number"] in weeks:
+                continue
+            if summary["week_number"] is not None:
+                weeks.add(summary["week_number"])
+            view["modules"].append(summary)
+            if module_number is not None and summary["week_number"] == module_number:
+                view["module"] = dict(summary, rendered_html=row[-1])
+        return view
+
+    def get_course_plan_modules(self, course_id: int):
+        """Planned modules of a course joined with the first module stored for each week (module_id None if not generated)."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                '''
+                SELECT p.module_number, p.title, p.plan_json, m.module_id, m.title
+                FROM course_plan_item p
+                LEFT JOIN module m ON m.module_id = (
+                    SELECT module_id FROM module WHERE course_id = p.course_id AND week_number = p.module_number
+                    ORDER BY module_id LIMIT 1
+                )
+                WHERE p.course_id = ?
+                ORDER BY p.module_number
+                ''',
+                (course_id,)
+            )
+            rows = cursor.fetchall()
+        return [
+            {"module_number": row[0], "title": row[1], "plan_json": row[2], "module_id": row[3], "module_title": row[4]}
+            for row in rows
+        ]
+
+    def get_course_plan_item(self, course_id: int, module_number: int):
+        """The parsed plan entry for one module of a course, or None."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT plan_json FROM course_plan_item WHERE course_id = ? AND module_number = ?",
+                (course_id, module_number)
+            )
+            row = cursor.fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_module_content_by_week(self, course_id: int, week_number: int):
+        """content_html of the course's module for week_number (the first one stored), or None."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT content_html FROM module WHERE course_id = ? AND week_number = ? ORDER BY module_id LIMIT 1",
+                (course_id, week_number)
+            )
+            row = cursor.fetchone()
+        if not row:
+            return None
+        return row[0]
+
     def get_module_content(self, module_id: int, course_id: int):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "SELECT content_html FROM module WHERE module_id = ? AND course_id = ?",
-            (module_id, course_id)
-        )
-        row = cursor.fetchone()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT content_html FROM module WHERE module_id = ? AND course_id = ?",
+                (module_id, course_id)
+            )
+            row = cursor.fetchone()
         if not row:
             return None
         return row[0]
     
-    def assess_module_user(self, user_id: int, module_id: int, course_id: int, rating: bool, review: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO module_rating (module_id, user_id, course_id, rating, review) VALUES (?, ?, ?, ?, ?)",
-            (module_id, user_id, course_id, rating, review)
-        )
-        connection.commit()
-        connection.close()
+    def assess_module_user(self, user_id: int, module_id: int, course_id: int, rating: bool, review: str, annotation: dict = None):
+        """Save a module rating; a Phoenix span annotation, if given, is queued in the same transaction."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO module_rating (module_id, user_id, course_id, rating, review) VALUES (?, ?, ?, ?, ?)",
+                (module_id, user_id, course_id, rating, review)
+            )
+            if annotation is not None:
+                cursor.execute(
+                    "INSERT INTO annotation_outbox (span_id, payload_json) VALUES (?, ?)",
+                    (annotation["span_id"], json.dumps(annotation, ensure_ascii=False))
+                )
+            connection.commit()
+
+    def get_due_annotations(self, now: float, limit: int = 50):
+        """Pending outbox annotations whose next attempt is due, oldest first."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                """
+                SELECT outbox_id, payload_json, attempts FROM annotation_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, outbox_id
+                LIMIT ?
+                """,
+                (now, limit)
+            )
+            rows = cursor.fetchall()
+        return [{"outbox_id": row[0], "payload": json.loads(row[1]), "attempts": row[2]} for row in rows]
+
+    def delete_annotations(self, outbox_ids: list):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.executemany("DELETE FROM annotation_outbox WHERE outbox_id = ?", [(outbox_id,) for outbox_id in outbox_ids])
+            connection.commit()
+
+    def reschedule_annotation(self, outbox_id: int, next_attempt_at: float, error: str, max_attempts: int):
+        """Record a failed delivery; the row is marked 'failed' once it reaches max_attempts."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                """
+                UPDATE annotation_outbox
+                SET attempts = attempts + 1,
+                    next_attempt_at = ?,
+                    last_error = ?,
+                    status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END
+                WHERE outbox_id = ?
+                """,
+                (next_attempt_at, error, max_attempts, outbox_id)
+            )
+            connection.commit()
+
+    def count_annotations(self, status: str = 'pending'):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) FROM annotation_outbox WHERE status = ?", (status,))
+            return cursor.fetchone()[0]
 
     def get_pending_certificates(self):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            '''
-            SELECT c.certificate_id, c.user_id, c.certificate, c.status, u.name, u.surname, u.email
-            FROM certificate c
-            JOIN user u ON c.user_id = u.user_id
-            WHERE c.status = 0
-            '''
-        )
-        rows = cursor.fetchall()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                '''
+                SELECT c.certificate_id, c.user_id, c.certificate, c.status, u.name, u.surname, u.email
+                FROM certificate c
+                JOIN user u ON c.user_id = u.user_id
+                WHERE c.status = 0
+                '''
+            )
+            rows = cursor.fetchall()
         certificates = []
         for row in rows:
             certificates.append({
@@ -564,33 +818,31 @@ class Database:
         return certificates
 
     def approve_certificate_and_update_level(self, certificate_id: int, user_id: int, new_level: str):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
         
-        cursor.execute(
-            "UPDATE user SET proficiency_level = ? WHERE user_id = ?",
-            (new_level, user_id)
-        )
+            cursor.execute(
+                "UPDATE user SET proficiency_level = ? WHERE user_id = ?",
+                (new_level, user_id)
+            )
         
-        cursor.execute(
-            "UPDATE certificate SET status = 1 WHERE certificate_id = ?",
-            (certificate_id,)
-        )
+            cursor.execute(
+                "UPDATE certificate SET status = 1 WHERE certificate_id = ?",
+                (certificate_id,)
+            )
         
-        connection.commit()
-        connection.close()
+            connection.commit()
         return True, "Certificate approved and user level updated."
 
     def get_certificates_by_user(self, user_id: int):
         """Get all certificates for a user."""
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(
-            "SELECT certificate_id, user_id, certificate, status FROM certificate WHERE user_id = ? ORDER BY certificate_id DESC",
-            (user_id,)
-        )
-        rows = cursor.fetchall()
-        connection.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT certificate_id, user_id, certificate, status FROM certificate WHERE user_id = ? ORDER BY certificate_id DESC",
+                (user_id,)
+            )
+            rows = cursor.fetchall()
         certificates = []
         for row in rows:
             certificates.append({
@@ -603,19 +855,18 @@ class Database:
 
     def assess_certificate(self, certificate_id: int, user_id: int, assessed_level: str, admin_note: str):
         """Manually assess a certificate and update user level."""
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
         
-        cursor.execute(
-            "UPDATE user SET proficiency_level = ? WHERE user_id = ?",
-            (assessed_level, user_id)
-        )
+            cursor.execute(
+                "UPDATE user SET proficiency_level = ? WHERE user_id = ?",
+                (assessed_level, user_id)
+            )
         
-        cursor.execute(
-            "UPDATE certificate SET status = 1 WHERE certificate_id = ?",
-            (certificate_id,)
-        )
+            cursor.execute(
+                "UPDATE certificate SET status = 1 WHERE certificate_id = ?",
+                (certificate_id,)
+            )
         
-        connection.commit()
-        connection.close()
+            connection.commit()
         return True, f"Certificate {certificate_id} assessed as {assessed_level}."
\ No newline at end of file
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import threading
+import time
+
+from connection_pool import ConnectionPool
+
+
+class LLMResponseCache:
+    """Content-addressed SQLite cache of LLM responses for low-temperature (near-deterministic) prompts."""
+
+    def __init__(self, db_name: str = "cache.db", ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 5000,
+                 temperature_threshold: float = 0.3):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.temperature_threshold = temperature_threshold
+        self.pool = ConnectionPool(db_name, pool_size=2)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        with self.pool.connection() as connection:
+            connection.executescript('''
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT,
+                content TEXT,
+                total_tokens INTEGER,
+                created_at REAL,
+                last_access REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_response_cache_last_access ON llm_response_cache(last_access);
+            ''')
+            connection.commit()
+
+    def applies(self, temperature) -> bool:
+        return temperature is not None and temperature < self.temperature_threshold
+
+    @staticmethod
+    def make_key(prompt: str, role: str, model: str, family: str, temperature: float, top_p: float, max_tokens: int, **kwargs) -> str:
+        payload = json.dumps({
+            "prompt": prompt,
+            "role": role,
+            "model": model,
+            "family": family,
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_tokens": max_tokens,
+            "kwargs": kwargs,
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, cache_key: str):
+        now = time.time()
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT content, total_tokens, created_at FROM llm_response_cache WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+            if row and now - row[2] <= self.ttl_seconds:
+                connection.execute(
+                    "UPDATE llm_response_cache SET last_access = ? WHERE cache_key = ?",
+                    (now, cache_key)
+                )
+                connection.commit()
+                self._count("hits")
+                return {"content": row[0], "total_tokens": row[1]}
+            if row:
+                connection.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (cache_key,))
+                connection.commit()
+        self._count("misses")
+        return None
+
+    def put(self, cache_key: str, model: str, content: str, total_tokens: int):
+        now = time.time()
+        with self.pool.connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (cache_key, model, content, total_tokens, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key, model, content, total_tokens, now, now)
+            )
+            expired = connection.execute(
+                "DELETE FROM llm_response_cache WHERE created_at < ?",
+                (now - self.ttl_seconds,)
+            ).rowcount
+            overflow = connection.execute(
+                '''
+                DELETE FROM llm_response_cache WHERE cache_key IN (
+                    SELECT cache_key FROM llm_response_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                ''',
+                (self.max_entries,)
+            ).rowcount
+            connection.commit()
+        with self._lock:
+            self._stats["stores"] += 1
+            self._stats["evictions"] += expired + overflow
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        self.pool.close()
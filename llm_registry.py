@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+
+class LLMClientRegistry:
+    """LRU registry of constructed chat model clients, keyed by their generation parameters."""
+
+    def __init__(self, max_size: int = 16, max_connections: int = 20):
+        self.max_size = max_size
+        self.max_connections = max_connections
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._http_async_client = None
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(family: str, model: str, temperature: float, top_p: float, max_tokens: int, **kwargs) -> tuple:
+        return (family.lower(), model, temperature, top_p, max_tokens, tuple(sorted(kwargs.items())))
+
+    def http_clients(self):
+        """Shared (sync, async) httpx clients so every cached model reuses one connection pool."""
+        with self._lock:
+            if self._http_client is None:
+                import httpx
+                limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+                self._http_client = httpx.Client(limits=limits)
+                self._http_async_client = httpx.AsyncClient(limits=limits)
+            return self._http_client, self._http_async_client
+
+    def get(self, key: tuple, factory: callable):
+        """Return the cached client for key, building it with factory() on a miss."""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self._stats["hits"] += 1
+                return client, True
+
+        client = factory()
+
+        with self._lock:
+            existing = self._clients.get(key)
+            if existing is not None:
+                # Another thread built the same client first; keep a single instance.
+                self._clients.move_to_end(key)
+                self._stats["hits"] += 1
+                return existing, True
+            self._clients[key] = client
+            self._stats["misses"] += 1
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+                self._stats["evictions"] += 1
+            return client, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, size=len(self._clients), max_size=self.max_size)
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    async def aclose(self):
+        self.clear()
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+        if self._http_client is not None:
+            self._http_client.close()
+        self._http_client = None
+        self._http_async_client = None
@@ -1,34 +1,101 @@
 from fastapi import FastAPI, Request, Form, HTTPException, UploadFile, File
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from starlette.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from phoenix_tracking import PhoenixTracking
 from database import Database
-from pwdlib import PasswordHash
-import os, time, secrets, ast, json, re
+from async_database import AsyncDatabase
+from module_store import ModuleStore
+from user_cache import UserProfileCache
+from password_service import PasswordService
+from annotation_outbox import AnnotationOutbox, is_valid_span_id
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, PARSE_SECONDS, REGISTRY as METRICS, MetricsMiddleware, register_component_stats
+from template_pool import TemplatePool, parse_level_targets, DEFAULT_COURSE_TARGETS
+from prompts import exam_generation_params, course_generation_params, module_generation_params
+from content_parsing import parse_course_content, parse_module_content, normalize_module_content
+import os, time, secrets, json, re, base64
+from contextlib import asynccontextmanager
 from typing import List, Optional
-import requests
 from dotenv import load_dotenv
-from phoenix.client import Client
+
+# GET /api/vocabulary page size; `limit` is clamped to VOCABULARY_MAX_PAGE_SIZE.
+VOCABULARY_PAGE_SIZE = 50
+VOCABULARY_MAX_PAGE_SIZE = 200
 
 class FluentMindApp:
     def __init__(self):
         load_dotenv()
-        self.app = FastAPI()
+        self.app = FastAPI(lifespan=self.lifespan)
         self.setup_services()
+        self.setup_metrics()
         self.setup_middleware()
         self.setup_routes()
 
     def setup_services(self):
-        self.db = Database()
-        self.db.init_db()
+        self.database = Database(pool_size=int(os.getenv("DB_POOL_SIZE", "5")))
+        self.database.init_db()
+        self.db = AsyncDatabase(self.database)
+        self.user_cache = UserProfileCache(self.db, ttl_seconds=float(os.getenv("USER_CACHE_TTL", "60")))
+        self.passwords = PasswordService(
+            max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or None,
+            max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32")),
+        )
         self.phoenix_tracker = PhoenixTracking(app_name="FluentMind")
+        self.annotation_outbox = AnnotationOutbox(
+            self.db,
+            phoenix_host=os.getenv("PHOENIX_HOST", "http://localhost:6006"),
+            timeout=float(os.getenv("PHOENIX_ANNOTATION_TIMEOUT", "10")),
+            max_attempts=int(os.getenv("PHOENIX_ANNOTATION_MAX_ATTEMPTS", "8")),
+        )
+        self.template_pool = TemplatePool(
+            self.db,
+            self.phoenix_tracker,
+            exam_target=int(os.getenv("TEMPLATE_POOL_EXAMS", "2")),
+            course_targets=parse_level_targets(os.getenv("TEMPLATE_POOL_COURSES", DEFAULT_COURSE_TARGETS)),
+            reservation_seconds=float(os.getenv("TEMPLATE_POOL_RESERVATION_SECONDS", "600")),
+        )
+        self.module_store = ModuleStore(
+            self.db,
+            self.phoenix_tracker.weaviate,
+            max_distance=float(os.getenv("MODULE_REUSE_MAX_DISTANCE", "0.1")),
+        )
         self.app.mount("/static", StaticFiles(directory="static"), name="static")
         self.templates = Jinja2Templates(directory="static")
 
+    def setup_metrics(self):
+        """Export every component's stats() on /metrics; the lambdas follow components replaced after startup."""
+        components = {
+            "db_pool": lambda: self.database.pool_stats(),
+            "db_executor": lambda: self.db.executor_stats(),
+            "user_cache": lambda: self.user_cache.stats(),
+            "passwords": lambda: self.passwords.stats(),
+            "llm_clients": lambda: self.phoenix_tracker.llm_clients.stats(),
+            "llm_response_cache": lambda: self.phoenix_tracker.response_cache.stats(),
+            "retrieval_cache": lambda: self.phoenix_tracker.retrieval_cache.stats(),
+            "weaviate": lambda: self.phoenix_tracker.weaviate.stats(),
+            "template_pool": lambda: self.template_pool.stats(),
+            "module_store": lambda: self.module_store.stats(),
+            "annotation_outbox": lambda: self.annotation_outbox.stats(),
+        }
+        for component, stats in components.items():
+            register_component_stats(component, stats)
+
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI):
+        await self.phoenix_tracker.astart()
+        self.template_pool.start()
+        self.annotation_outbox.start()
+        yield
+        await self.annotation_outbox.stop()
+        await self.template_pool.stop()
+        await self.phoenix_tracker.aclose()
+        self.passwords.close()
+        self.db.close()
+
     def setup_middleware(self):
         self.app.add_middleware(SessionMiddleware, secret_key="dev-secret")
+        self.app.add_middleware(MetricsMiddleware)
 
     def setup_routes(self):
         self.app.add_api_route("/", self.root, methods=["GET"], response_class=HTMLResponse)
@@ -47,6 +114,7 @@ class FluentMindApp:
         self.app.add_api_route("/login", self.login, methods=["GET"], response_class=HTMLResponse)
         self.app.add_api_route("/api/login", self.api_login, methods=["POST"])
         self.app.add_api_route("/api/session", self.session_info, methods=["GET"])
+        self.app.add_api_route("/metrics", self.metrics, methods=["GET"], include_in_schema=False)
         self.app.add_api_route("/api/vocabulary", self.api_get_vocabulary, methods=["GET"])
         self.app.add_api_route("/api/vocabulary", self.api_add_word, methods=["POST"])
         self.app.add_api_route("/api/vocabulary", self.api_delete_word, methods=["DELETE"])
@@ -62,6 +130,7 @@ class FluentMindApp:
         self.app.add_api_route("/api/submit_module_answers", self.submit_module_answers, methods=["POST"])
         self.app.add_api_route("/api/get_courses", self.get_courses, methods=["GET"])
         self.app.add_api_route("/api/generate-module", self.generate_module, methods=["GET"])
+        self.app.add_api_route("/api/generate-module/stream", self.generate_module_stream, methods=["GET"])
         self.app.add_api_route("/learn/course{course_id}", self.learn_course, methods=["GET"])
         self.app.add_api_route("/learn/course{course_id}/module{module_number}", self.learn_course_module, methods=["GET"])
         self.app.add_api_route("/api/get-modules", self.api_get_modules, methods=["POST"])
@@ -108,7 +177,7 @@ class FluentMindApp:
             return self.templates.TemplateResponse(request, "technical_support.html", {"request": request})
 
         if not level and user_id:
-            user = self.db.get_user_by_id(user_id)
+            user = await self.user_cache.get(request, user_id)
             if user and user.get("proficiency_level"):
                  level = user["proficiency_level"]
                  request.session["proficiency_level"] = level
@@ -118,7 +187,7 @@ class FluentMindApp:
         if exam and exam != "current":
             try:
                 test_id = int(exam)
-                test_data = self.db.get_test(test_id)
+                test_data = await self.db.get_test(test_id)
                 if test_data and test_data["test_html"]:
                      return self.templates.TemplateResponse(request, "level_confirmation.html", {
                         "request": request, 
@@ -153,7 +222,7 @@ class FluentMindApp:
 
         role = request.session.get("user_role")
         if not role:
-            user = self.db.get_user_by_id(user_id)
+            user = await self.user_cache.get(request, user_id)
             role = user.get("role") if user else None
             if role:
                 request.session["user_role"] = role
@@ -173,7 +242,7 @@ class FluentMindApp:
         user_id = request.session.get("user_id")
         if not user_id:
             return RedirectResponse(url="/login", status_code=302)
-        user = self.db.get_user_by_id(user_id)
+        user = await self.user_cache.get(request, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         return self.templates.TemplateResponse(request, "settings.html", {"userid": user_id, "user": user})
@@ -184,7 +253,7 @@ class FluentMindApp:
             return RedirectResponse(url="/login", status_code=302)
         if user_id != userid:
             return RedirectResponse(url=f"/settings/{user_id}", status_code=302)
-        user = self.db.get_user_by_id(userid)
+        user = await self.user_cache.get(request, userid)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         return self.templates.TemplateResponse(request, "settings.html", {"userid": userid, "user": user})
@@ -194,7 +263,7 @@ class FluentMindApp:
         if not user_id:
             return RedirectResponse(url="/login", status_code=302)
 
-        user = self.db.get_user_by_id(user_id)
+        user = await self.user_cache.get(request, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
@@ -207,7 +276,7 @@ class FluentMindApp:
 
         role = request.session.get("user_role")
         if not role:
-            user = self.db.get_user_by_id(user_id)
+            user = await self.user_cache.get(request, user_id)
             role = user.get("role") if user else None
             if role:
                 request.session["user_role"] = role
@@ -226,20 +295,20 @@ class FluentMindApp:
 
             user = None
             if email:
-                user_id = self.db.get_user_id_by_email(email)
+                user_id = await self.db.get_user_id_by_email(email)
                 if user_id:
-                    user = self.db.get_user_by_id(user_id)
+                    user = await self.user_cache.get(request, user_id)
             elif user_id:
                 try:
                     user_id = int(user_id)
-                    user = self.db.get_user_by_id(user_id)
+                    user = await self.user_cache.get(request, user_id)
                 except (ValueError, TypeError):
                     pass
 
             if not user:
                 return JSONResponse(status_code=404, content={"success": False, "message": "User not found."})
 
-            certificates = self.db.get_certificates_by_user(user["id"])
+            certificates = await self.db.get_certificates_by_user(user["id"])
             return JSONResponse(status_code=200, content={
                 "success": True,
                 "user": {"id": user["id"], "name": user["name"], "surname": user["surname"], "proficiency_level": user.get("proficiency_level")},
@@ -255,7 +324,7 @@ class FluentMindApp:
             return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated."})
 
         try:
-            certificates = self.db.get_pending_certificates()
+            certificates = await self.db.get_pending_certificates()
             return JSONResponse(status_code=200, content={
                 "success": True,
                 "certificates": certificates
@@ -283,7 +352,8 @@ class FluentMindApp:
             if level not in valid_levels:
                 return JSONResponse(status_code=400, content={"success": False, "message": f"Invalid level. Must be one of: {', '.join(valid_levels)}"})
 
-            success, message = self.db.assess_certificate(certificate_id, user_id, level, note)
+            success, message = await self.db.assess_certificate(certificate_id, user_id, level, note)
+            self.user_cache.invalidate(int(user_id), request)
             return JSONResponse(status_code=200, content={"success": success, "message": message})
         except Exception as e:
             return JSONResponse(status_code=400, content={"success": False, "message": str(e)})
@@ -295,7 +365,8 @@ class FluentMindApp:
         email: str = Form(...),
         password: str = Form(...)
     ):
-        success, message = self.db.create_user(name, surname, email, password)
+        password_hash = await self.passwords.hash(password)
+        success, message = await self.db.add_user(name, surname, email, password_hash)
         
         if success:
             return JSONResponse(status_code=200, content={"success": True, "message": message})
@@ -314,17 +385,23 @@ class FluentMindApp:
         email: str = Form(...),
         password: str = Form(...)
     ):
-        success, user_data = self.db.login_user(email, password)
-
-
-        if not success:
-            return JSONResponse(status_code=401, content={"success": False, "message": user_data})
+        user_data = await self.db.get_credentials(email)
+        if not user_data:
+            return JSONResponse(status_code=401, content={"success": False, "message": "User not found."})
+
+        stored_hash = user_data.pop("password_hash")
+        valid, new_hash = await self.passwords.verify_and_update(password, stored_hash)
+        if not valid:
+            return JSONResponse(status_code=401, content={"success": False, "message": "Incorrect password."})
+        if new_hash:
+            # Stored with outdated Argon2 parameters; upgrade while we have the plaintext.
+            await self.db.set_password_hash(user_data["id"], new_hash)
 
         request.session["user_email"] = user_data["email"]
         request.session["user_id"] = user_data["id"]
         request.session["user_role"] = user_data.get("role")
 
-        full_user = self.db.get_user_by_id(user_data["id"])
+        full_user = await self.user_cache.get(request, user_data["id"])
         if full_user:
             request.session["proficiency_level"] = full_user.get("proficiency_level")
             if not request.session.get("user_role"):
@@ -332,6 +409,10 @@ class FluentMindApp:
 
         return RedirectResponse(url=f"/settings/{user_data['id']}", status_code=302)
 
+    async def metrics(self):
+        """Prometheus scrape endpoint (generation latency, tokens, cache hits, HTTP latency per route, component stats)."""
+        return PlainTextResponse(METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
     async def session_info(self, request: Request):
         return {
             "user_id": request.session.get("user_id"),
@@ -339,14 +420,56 @@ class FluentMindApp:
             "user_role": request.session.get("user_role"),
         }
 
-    async def api_get_vocabulary(self, request: Request):
+    @staticmethod
+    def _encode_cursor(sort: str, after: list) -> str:
+        raw = json.dumps({"sort": sort, "after": after}, ensure_ascii=False).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str) -> list:
+        """Return the keyset position stored in cursor; raises ValueError if it is malformed or for another sort."""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except (ValueError, UnicodeError) as e:
+            raise ValueError(f"Invalid cursor: {e}")
+        if not isinstance(data, dict) or data.get("sort") != sort or not isinstance(data.get("after"), list):
+            raise ValueError("Cursor does not match this sort order.")
+        return data["after"]
+
+    async def api_get_vocabulary(self, request: Request, limit: int = VOCABULARY_PAGE_SIZE, cursor: Optional[str] = None,
+                                 q: Optional[str] = None, match: str = "prefix", sort: str = "alpha"):
+        """One page of the user's vocabulary.
+
+        sort: alpha | recent | level; match: prefix | substring (applied to `q`).
+        limit is capped at VOCABULARY_MAX_PAGE_SIZE. Pass `next_cursor` back as `cursor`
+        for the following page; `total` is only computed for the first page.
+        """
         try:
             user_id = self._ensure_authenticated(request)
         except HTTPException as exc:
             return JSONResponse(status_code=exc.status_code, content={"success": False, "message": exc.detail})
 
-        words = self.db.get_vocabulary_by_user(user_id)
-        return JSONResponse(status_code=200, content={"success": True, "words": words})
+        if sort not in ("alpha", "recent", "level") or match not in ("prefix", "substring"):
+            return JSONResponse(status_code=400, content={"success": False, "message": "Unsupported sort or match mode."})
+        limit = max(1, min(limit, VOCABULARY_MAX_PAGE_SIZE))
+        query = (q or "").strip() or None
+
+        after = None
+        if cursor:
+            try:
+                after = self._decode_cursor(cursor, sort)
+            except ValueError as e:
+                return JSONResponse(status_code=400, content={"success": False, "message": str(e)})
+
+        words, next_after = await self.db.get_vocabulary_page(user_id, limit=limit, sort=sort, after=after, query=query, match=match)
+        content = {
+            "success": True,
+            "words": words,
+            "next_cursor": self._encode_cursor(sort, next_after) if next_after else None,
+        }
+        if not cursor:
+            content["total"] = await self.db.count_vocabulary(user_id, query=query, match=match)
+        return JSONResponse(status_code=200, content=content)
 
     async def api_add_word(self, request: Request):
         try:
@@ -361,11 +484,9 @@ class FluentMindApp:
         if not word or not definition:
             return JSONResponse(status_code=400, content={"success": False, "message": "Word and definition are required."})
 
-        words = self.db.get_vocabulary_by_user(user_id)
-        words[word] = definition
-        self.db.save_vocabulary_by_user(user_id, words)
+        entry = await self.db.upsert_vocabulary_word(user_id, word, definition)
 
-        return JSONResponse(status_code=200, content={"success": True, "words": words, "message": "Word saved."})
+        return JSONResponse(status_code=200, content={"success": True, "word": entry, "message": "Word saved."})
 
     async def api_delete_word(self, request: Request):
         try:
@@ -379,15 +500,12 @@ class FluentMindApp:
         if not word:
             return JSONResponse(status_code=400, content={"success": False, "message": "Word is required."})
 
-        words = self.db.get_vocabulary_by_user(user_id)
+        deleted = await self.db.delete_vocabulary_word(user_id, word)
 
-        if word not in words:
+        if deleted is None:
             return JSONResponse(status_code=404, content={"success": False, "message": "Word not found."})
 
-        del words[word]
-        self.db.save_vocabulary_by_user(user_id, words)
-
-        return JSONResponse(status_code=200, content={"success": True, "words": words, "message": "Word deleted."})
+        return JSONResponse(status_code=200, content={"success": True, "word": deleted, "message": "Word deleted."})
 
     async def change_password(self, request: Request,
         old_password: str = Form(...),
@@ -397,15 +515,15 @@ class FluentMindApp:
         if not user_id:
             return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated."})
 
-        user = self.db.get_user_by_id(user_id)
+        user = await self.db.get_user_by_id(user_id)
         if not user:
             return JSONResponse(status_code=404, content={"success": False, "message": "User not found."})
 
         stored_hash = user['password_hash']
-        if not PasswordHash.recommended().verify(old_password, stored_hash):
+        if not await self.passwords.verify(old_password, stored_hash):
             return JSONResponse(status_code=400, content={"success": False, "message": "Incorrect old password."})
 
-        self.db.rechange_password(user_id, new_password)
+        await self.db.set_password_hash(user_id, await self.passwords.hash(new_password))
 
         return JSONResponse(status_code=200, content={"success": True, "message": "Password changed successfully."})
 
@@ -431,7 +549,7 @@ class FluentMindApp:
             f.write(contents)
 
         rel_path = f"certificates/{safe_name}"
-        self.db.upload_certificate(user_id, rel_path)
+        await self.db.upload_certificate(user_id, rel_path)
 
         static_url = f"/static/{rel_path}"
         return JSONResponse(status_code=200, content={"success": True, "path": rel_path, "url": static_url, "message": "Certificate uploaded successfully."})
@@ -458,7 +576,8 @@ class FluentMindApp:
             f.write(contents)
 
         rel_path = f"profile_images/{safe_name}"
-        self.db.upload_image(user_id, rel_path)
+        await self.db.upload_image(user_id, rel_path)
+        self.user_cache.invalidate(user_id, request)
 
         static_url = f"/static/profile_images/{safe_name}"
         return JSONResponse(status_code=200, content={"success": True, "path": rel_path, "url": static_url, "message": "Profile image uploaded successfully."})
@@ -475,7 +594,8 @@ class FluentMindApp:
         if not native_language:
             return JSONResponse(status_code=400, content={"success": False, "message": "Native language is required."})
 
-        self.db.update_native_language(user_id, native_language)
+        await self.db.update_native_language(user_id, native_language)
+        self.user_cache.invalidate(user_id, request)
 
         return JSONResponse(status_code=200, content={"success": True, "message": "Native language updated successfully."})
 
@@ -491,7 +611,8 @@ class FluentMindApp:
         if not interface_language:
             return JSONResponse(status_code=400, content={"success": False, "message": "Interface language is required."})
 
-        self.db.update_interface_language(user_id, interface_language)
+        await self.db.update_interface_language(user_id, interface_language)
+        self.user_cache.invalidate(user_id, request)
 
         return JSONResponse(status_code=200, content={"success": True, "message": "Interface language updated successfully."})
 
@@ -505,7 +626,8 @@ class FluentMindApp:
         if not email:
             return JSONResponse(status_code=400, content={"success": False, "message": "Email is required."})
 
-        self.db.update_email(user_id, email)
+        await self.db.update_email(user_id, email)
+        self.user_cache.invalidate(user_id, request)
 
         return JSONResponse(status_code=200, content={"success": True, "message": "Email updated successfully."})
 
@@ -515,34 +637,10 @@ class FluentMindApp:
             return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated."})
 
         try:
-            generation_result = self.phoenix_tracker.generate(
-                temperature=1.0,
-                top_p=0.9,
-                max_tokens=2000,
-                model="gemini-2.5-flash-preview-09-2025",
-                prompt_context="""You are an expert English exam creator. Generate a 30-question multiple-choice English placement test.
-                
-                IMPORTANT: Return ONLY a valid JSON object. Do NOT include any introductory text, markdown formatting (like ```json), or explanations. The output must be parseable by JSON.parse().
-                
-                The JSON structure MUST be:
-                {
-                    "questions": [
-                        {
-                            "id": 1,
-                            "question": "Question text here",
-                            "options": {
-                                "A": "Option A text",
-                                "B": "Option B text",
-                                "C": "Option C text",
-                                "D": "Option D text"
-                            }
-                        }
-                    ]
-                }
-                
-                Ensure the questions cover a range of difficulty levels (A1 to C2) to assess proficiency accurately.
-                JSON ONLY.""", name="English Exam", type="exam", collection_name="CefrGrammarProfile")
-            test_id = self.db.create_pending_test(user_id, generation_result["content"])
+            test_id = await self.template_pool.claim_exam(user_id)
+            if test_id is None:
+                generation_result = await self.phoenix_tracker.agenerate(**exam_generation_params())
+                test_id = await self.db.create_pending_test(user_id, generation_result["content"])
             return JSONResponse(status_code=200, content={"success": True, "exam": {"id": test_id}})
         except Exception as e:
             print(f"Error generating exam: {e}")
@@ -563,7 +661,7 @@ class FluentMindApp:
         exam_content = ""
         if test_id_val and str(test_id_val) != "session":
             try:
-                test_data = self.db.get_test(int(test_id_val))
+                test_data = await self.db.get_test(int(test_id_val))
                 if test_data:
                     exam_content = test_data["test_html"]
             except Exception:
@@ -581,19 +679,20 @@ class FluentMindApp:
         Here is the student's answers:
         {exam_answers}
         """
-        feedback_result = self.phoenix_tracker.generate(
+        feedback_result = await self.phoenix_tracker.agenerate(
             temperature=0.2,
             top_p=0.5,
             max_tokens=2000,
             model="gemini-2.5-flash-preview-09-2025",
-            prompt_context=english_test_check_propmt
+            prompt_context=english_test_check_propmt,
+            type="exam_grading"
         )
         feedback = feedback_result["content"]
         run_id = feedback_result["run_id"]
 
         if test_id_val and str(test_id_val) != "session":
             try:
-                self.db.update_test_submission(
+                await self.db.update_test_submission(
                     test_id=int(test_id_val),
                     submitted_answers_json=exam_answers,
                     assessed_level=feedback,
@@ -603,7 +702,7 @@ class FluentMindApp:
             except Exception as e:
                 print(f"Error updating test: {e}")
         else:
-            self.db.add_test(
+            await self.db.add_test(
                 user_id=user_id,
                 test_html=request.session.get("exam_content", ""),
                 submitted_answers_json=exam_answers,
@@ -612,74 +711,36 @@ class FluentMindApp:
                 assessed_by_model="gemini-2.5-flash-preview-09-2025",
                 phoenix_run_id=run_id
             )
-        self.db.update_english_level(user_id, feedback)
+        await self.db.update_english_level(user_id, feedback)
+        self.user_cache.invalidate(user_id, request)
         return JSONResponse(status_code=200, content={"success": True, "feedback": feedback})
 
     async def generate_course(self, request: Request, level: str):
         user_id = request.session.get("user_id")
         if not user_id:
             return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated."})
-        response = self.phoenix_tracker.generate(
-            temperature=0.7,
-            top_p=0.9,
-            max_tokens=3000,
-            model="gemini-2.5-flash-preview-09-2025",
-            prompt_context=f"""You are an expert English course creator. Create a detailed 8-week English course for a student at {level} level. 
-            IMPORTANT: Return ONLY a valid JSON object. Do NOT include any introductory text, markdown formatting (like ```json), or explanations. The output must be parseable by JSON.parse(). The JSON structure MUST be:
-            {{
-                "title": "Course Title",
-                "description": "Brief description of the course",
-                "duration_weeks": 8,
-                "course_plan": [
-                    {{
-                        "module": 1,
-                        "topics": ["Topic 1", "Topic 2"],
-                        "objectives": ["Objective 1", "Objective 2"],
-                        "activities": ["Activity 1", "Activity 2"]
-                    }}
-                ]
-            }}
-            Ensure the course is engaging and covers all essential skills: reading, writing, speaking.
-            JSON ONLY.""", name="English Course", type="course", collection_name="CefrGrammarProfile")
-        
-        course_content = response["content"]
-        if isinstance(course_content, str):
-            import json
-            import re
-            import ast
-            try:
-                to_parse = course_content.strip()
-                match = re.search(r"\{.*\}", to_parse, re.DOTALL)
-                if match:
-                    to_parse = match.group(0)
-                
-                if to_parse.startswith("```"):
-                    parts = to_parse.split("\n", 1)
-                    if len(parts) > 1:
-                        to_parse = parts[1]
-                    to_parse = to_parse.strip()
-                    if to_parse.endswith("```"):
-                         to_parse = to_parse[:-3]
-
-                try:
-                    course_content = json.loads(to_parse)
-                except json.JSONDecodeError:
-                     course_content = ast.literal_eval(to_parse)
+        pooled = await self.template_pool.claim_course(level)
+        if pooled:
+            course_id, course_content = pooled
+        else:
+            response = await self.phoenix_tracker.agenerate(**course_generation_params(level))
 
-            except Exception as e:
+            course_content = response["content"]
+            try:
+                with PARSE_SECONDS.time(type="course"):
+                    course_content = parse_course_content(course_content)
+            except ValueError as e:
                 print(f"Error parsing course content JSON: {e}")
-                print(f"Raw content start: {course_content[:500]}...")
-                print(f"Raw content end: ...{course_content[-500:]}")
+                if isinstance(course_content, str):
+                    print(f"Raw content start: {course_content[:500]}...")
+                    print(f"Raw content end: ...{course_content[-500:]}")
                 return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to parse course content from LLM: {str(e)}"})
 
-        if not isinstance(course_content, dict):
-             return JSONResponse(status_code=500, content={"success": False, "message": "Course content is not a valid dictionary."})
-
-        course_id = self.db.add_course(level=level, title=course_content.get('title'), description=course_content.get('description'), 
-                      duration_weeks=course_content.get('duration_weeks'), course_plan=str(course_content.get('course_plan')))
+            course_id = await self.db.add_course(level=level, title=course_content.get('title'), description=course_content.get('description'), 
+                          duration_weeks=course_content.get('duration_weeks'), course_plan=course_content.get('course_plan'))
 
         start_date = time.strftime("%Y-%m-%d")
-        self.db.enroll_user_in_course(user_id=user_id, course_id=course_id, start_date=start_date)
+        await self.db.enroll_user_in_course(user_id=user_id, course_id=course_id, start_date=start_date)
 
         return JSONResponse(status_code=200, content={"success": True, "course": course_content})
 
@@ -722,12 +783,12 @@ class FluentMindApp:
         Add some styling classes.
         """
 
-        response = self.phoenix_tracker.generate(
+        response = await self.phoenix_tracker.agenerate(
             temperature=0.3,
             model="gemini-2.5-flash-preview-09-2025",
             prompt_context=prompt,
             name="Module Grading",
-            type="grading", 
+            type="module_answers_grading",
             collection_name="CefrGrammarProfile"
         )
 
@@ -742,86 +803,108 @@ class FluentMindApp:
         user_id = request.session.get("user_id")
         if not user_id:
             return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated."})
-        courses = self.db.get_user_courses(user_id)
+        courses = await self.db.get_user_courses(user_id)
         return JSONResponse(status_code=200, content={"success": True, "courses": courses})
 
     async def generate_module(self, request: Request, course_id: int, module_number: int):
         user_id = request.session.get("user_id")
         if not user_id:
             return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated."})
-        content = self.db.get_module_content(module_number, course_id)
+        content = await self.db.get_module_content_by_week(course_id, module_number)
         if content:
-            return JSONResponse(status_code=200, content={"success": True, "module": content})
-        course = self.db.get_course_by_id(course_id)
+            return JSONResponse(status_code=200, content={"success": True, "module": self.module_store.module_payload({"content_html": content})})
+        course = await self.db.get_course_by_id(course_id)
+        plan_item = await self.db.get_course_plan_item(course_id, module_number)
+        shared = await self._reuse_shared_module(course, course_id, module_number, plan_item)
+        if shared is not None:
+            return JSONResponse(status_code=200, content={"success": True, "module": shared})
         course_plan = course.get("course_plan", "")
-        response = self.phoenix_tracker.generate(
-            temperature=0.7,
-            top_p=0.9,
-            max_tokens=2000,
-            model="gemini-2.5-flash-preview-09-2025",
-            prompt_context=f"""You are an expert English course module creator. Create a detailed module {module_number} for the following course plan:
-            {course_plan}
-            IMPORTANT: Return ONLY a valid JSON object. Do NOT include any introductory text, markdown formatting (like ```json), or explanations. In JSON format, provide:
-            HTML content for module {module_number} including lessons, exercises, and resources. The output must be parseable by JSON.parse(). Use consistent formatting and html classes for easy rendering. 
-            Each exercise should have clear instructions and answer sections.
-
-            For exercises requiring user input, use the following HTML structure and classes:
-            - For text inputs: use <input type="text" class="exercise-input" placeholder="...">
-            - For longer text inputs (writing prompts): use <textarea class="exercise-input" rows="4" placeholder="..."></textarea>
-            - For multiple choice/radio buttons: wrap each option in a label with class "exercise-radio-label". Inside the label, put the <input type="radio" class="exercise-radio-input" name="group_name"> first, then the text. Wrap the group of radio buttons in a div with class "exercise-radio-group".
-            - Wrap each exercise in a div with class "exercise-box".
-
-            Ensure the JSON output is a single valid JSON string. Do not use Python-style string concatenation (e.g. "..." + "...") inside values.
-            JSON ONLY.""", name="English Course Module", type="course_module", collection_name="CefrGrammarProfile")
+        response = await self.phoenix_tracker.agenerate(**module_generation_params(module_number, course_plan))
         module_content = response["content"]
         phoenix_run_id = response.get("run_id")
         
-        parsed_json = None
-        if isinstance(module_content, str):
-            content_to_parse = module_content.strip()
-            
-            code_block_match = re.search(r"```(?:json)?\s*(.*?)```", content_to_parse, re.DOTALL)
-            if code_block_match:
-                content_to_parse = code_block_match.group(1).strip()
-            
-            try:
-                parsed_json = json.loads(content_to_parse)
-            except json.JSONDecodeError:
-                try:
-                    start = content_to_parse.find('{')
-                    end = content_to_parse.rfind('}')
-                    if start != -1 and end != -1:
-                        json_str = content_to_parse[start:end+1]
-                        parsed_json = json.loads(json_str)
-                except:
-                    pass
+        with PARSE_SECONDS.time(type="course_module"):
+            module_content = parse_module_content(module_content)
+            content_json, rendered_html = normalize_module_content(module_content)
 
-            if parsed_json is None:
-                 print(f"Error parsing module content JSON. Raw content preview: {module_content[:200]}")
-                 if "<div" in module_content or "<h" in module_content:
-                     parsed_json = {"html": module_content}
-        
-        if parsed_json:
-            module_content = parsed_json
-            
-        self.db.add_module(course_id=course_id, title=f"Module {module_number}", week_number=module_number, content_html=str(module_content), phoenix_id=phoenix_run_id)
+        module_id = await self.db.add_module(course_id=course_id, title=f"Module {module_number}", week_number=module_number, content_html=content_json, phoenix_id=phoenix_run_id, rendered_html=rendered_html)
+        if plan_item:
+            await self.module_store.register(module_id, course["level"], plan_item)
         return JSONResponse(status_code=200, content={"success": True, "module": module_content})
 
+    async def _reuse_shared_module(self, course: dict, course_id: int, module_number: int, plan_item: dict):
+        """Link an equivalent module already generated for another course; returns its content or None.
+
+        Callers must first check that the course has no module for this week yet.
+        """
+        if not course or not plan_item:
+            return None
+        shared = await self.module_store.find(course["level"], plan_item, course_id)
+        if not shared:
+            return None
+        await self.db.add_module(course_id=course_id, title=f"Module {module_number}", week_number=module_number,
+                                 content_html=shared["content_html"], phoenix_id=shared["phoenix_id"],
+                                 rendered_html=shared["rendered_html"], source_module_id=shared["module_id"])
+        return self.module_store.module_payload(shared)
+
+    @staticmethod
+    def _sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def generate_module_stream(self, request: Request, course_id: int, module_number: int):
+        """Server-sent events variant of generate_module: `chunk` events while generating, then `done` or `error`."""
+        user_id = request.session.get("user_id")
+        if not user_id:
+            return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated."})
+        content = await self.db.get_module_content_by_week(course_id, module_number)
+        if content:
+            content = self.module_store.module_payload({"content_html": content})
+        course = None
+        plan_item = None
+        if not content:
+            course = await self.db.get_course_by_id(course_id)
+            if not course:
+                return JSONResponse(status_code=404, content={"success": False, "message": "Course not found."})
+            plan_item = await self.db.get_course_plan_item(course_id, module_number)
+            content = await self._reuse_shared_module(course, course_id, module_number, plan_item)
+
+        async def events():
+            if content:
+                yield self._sse("done", {"success": True, "module": content})
+                return
+            try:
+                stream = self.phoenix_tracker.astream_generate(**module_generation_params(module_number, course.get("course_plan", "")))
+                async for kind, payload in stream:
+                    if kind == "chunk":
+                        yield self._sse("chunk", {"text": payload})
+                        continue
+                    with PARSE_SECONDS.time(type="course_module"):
+                        module_content = parse_module_content(payload["content"])
+                        content_json, rendered_html = normalize_module_content(module_content)
+                    module_id = await self.db.add_module(course_id=course_id, title=f"Module {module_number}", week_number=module_number, content_html=content_json, phoenix_id=payload.get("run_id"), rendered_html=rendered_html)
+                    if plan_item:
+                        await self.module_store.register(module_id, course["level"], plan_item)
+                    yield self._sse("done", {"success": True, "module": module_content})
+            except Exception as e:
+                print(f"Error streaming module: {e}")
+                yield self._sse("error", {"success": False, "message": str(e)})
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
     async def learn_course(self, request: Request, course_id: int):
         user_id = request.session.get("user_id")
         if not user_id:
             return RedirectResponse(url="/login", status_code=302)
 
-        course = self.db.get_course_by_id(course_id)
-        if not course:
+        view = await self.db.get_course_view(course_id)
+        if not view:
             raise HTTPException(status_code=404, detail="Course not found")
 
-        modules = self.db.get_modules_by_course(course_id)
-
         return self.templates.TemplateResponse(request, "course_learning.html", {
             "request": request,
-            "course": course,
-            "modules": modules
+            "course": view["course"],
+            "modules": view["modules"]
         })
 
     async def learn_course_module(self, request: Request, course_id: int, module_number: int):
@@ -829,77 +912,14 @@ class FluentMindApp:
         if not user_id:
             return RedirectResponse(url="/login", status_code=302)
 
-        course = self.db.get_course_by_id(course_id)
-        if not course:
+        view = await self.db.get_course_view(course_id, module_number)
+        if not view:
             raise HTTPException(status_code=404, detail="Course not found")
         
-        modules = self.db.get_modules_by_course(course_id)
-        current_module = next((m for m in modules if m["week_number"] == module_number), None)
-        
-        if not current_module:
-             pass
-
-        if current_module and current_module.get("content_html"):
-            try:
-                import ast
-                content_data = None
-                raw_content = current_module["content_html"]
-                
-                try:
-                    cleaned_raw = raw_content
-                    if '" + "' in cleaned_raw or "' + '" in cleaned_raw:
-                        cleaned_raw = re.sub(r'"\s*\+\s*"', "", cleaned_raw)
-                        cleaned_raw = re.sub(r"'\s*\+\s*'", "", cleaned_raw)
-                        
-                    content_data = json.loads(cleaned_raw)
-                except:
-                    try:
-                        cleaned = raw_content.strip()
-                        cleaned = re.sub(r'"\s*\+\s*"', "", cleaned)
-                        cleaned = re.sub(r"'\s*\+\s*'", "", cleaned)
-                        
-                        if cleaned.startswith('{') and cleaned.endswith('"'):
-                            cleaned = cleaned[:-1]
-                        content_data = json.loads(cleaned)
-                    except:
-                        try:
-                            content_data = ast.literal_eval(raw_content)
-                        except:
-                            pass
-                
-                if isinstance(content_data, dict):
-
-                     current_module["rendered_html"] = ""
-                     if "html" in content_data:
-                         current_module["rendered_html"] += content_data["html"]
-                     elif "content" in content_data:
-                          current_module["rendered_html"] += str(content_data["content"])
-                     else:
-
-                         for k, v in content_data.items():
-                             if isinstance(v, list):
-                                 current_module["rendered_html"] += f"<h3>{k.capitalize().replace('_', ' ')}</h3><ul>"
-                                 for item in v:
-                                     current_module["rendered_html"] += f"<li>{item}</li>"
-                                 current_module["rendered_html"] += "</ul>"
-                             elif isinstance(v, str):
-                                 if v.strip().startswith("<"):
-                                     current_module["rendered_html"] += v
-                                 else:
-                                     current_module["rendered_html"] += f"<p><strong>{k}:</strong> {v}</p>"
-                elif isinstance(content_data, str):
-                     current_module["rendered_html"] = content_data
-                else:
-                     current_module["rendered_html"] = raw_content
-
-            except Exception as e:
-                print(f"Error preparing module content: {e}")
-                current_module["rendered_html"] = "Error loading content."
-
         return self.templates.TemplateResponse(request, "course_module.html", {
             "request": request,
-            "course": course,
-            "module": current_module,
+            "course": view["course"],
+            "module": view["module"],
             "module_number": module_number
         })
 
@@ -907,52 +927,22 @@ class FluentMindApp:
         user_id = request.session.get("user_id")
         if not user_id:
             return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated."})
-            
-        db_modules = self.db.get_modules_by_course(course_id)
-        created_map = {m['week_number']: m for m in db_modules}
-        
+
+        plan_modules = await self.db.get_course_plan_modules(course_id)
+        if not plan_modules:
+            final_modules = await self.db.get_modules_by_course(course_id)
+            return JSONResponse(status_code=200, content={"success": True, "modules": final_modules})
+
         final_modules = []
-        
-        course = self.db.get_course_by_id(course_id)
-        if course and course.get("course_plan"):
-            try:
-                plan_str = course["course_plan"]
-                if isinstance(plan_str, str):
-                    try:
-                        plan_list = ast.literal_eval(plan_str)
-                    except:
-                        plan_list = json.loads(plan_str)
-                else:
-                    plan_list = plan_str
-
-                if isinstance(plan_list, list):
-                    for item in plan_list:
-                        week_num = item.get('module')
-                        
-                        if week_num in created_map:
-                            db_mod = created_map[week_num]
-                            final_modules.append({
-                                 "module_id": db_mod["module_id"],
-                                 "course_id": course_id,
-                                 "title": db_mod["title"],
-                                 "week_number": week_num,
-                                 "content_html": json.dumps(item) 
-                            })
-                        else:
-                            final_modules.append({
-                                 "module_id": f"plan_{week_num}",
-                                 "course_id": course_id,
-                                 "title": item.get('title', f"Module {week_num}"),
-                                 "week_number": week_num,
-                                 "content_html": json.dumps(item)
-                            })
-                else:
-                    final_modules = db_modules
-            except Exception as e:
-                print(f"Error parsing course plan in mix: {e}")
-                final_modules = db_modules
-        else:
-            final_modules = db_modules
+        for item in plan_modules:
+            generated = item["module_id"] is not None
+            final_modules.append({
+                "module_id": item["module_id"] if generated else f"plan_{item['module_number']}",
+                "course_id": course_id,
+                "title": item["module_title"] if generated else item["title"],
+                "week_number": item["module_number"],
+                "content_html": item["plan_json"]
+            })
 
         return JSONResponse(status_code=200, content={"success": True, "modules": final_modules})
 
@@ -972,40 +962,32 @@ class FluentMindApp:
         annotations = payload.get("annotations", {})
         span_id = payload.get("span_id")
         
+        annotation = None
+        if is_valid_span_id(span_id):
+            annotation = {
+                "span_id": span_id,
+                "name": "user feedback",
+                "annotator_kind": "HUMAN",
+                "result": {
+                    "label": annotations.get("review"),
+                    "score": annotations.get("score"),
+                }
+            }
+
         try:
-            self.db.assess_module_user(
+            await self.db.assess_module_user(
                 user_id=user_id,
                 module_id=annotations.get("module_id"),
                 course_id=annotations.get("course_id"),
                 rating=annotations.get("score"),
                 review=annotations.get("review"),
+                annotation=annotation,
             )
             print(f"Feedback stored in database for user {user_id}, module {annotations.get('module_id')}")
-            
-            if span_id and span_id != "None" and span_id.strip():
-                try:
-                    phoenix_host = os.getenv("PHOENIX_HOST", "http://localhost:6006")
-                    url = f"{phoenix_host}/v1/span_annotations?sync=false"
-                    
-                    annotation = {
-                        "span_id": span_id,
-                        "name": "user feedback",
-                        "annotator_kind": "HUMAN",
-                        "result": {
-                            "label": annotations.get("review"),
-                            "score": annotations.get("score"),
-                        }
-                    }
-                    
-                    response = requests.post(url, json={"data": [annotation]})
-                    
-                    if response.status_code == 200:
-                        print(f"Annotation added to Phoenix successfully via REST API")
-                    else:
-                        print(f"WARNING: Phoenix annotation failed with status {response.status_code}: {response.text}")
-
-                except Exception as e:
-                    print(f"WARNING: Phoenix annotation failed (feedback still saved): {type(e).__name__}: {str(e)}")
+
+            if annotation is not None:
+                # Delivered to Phoenix by the background outbox worker.
+                self.annotation_outbox.notify()
             else:
                 print(f"WARNING: No valid span_id provided. Feedback saved but not annotated in Phoenix.")
             
@@ -1033,7 +1015,7 @@ class FluentMindApp:
         if not module_id or not course_id:
              return JSONResponse(status_code=400, content={"success": False, "message": "Missing module_id or course_id."})
 
-        module_content_html = self.db.get_module_content(module_id, course_id)
+        module_content_html = await self.db.get_module_content(module_id, course_id)
         
         context_str = module_content_html if module_content_html else "Content not available from DB."
         answer_str = json.dumps(answers)
@@ -1060,14 +1042,14 @@ class FluentMindApp:
         """
 
         try:
-            generation_result = self.phoenix_tracker.generate(
+            generation_result = await self.phoenix_tracker.agenerate(
                 temperature=0.0,
                 top_p=1.0,
                 max_tokens=1000,
                 model="gemini-2.5-flash-preview-09-2025",
                 prompt_context=prompt,
                 name="Module Grading",
-                type="grading",
+                type="module_progress_grading",
                 collection_name="CefrGrammarProfile"
             )
             
@@ -1078,21 +1060,21 @@ class FluentMindApp:
             comments = "No comments."
             
             try:
-                import json
-                cleaned = result_content.strip()
-                if cleaned.startswith("```"):
-                    cleaned = cleaned.split("\n", 1)[1].rsplit("\n", 1)[0]
-                if cleaned.startswith("json"):
-                     cleaned = cleaned[4:]
-                
-                data = json.loads(cleaned)
-                assessed_score = float(data.get("score", 0))
-                comments = data.get("comments", "")
+                with PARSE_SECONDS.time(type="module_progress_grading"):
+                    cleaned = result_content.strip()
+                    if cleaned.startswith("```"):
+                        cleaned = cleaned.split("\n", 1)[1].rsplit("\n", 1)[0]
+                    if cleaned.startswith("json"):
+                         cleaned = cleaned[4:]
+
+                    data = json.loads(cleaned)
+                    assessed_score = float(data.get("score", 0))
+                    comments = data.get("comments", "")
             except Exception as e:
                 print(f"Error parsing grading response: {e}")
                 comments = "Error parsing grading response."
                 
-            self.db.add_progress_tracking(
+            await self.db.add_progress_tracking(
                 user_id=user_id,
                 module_id=module_id,
                 course_id=course_id,
@@ -0,0 +1,406 @@
+import json
+import logging
+import sqlite3
+
+from content_parsing import course_plan_items, decode_stored_module_content, parse_course_plan, render_module_html
+from vocabulary_levels import VOCABULARY_LEVEL_KEY, lookup_cefr_level
+
+logger = logging.getLogger(__name__)
+
+
+class Migration:
+    """One numbered schema step.
+
+    `schema(cursor)` runs inside a single transaction together with its
+    schema_version row. `backfill(cursor, after, batch_size)` processes one batch
+    of rows after key `after` and returns the last key it handled (None once
+    there is nothing left); each batch commits on its own, so a large backfill
+    can be interrupted and resumes where it stopped.
+    """
+
+    def __init__(self, version: int, name: str, schema=None, backfill=None, batch_size: int = 100):
+        self.version = version
+        self.name = name
+        self.schema = schema
+        self.backfill = backfill
+        self.batch_size = batch_size
+
+
+def _execute_script(cursor, script: str):
+    """Run a multi-statement script statement by statement (executescript would commit the transaction)."""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            cursor.execute(statement)
+            statement = ""
+    if statement.strip():
+        cursor.execute(statement)
+
+
+def _add_column(cursor, table: str, column: str, definition: str):
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in [info[1] for info in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _base_schema(cursor):
+    _execute_script(cursor, '''
+    CREATE TABLE IF NOT EXISTS user (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    surname TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    proficiency_level TEXT CHECK(proficiency_level IN ('A0', 'A1', 'A2', 'B1', 'B2', 'C1', 'C2')),
+    pp_image TEXT default 'img/settings/avatar-outline.svg',
+    native_language TEXT,
+    interface_language TEXT,
+    role TEXT CHECK(role IN ('Student', 'Technical Support')) DEFAULT 'Student',
+    join_date TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS course (
+    course_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    level TEXT CHECK(level IN ('A0', 'A1', 'A2', 'B1', 'B2', 'C1', 'C2')),
+    title TEXT,
+    description TEXT,
+    duration_weeks INTEGER,
+    course_plan TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS user_course (
+    user_id INTEGER,
+    course_id INTEGER,
+    start_date TEXT,
+    progress_percent REAL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES user(user_id),
+    FOREIGN KEY (course_id) REFERENCES course(course_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS module (
+    module_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_id INTEGER,
+    title TEXT,
+    week_number INTEGER,
+    content_html TEXT,
+    phoenix_id TEXT,
+    FOREIGN KEY (course_id) REFERENCES course(course_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS test (
+    test_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    test_html TEXT,
+    submitted_answers_json TEXT,
+    submitted_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    assessed BOOLEAN DEFAULT 0,
+    assessed_level TEXT CHECK(assessed_level IN ('A0', 'A1', 'A2', 'B1', 'B2', 'C1', 'C2')),
+    assessed_by_model TEXT,
+    phoenix_run_id TEXT,
+    FOREIGN KEY (user_id) REFERENCES user(user_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS module_rating (
+    module_id INTEGER,
+    user_id INTEGER,
+    course_id INTEGER,
+    rating BOOLEAN DEFAULT 0,
+    review TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (module_id) REFERENCES module(module_id),
+    FOREIGN KEY (user_id) REFERENCES user(user_id),
+    FOREIGN KEY (course_id) REFERENCES course(course_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS progress_tracking (
+        module_attempt_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        module_id INTEGER,
+        course_id INTEGER,
+        answers_json TEXT,
+        submitted_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        assessed BOOLEAN DEFAULT 0,
+        assessed_score REAL CHECK(assessed_score BETWEEN 0 AND 100),
+        assessed_by_model TEXT,
+        comments_from_model TEXT,
+        phoenix_run_id TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES user(user_id),
+        FOREIGN KEY (module_id) REFERENCES module(module_id),
+        FOREIGN KEY (course_id) REFERENCES course(course_id)
+    );
+    CREATE TABLE IF NOT EXISTS certificate (
+    certificate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        certificate TEXT,
+        status BOOLEAN DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES user(user_id)
+    );
+    CREATE TABLE IF NOT EXISTS vocabulary (
+        vocabulary_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        words TEXT,
+        FOREIGN KEY (user_id) REFERENCES user(user_id)
+    );
+    ''')
+
+
+def _user_role(cursor):
+    _add_column(cursor, "user", "role", "TEXT CHECK(role IN ('Student', 'Technical Support')) DEFAULT 'Student'")
+
+
+def _template_pool(cursor):
+    _execute_script(cursor, '''
+    CREATE TABLE IF NOT EXISTS template_pool (
+        pool_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT CHECK(kind IN ('exam', 'course')),
+        level TEXT,
+        ref_id INTEGER,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_template_pool_kind_level ON template_pool(kind, level, pool_item_id);
+    ''')
+
+
+def _module_rendered_html(cursor):
+    _add_column(cursor, "module", "rendered_html", "TEXT")
+
+
+def _backfill_module_content(cursor, after, batch_size):
+    """Rewrite legacy module content as canonical JSON and store its rendered HTML."""
+    cursor.execute(
+        "SELECT module_id, content_html FROM module WHERE rendered_html IS NULL AND module_id > ? ORDER BY module_id LIMIT ?",
+        (after or 0, batch_size)
+    )
+    rows = cursor.fetchall()
+    for module_id, raw_content in rows:
+        content_data = decode_stored_module_content(raw_content) if raw_content else None
+        content_json = raw_content if content_data is None else json.dumps(content_data, ensure_ascii=False)
+        cursor.execute(
+            "UPDATE module SET content_html = ?, rendered_html = ? WHERE module_id = ?",
+            (content_json, render_module_html(content_data, raw_content or ""), module_id)
+        )
+    return rows[-1][0] if rows else None
+
+
+def _vocabulary_words(cursor):
+    _execute_script(cursor, '''
+    CREATE TABLE IF NOT EXISTS vocabulary_word (
+        word_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        word TEXT NOT NULL COLLATE NOCASE,
+        definition TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES user(user_id)
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_vocabulary_word_user_word ON vocabulary_word(user_id, word);
+    ''')
+
+
+def _backfill_vocabulary_blobs(cursor, after, batch_size):
+    """Move legacy per-user JSON blobs in `vocabulary` into one vocabulary_word row per word."""
+    cursor.execute(
+        "SELECT vocabulary_id, user_id, words FROM vocabulary WHERE vocabulary_id > ? ORDER BY vocabulary_id LIMIT ?",
+        (after or 0, batch_size)
+    )
+    rows = cursor.fetchall()
+    for vocabulary_id, user_id, words in rows:
+        try:
+            data = json.loads(words) if words else {}
+        except json.JSONDecodeError:
+            data = {}
+        if isinstance(data, dict):
+            cursor.executemany(
+                "INSERT INTO vocabulary_word (user_id, word, definition) VALUES (?, ?, ?) ON CONFLICT(user_id, word) DO NOTHING",
+                [(user_id, word, definition) for word, definition in data.items()]
+            )
+        cursor.execute("DELETE FROM vocabulary WHERE vocabulary_id = ?", (vocabulary_id,))
+    return rows[-1][0] if rows else None
+
+
+def _vocabulary_levels(cursor):
+    _add_column(cursor, "vocabulary_word", "cefr_level", "TEXT")
+    _execute_script(cursor, f'''
+    CREATE INDEX IF NOT EXISTS idx_vocabulary_word_user_recent ON vocabulary_word(user_id, word_id);
+    CREATE INDEX IF NOT EXISTS idx_vocabulary_word_user_level ON vocabulary_word(user_id, {VOCABULARY_LEVEL_KEY}, word);
+    ''')
+
+
+def _backfill_vocabulary_levels(cursor, after, batch_size):
+    """Fill cefr_level for words saved before levels were tracked."""
+    cursor.execute(
+        "SELECT word_id, word FROM vocabulary_word WHERE cefr_level IS NULL AND word_id > ? ORDER BY word_id LIMIT ?",
+        (after or 0, batch_size)
+    )
+    rows = cursor.fetchall()
+    levels = [(lookup_cefr_level(word), word_id) for word_id, word in rows]
+    cursor.executemany(
+        "UPDATE vocabulary_word SET cefr_level = ? WHERE word_id = ?",
+        [(level, word_id) for level, word_id in levels if level]
+    )
+    return rows[-1][0] if rows else None
+
+
+def _lookup_indexes(cursor):
+    _execute_script(cursor, '''
+    CREATE INDEX IF NOT EXISTS idx_user_course_user ON user_course(user_id, course_id);
+    CREATE INDEX IF NOT EXISTS idx_module_course_week ON module(course_id, week_number);
+    CREATE INDEX IF NOT EXISTS idx_progress_tracking_user_module ON progress_tracking(user_id, module_id);
+    CREATE INDEX IF NOT EXISTS idx_certificate_user ON certificate(user_id, certificate_id);
+    CREATE INDEX IF NOT EXISTS idx_certificate_status ON certificate(status, certificate_id);
+    ''')
+
+
+def _course_plan_items(cursor):
+    _execute_script(cursor, '''
+    CREATE TABLE IF NOT EXISTS course_plan_item (
+        course_id INTEGER NOT NULL,
+        module_number INTEGER NOT NULL,
+        title TEXT,
+        plan_json TEXT,
+        PRIMARY KEY (course_id, module_number),
+        FOREIGN KEY (course_id) REFERENCES course(course_id)
+    );
+    ''')
+
+
+def _backfill_course_plans(cursor, after, batch_size):
+    """Rewrite legacy str(list) course plans as JSON and split them into course_plan_item rows."""
+    cursor.execute(
+        "SELECT course_id, course_plan FROM course WHERE course_id > ? ORDER BY course_id LIMIT ?",
+        (after or 0, batch_size)
+    )
+    rows = cursor.fetchall()
+    for course_id, course_plan in rows:
+        plan_list = parse_course_plan(course_plan)
+        if plan_list is None:
+            continue
+        cursor.execute("UPDATE course SET course_plan = ? WHERE course_id = ?", (json.dumps(plan_list, ensure_ascii=False), course_id))
+        cursor.executemany(
+            "INSERT OR IGNORE INTO course_plan_item (course_id, module_number, title, plan_json) VALUES (?, ?, ?, ?)",
+            [(course_id, *item) for item in course_plan_items(plan_list)]
+        )
+    return rows[-1][0] if rows else None
+
+
+def _module_sharing(cursor):
+    _add_column(cursor, "module", "plan_signature", "TEXT")
+    _add_column(cursor, "module", "source_module_id", "INTEGER REFERENCES module(module_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_module_plan_signature ON module(plan_signature, module_id)")
+
+
+def _annotation_outbox(cursor):
+    _execute_script(cursor, '''
+    CREATE TABLE IF NOT EXISTS annotation_outbox (
+        outbox_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        span_id TEXT NOT NULL,
+        payload_json TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL DEFAULT 0,
+        last_error TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_annotation_outbox_due ON annotation_outbox(status, next_attempt_at, outbox_id);
+    ''')
+
+
+def _template_pool_reservations(cursor):
+    _execute_script(cursor, '''
+    CREATE TABLE IF NOT EXISTS template_pool_reservation (
+        reservation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        level TEXT,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_template_pool_reservation_kind_level ON template_pool_reservation(kind, level, expires_at);
+    ''')
+
+
+# Append new steps at the end; never renumber or edit one that has shipped.
+MIGRATIONS = [
+    Migration(1, "base schema", schema=_base_schema),
+    Migration(2, "user role", schema=_user_role),
+    Migration(3, "template pool", schema=_template_pool),
+    Migration(4, "module rendered_html column", schema=_module_rendered_html),
+    Migration(5, "canonical module content", backfill=_backfill_module_content, batch_size=50),
+    Migration(6, "vocabulary_word table", schema=_vocabulary_words),
+    Migration(7, "vocabulary blobs to rows", backfill=_backfill_vocabulary_blobs),
+    Migration(8, "vocabulary CEFR levels", schema=_vocabulary_levels),
+    Migration(9, "vocabulary CEFR level backfill", backfill=_backfill_vocabulary_levels, batch_size=500),
+    Migration(10, "lookup indexes", schema=_lookup_indexes),
+    Migration(11, "course_plan_item table", schema=_course_plan_items),
+    Migration(12, "course plans to JSON and plan items", backfill=_backfill_course_plans, batch_size=50),
+    Migration(13, "shared module signatures", schema=_module_sharing),
+    Migration(14, "annotation outbox", schema=_annotation_outbox),
+    Migration(15, "template pool reservations", schema=_template_pool_reservations),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(connection) -> int:
+    row = connection.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def _is_applied(cursor, version: int) -> bool:
+    cursor.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,))
+    return cursor.fetchone() is not None
+
+
+def _apply(connection, migration: Migration):
+    cursor = connection.cursor()
+    if migration.backfill is not None:
+        after = None
+        while True:
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                after = migration.backfill(cursor, after, migration.batch_size)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            if after is None:
+                break
+
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # Another worker may have finished this step while we waited for the write lock.
+        if _is_applied(cursor, migration.version):
+            connection.rollback()
+            return False
+        if migration.schema is not None:
+            migration.schema(cursor)
+        cursor.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (migration.version, migration.name))
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return True
+
+
+def apply_migrations(connection) -> list:
+    """Apply every migration newer than the stored schema_version; returns the versions applied."""
+    connection.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT,
+        applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    connection.commit()
+    current = current_version(connection)
+    if current >= LATEST_VERSION:
+        return []
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        if _apply(connection, migration):
+            logger.info("Applied migration %s: %s", migration.version, migration.name)
+            applied.append(migration.version)
+    return applied
@@ -0,0 +1,103 @@
+import hashlib
+import json
+
+GENERATED_MODULE_COLLECTION = "GeneratedModules"
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return [str(value)]
+
+
+def plan_signature(level: str, plan_item: dict):
+    """Return (text, sha256) describing a planned module by its level, topics and objectives."""
+    topics = sorted(item.strip().lower() for item in _as_list(plan_item.get("topics")))
+    objectives = sorted(item.strip().lower() for item in _as_list(plan_item.get("objectives")))
+    text = f"Level: {level}\nTopics: {'; '.join(topics)}\nObjectives: {'; '.join(objectives)}"
+    return text, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ModuleStore:
+    """Content-addressed lookup of already generated modules.
+
+    A planned module is identified by its (level, topics, objectives) signature.
+    An exact signature match is answered from SQLite; otherwise the nearest module
+    in the GeneratedModules Weaviate collection at the same level is reused if its
+    vector distance is within max_distance. Weaviate failures only disable the
+    similarity path, never generation.
+    """
+
+    def __init__(self, db, weaviate_connection, collection: str = GENERATED_MODULE_COLLECTION, max_distance: float = 0.1):
+        self.db = db
+        self.weaviate = weaviate_connection
+        self.collection = collection
+        self.max_distance = max_distance
+        self._stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "errors": 0}
+
+    async def find(self, level: str, plan_item: dict, course_id: int = None):
+        """Return the module row to reuse for this planned module, or None.
+
+        Modules that belong to course_id (the requesting course) are never returned.
+        """
+        text, signature = plan_signature(level, plan_item)
+        module = await self.db.get_module_by_signature(signature, course_id)
+        if module:
+            self._stats["exact_hits"] += 1
+            return module
+
+        module_id = await self._nearest_module_id(level, text)
+        module = await self.db.get_module_by_id(module_id) if module_id is not None else None
+        if module and module["course_id"] != course_id:
+            self._stats["similar_hits"] += 1
+            return module
+        self._stats["misses"] += 1
+        return None
+
+    async def _nearest_module_id(self, level: str, text: str):
+        try:
+            from weaviate.classes.query import Filter, MetadataQuery
+            collection, _ = await self.weaviate.aget_collection(self.collection)
+            response = await collection.query.near_text(
+                query=text,
+                limit=1,
+                filters=Filter.by_property("level").equal(level),
+                return_metadata=MetadataQuery(distance=True),
+            )
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"Warning: similar-module lookup failed: {e}")
+            return None
+        for obj in response.objects:
+            if obj.metadata.distance is not None and obj.metadata.distance <= self.max_distance:
+                return obj.properties.get("module_id")
+        return None
+
+    async def register(self, module_id: int, level: str, plan_item: dict):
+        """Index a freshly generated module so later identical or similar plans can reuse it."""
+        text, signature = plan_signature(level, plan_item)
+        await self.db.set_module_signature(module_id, signature)
+        try:
+            collection, _ = await self.weaviate.aget_collection(self.collection)
+            await collection.data.insert(properties={
+                "module_id": module_id,
+                "level": level,
+                "signature": signature,
+                "text": text,
+            })
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"Warning: could not index module {module_id} for reuse: {e}")
+
+    @staticmethod
+    def module_payload(module: dict):
+        """Decode a stored module's canonical JSON for API responses."""
+        try:
+            return json.loads(module["content_html"])
+        except (TypeError, json.JSONDecodeError):
+            return module["content_html"]
+
+    def stats(self) -> dict:
+        return dict(self._stats)
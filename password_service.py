@@ -0,0 +1,99 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pwdlib import PasswordHash
+
+_shared_password_hash = None
+_shared_lock = threading.Lock()
+
+
+def shared_password_hash() -> PasswordHash:
+    """The process-wide PasswordHash (argon2 with the recommended parameters), built once."""
+    global _shared_password_hash
+    with _shared_lock:
+        if _shared_password_hash is None:
+            _shared_password_hash = PasswordHash.recommended()
+        return _shared_password_hash
+
+
+class PasswordService:
+    """Argon2 hash/verify on a bounded worker pool so a login burst cannot stall the event loop.
+
+    argon2 releases the GIL while hashing, so a thread pool gives real parallelism
+    without pickling hashes across processes. At most max_workers hashes run at
+    once; up to max_pending more wait in the executor queue, and further callers
+    wait on the semaphore.
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = 32, password_hash: PasswordHash = None):
+        self.password_hash = password_hash or shared_password_hash()
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="argon2")
+        self._slots = None
+        self._lock = threading.Lock()
+        self._stats = {"waiting": 0, "queued": 0, "running": 0, "completed": 0, "rehashed": 0,
+                       "max_queue_depth": 0, "queue_wait_ms": 0.0}
+
+    def _get_slots(self):
+        # Created lazily so the semaphore binds to the running event loop.
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_pending)
+        return self._slots
+
+    def _adjust(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self._stats[name] += delta
+            depth = self._stats["waiting"] + self._stats["queued"]
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], depth)
+
+    def _job(self, submitted_at: float, func, *args):
+        self._adjust(queued=-1, running=1, queue_wait_ms=(time.perf_counter() - submitted_at) * 1000)
+        try:
+            return func(*args)
+        finally:
+            self._adjust(running=-1, completed=1)
+
+    async def _run(self, func, *args):
+        slots = self._get_slots()
+        self._adjust(waiting=1)
+        try:
+            await slots.acquire()
+        finally:
+            self._adjust(waiting=-1)
+        try:
+            self._adjust(queued=1)
+            loop = asyncio.get_running_loop()
+            job = functools.partial(self._job, time.perf_counter(), func, *args)
+            return await loop.run_in_executor(self._executor, job)
+        finally:
+            slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.password_hash.hash, password)
+
+    async def verify(self, password: str, stored_hash: str) -> bool:
+        return await self._run(self.password_hash.verify, password, stored_hash)
+
+    async def verify_and_update(self, password: str, stored_hash: str):
+        """Return (valid, new_hash); new_hash is set when stored_hash uses outdated parameters."""
+        valid, new_hash = await self._run(self.password_hash.verify_and_update, password, stored_hash)
+        if new_hash:
+            self._adjust(rehashed=1)
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = stats["waiting"] + stats["queued"]
+        stats["max_workers"] = self.max_workers
+        stats["max_pending"] = self.max_pending
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=True)
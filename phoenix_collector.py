@@ -0,0 +1,153 @@
+"""Phoenix collector sidecar shared by every web worker on the host.
+
+The first worker that finds no collector running takes an exclusive flock on
+the lock file and spawns this module as a detached supervisor process, handing
+the locked descriptor to it. The supervisor keeps the lock for its lifetime,
+runs `phoenix serve` as a child and restarts it if it exits. Workers only
+export spans to it over OTLP/HTTP, so the Phoenix server never shares a
+process (or a GIL) with request handling.
+
+    python phoenix_collector.py            # run the supervisor in the foreground
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, fall back to port checks only.
+    fcntl = None
+
+DEFAULT_LOCK_PATH = "phoenix_collector.lock"
+DEFAULT_LOG_PATH = "phoenix_collector.log"
+
+
+def collector_settings() -> dict:
+    """Host, ports and file locations for the sidecar, from the environment."""
+    return {
+        "host": os.environ.get("PHOENIX_COLLECTOR_HOST", "localhost"),
+        "port": int(os.environ.get("PHOENIX_PORT", 6006)),
+        "grpc_port": int(os.environ.get("PHOENIX_GRPC_PORT", 4317)),
+        "lock_path": os.environ.get("PHOENIX_COLLECTOR_LOCK", DEFAULT_LOCK_PATH),
+        "log_path": os.environ.get("PHOENIX_COLLECTOR_LOG", DEFAULT_LOG_PATH),
+        "start_timeout": float(os.environ.get("PHOENIX_COLLECTOR_START_TIMEOUT", 60)),
+    }
+
+
+def otlp_endpoint(host: str, port: int) -> str:
+    return f"http://{host}:{port}/v1/traces"
+
+
+def is_listening(host: str, port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(1.0)
+        return s.connect_ex((host, port)) == 0
+
+
+def wait_until_listening(host: str, port: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if is_listening(host, port):
+            return True
+        time.sleep(0.25)
+    return is_listening(host, port)
+
+
+def _try_lock(lock_path: str):
+    """Return an fd holding an exclusive lock on lock_path, or None if another process holds it."""
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def ensure_collector(host: str = None, port: int = None, grpc_port: int = None, lock_path: str = None,
+                     log_path: str = None, start_timeout: float = None) -> bool:
+    """Make sure a collector is serving on host:port, spawning the supervisor if nobody holds the lock.
+
+    Returns True once the collector accepts connections. Safe to call from many
+    workers at once: only the one that wins the lock spawns a supervisor.
+    """
+    settings = collector_settings()
+    host = host or settings["host"]
+    port = port or settings["port"]
+    grpc_port = grpc_port or settings["grpc_port"]
+    lock_path = lock_path or settings["lock_path"]
+    log_path = log_path or settings["log_path"]
+    start_timeout = settings["start_timeout"] if start_timeout is None else start_timeout
+
+    if is_listening(host, port):
+        return True
+    if fcntl is None:
+        print("Warning: file locks are unavailable; start the collector with `python phoenix_collector.py`.")
+        return wait_until_listening(host, port, start_timeout)
+
+    fd = _try_lock(lock_path)
+    if fd is None:
+        # A supervisor is alive (possibly still starting Phoenix).
+        return wait_until_listening(host, port, start_timeout)
+    try:
+        command = [sys.executable, os.path.abspath(__file__), "--lock-fd", str(fd),
+                   "--port", str(port), "--grpc-port", str(grpc_port)]
+        with open(log_path, "ab") as log:
+            subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                             pass_fds=(fd,), start_new_session=True)
+        print(f"Started Phoenix collector supervisor (lock {lock_path}, log {log_path}).")
+    finally:
+        # The child inherited the locked descriptor and now owns the lock.
+        os.close(fd)
+    return wait_until_listening(host, port, start_timeout)
+
+
+def supervise(lock_fd: int, port: int, grpc_port: int, max_backoff: float = 30.0):
+    """Run `phoenix serve` until SIGTERM/SIGINT, restarting it with backoff whenever it exits."""
+    if lock_fd is not None:
+        os.ftruncate(lock_fd, 0)
+        os.write(lock_fd, f"{os.getpid()}\n".encode())
+    env = dict(os.environ, PHOENIX_PORT=str(port), PHOENIX_GRPC_PORT=str(grpc_port))
+    state = {"stopping": False, "child": None}
+
+    def stop(signum, frame):
+        state["stopping"] = True
+        if state["child"] is not None and state["child"].poll() is None:
+            state["child"].terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    backoff = 1.0
+    while not state["stopping"]:
+        started = time.monotonic()
+        state["child"] = subprocess.Popen([sys.executable, "-m", "phoenix.server.main", "serve"], env=env)
+        code = state["child"].wait()
+        if state["stopping"]:
+            break
+        if time.monotonic() - started > 60:
+            backoff = 1.0
+        print(f"Warning: Phoenix collector exited with code {code}; restarting in {backoff:.0f}s.", flush=True)
+        time.sleep(backoff)
+        backoff = min(backoff * 2, max_backoff)
+
+
+if __name__ == "__main__":
+    settings = collector_settings()
+    parser = argparse.ArgumentParser(description="Supervise a shared Phoenix collector process.")
+    parser.add_argument("--lock-fd", type=int, help="already locked descriptor inherited from a web worker")
+    parser.add_argument("--port", type=int, default=settings["port"])
+    parser.add_argument("--grpc-port", type=int, default=settings["grpc_port"])
+    args = parser.parse_args()
+
+    lock_fd = args.lock_fd
+    if lock_fd is None and fcntl is not None:
+        lock_fd = _try_lock(settings["lock_path"])
+        if lock_fd is None:
+            print(f"A Phoenix collector supervisor already holds {settings['lock_path']}.")
+            sys.exit(0)
+    supervise(lock_fd, args.port, args.grpc_port)
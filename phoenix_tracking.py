@@ -1,62 +1,312 @@
+import asyncio
 import getpass
 import os
 import socket
+import time
+from typing import TYPE_CHECKING
 
 os.environ.setdefault("OTEL_TRACES_EXPORTER", "none")
 os.environ.setdefault("OTEL_METRICS_EXPORTER", "none")
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-import phoenix as px
-from phoenix.otel import register
 from opentelemetry import trace
-from opentelemetry.trace import Status, StatusCode, format_span_id, get_current_span
-import requests
-import json
-import weaviate
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate
+from opentelemetry.trace import Status, StatusCode, format_span_id
+from weaviate_connection import WeaviateConnection
+from llm_registry import LLMClientRegistry
+from llm_cache import LLMResponseCache
+from retrieval_cache import RetrievalCache
+from tracing import DeferredTracer, build_tracer_provider
+from metrics import (GENERATION_SECONDS, LLM_CACHE_REQUESTS, LLM_SECONDS, LLM_TOKENS, RETRIEVAL_CACHE_REQUESTS,
+                     RETRIEVAL_SECONDS)
+from phoenix_collector import collector_settings, ensure_collector, otlp_endpoint
+
+if TYPE_CHECKING:
+    import weaviate
+
+# Imported by preload_dependencies() in the background so the first request does not pay for them.
+# phoenix, langchain and weaviate each take from one to several seconds to import.
+HEAVY_DEPENDENCIES = (
+    "langchain_core.messages",
+    "langchain_google_genai",
+    "langchain_openai",
+    "weaviate",
+    "weaviate.classes.query",
+)
+
+
+def _is_port_in_use(port):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        return s.connect_ex(('localhost', port)) == 0
 
 
 class PhoenixTracking:
     def __init__(self, app_name: str, launch_ui: bool = False):
+        """Cheap to construct: tracing is started later by start_tracing()/astart() and is a no-op until then."""
         self.app_name = app_name
         self.session = None
-        
-        ui_port = 6006
-        grpc_port = int(os.environ.get("PHOENIX_GRPC_PORT", 4317))
+        self.tracer = DeferredTracer()
+        self._startup_task = None
+        self.phoenix_project_name = "RAG_English_Learning"
+        self.max_concurrency_per_model = int(os.environ.get("LLM_MAX_CONCURRENCY", 4))
+        self._model_limiters = {}
+        self.weaviate = WeaviateConnection(
+            host=os.environ.get("WEAVIATE_HOST", "localhost"),
+            port=int(os.environ.get("WEAVIATE_PORT", 8080)),
+            grpc_port=int(os.environ.get("WEAVIATE_GRPC_PORT", 50051)),
+            health_check_interval=float(os.environ.get("WEAVIATE_HEALTH_CHECK_INTERVAL", 30)),
+        )
 
-        def is_port_in_use(port):
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                return s.connect_ex(('localhost', port)) == 0
+        self.llm_clients = LLMClientRegistry(max_size=int(os.environ.get("LLM_CLIENT_CACHE_SIZE", 16)))
+        self.response_cache = LLMResponseCache(
+            db_name=os.environ.get("CACHE_DB_PATH", "cache.db"),
+            ttl_seconds=float(os.environ.get("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+            max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 5000)),
+            temperature_threshold=float(os.environ.get("LLM_CACHE_TEMPERATURE_THRESHOLD", 0.3)),
+        )
+        self.retrieval_cache = RetrievalCache(
+            db_name=os.environ.get("CACHE_DB_PATH", "cache.db"),
+            max_entries=int(os.environ.get("RETRIEVAL_CACHE_MAX_ENTRIES", 256)),
+            persistent=os.environ.get("RETRIEVAL_CACHE_PERSISTENT", "0") == "1",
+            ttl_seconds=float(os.environ.get("RETRIEVAL_CACHE_TTL_SECONDS", 24 * 3600)),
+        )
 
-        phoenix_running = False
-        if is_port_in_use(ui_port):
-            phoenix_running = True
+    def start_tracing(self):
+        """Connect to the Phoenix collector and install its tracer. Blocking; astart() runs it off the event loop.
+
+        PHOENIX_COLLECTOR selects how the collector is found:
+        "sidecar" (default) spawns or reuses the shared process from phoenix_collector.py,
+        "external" only exports to PHOENIX_COLLECTOR_ENDPOINT, and
+        "embedded" runs Phoenix inside this process with px.launch_app (single-worker development).
+        """
+        mode = os.environ.get("PHOENIX_COLLECTOR", "sidecar").lower()
+        settings = collector_settings()
+        endpoint = os.environ.get("PHOENIX_COLLECTOR_ENDPOINT") or otlp_endpoint(settings["host"], settings["port"])
+
+        if mode == "embedded":
+            self._launch_embedded(settings["port"], settings["grpc_port"])
+        elif mode == "sidecar":
+            if not ensure_collector():
+                print(f"Warning: Phoenix collector is not reachable at {endpoint}; spans will be dropped until it is.")
+
+        try:
+            tracer_provider = build_tracer_provider(endpoint)
+            trace.set_tracer_provider(tracer_provider)
+        except Exception as e:
+            print(f"Warning: Could not register tracer: {e}")
+            tracer_provider = trace.get_tracer_provider()
+
+        self.tracer.set_tracer(tracer_provider.get_tracer(__name__))
+
+    def _launch_embedded(self, ui_port: int, grpc_port: int):
+        import phoenix as px
+
+        if _is_port_in_use(ui_port):
             print(f"Phoenix UI port ({ui_port}) is already in use. Assuming Phoenix is running.")
-        
-        if not phoenix_running:
-            if is_port_in_use(grpc_port):
-                print(f"Phoenix gRPC port ({grpc_port}) is in use. Finding a free port...")
-                new_port = grpc_port + 1
-                while is_port_in_use(new_port):
-                    new_port += 1
-                os.environ["PHOENIX_GRPC_PORT"] = str(new_port)
-                print(f"Switched Phoenix gRPC port to {new_port}")
+            return
+
+        if _is_port_in_use(grpc_port):
+            print(f"Phoenix gRPC port ({grpc_port}) is in use. Finding a free port...")
+            new_port = grpc_port + 1
+            while _is_port_in_use(new_port):
+                new_port += 1
+            os.environ["PHOENIX_GRPC_PORT"] = str(new_port)
+            print(f"Switched Phoenix gRPC port to {new_port}")
 
+        try:
+            self.session = px.launch_app(use_temp_dir=False)
+        except Exception as e:
+            print(f"Warning: Could not launch Phoenix UI: {e}")
+
+    @staticmethod
+    def preload_dependencies():
+        """Import the LLM and Weaviate client libraries so first use does not block a request."""
+        import importlib
+        for module in HEAVY_DEPENDENCIES:
             try:
-                self.session = px.launch_app(use_temp_dir=False)
+                importlib.import_module(module)
             except Exception as e:
-                print(f"Warning: Could not launch Phoenix UI: {e}")
+                print(f"Warning: Could not preload {module}: {e}")
 
+    def _start_in_background(self):
         try:
-            tracer_provider = register()
+            self.start_tracing()
         except Exception as e:
-            print(f"Warning: Could not register tracer: {e}")
-            tracer_provider = trace.get_tracer_provider()
+            print(f"Warning: Phoenix tracing failed to start: {e}")
+        self.preload_dependencies()
 
-        self.tracer = tracer_provider.get_tracer(__name__)
-        self.phoenix_project_name = "RAG_English_Learning"
+    async def astart(self):
+        """Start tracing and preload dependencies on a worker thread; returns immediately."""
+        if self._startup_task is None:
+            self._startup_task = asyncio.create_task(asyncio.to_thread(self._start_in_background))
+        return self._startup_task
+
+    def close(self):
+        self.weaviate.close()
+        self.response_cache.close()
+        self.retrieval_cache.close()
+
+    async def aclose(self):
+        if self._startup_task is not None and not self._startup_task.done():
+            self._startup_task.cancel()
+        await self.weaviate.aclose()
+        await self.llm_clients.aclose()
+        self.response_cache.close()
+        self.retrieval_cache.close()
+
+    def _record_weaviate_connection(self, span, reused: bool):
+        span.set_attribute("weaviate.connection.reused", reused)
+        for key, value in self.weaviate.stats().items():
+            span.set_attribute(f"weaviate.connection.{key}", value)
+
+    def _model_limiter(self, model: str) -> asyncio.Semaphore:
+        """Per-model semaphore capping concurrent async LLM calls."""
+        limiter = self._model_limiters.get(model)
+        if limiter is None:
+            limiter = asyncio.Semaphore(self.max_concurrency_per_model)
+            self._model_limiters[model] = limiter
+        return limiter
+
+    def _build_llm(self, family: str, model: str, temperature: float, top_p: float, max_tokens: int, **kwargs):
+        if family.lower() == 'openai':
+            from langchain_openai import ChatOpenAI
+            if not os.environ.get("OPENAI_API_KEY"):
+                os.environ["OPENAI_API_KEY"] = getpass.getpass("Enter your OpenAI API key: ")
+            http_client, http_async_client = self.llm_clients.http_clients()
+            return ChatOpenAI(
+                model=model if "gpt" in model else "gpt-3.5-turbo",
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                model_kwargs=kwargs,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                stream_usage=True,
+            )
+        elif family.lower() == 'gemini':
+            if "GOOGLE_API_KEY" not in os.environ:
+                raise ValueError("GOOGLE_API_KEY environment variable is not set. Please set it in your .env file or environment.")
+
+            from google.genai import Client
+            from google.genai.types import HttpOptions
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            llm = ChatGoogleGenerativeAI(
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=None,
+                max_retries=2,
+            )
+            # ChatGoogleGenerativeAI always builds its own google-genai client; swap in one that
+            # sends through the shared httpx clients (google-genai never closes clients it was given).
+            http_client, http_async_client = self.llm_clients.http_clients()
+            llm.client = Client(
+                api_key=os.environ["GOOGLE_API_KEY"],
+                http_options=HttpOptions(httpx_client=http_client, httpx_async_client=http_async_client),
+            )
+            return llm
+        raise ValueError(f"Unsupported LLM family: {family}")
+
+    def _get_llm(self, span, family: str, model: str, temperature: float, top_p: float, max_tokens: int, **kwargs):
+        """Reuse a cached client for these parameters, constructing one only on a registry miss."""
+        key = self.llm_clients.make_key(family, model, temperature, top_p, max_tokens, **kwargs)
+        llm, cached = self.llm_clients.get(
+            key, lambda: self._build_llm(family, model, temperature, top_p, max_tokens, **kwargs))
+        span.set_attribute("llm.client.cached", cached)
+        return llm
+
+    def _build_messages(self, prompt: str, role: str) -> list:
+        from langchain_core.messages import HumanMessage, SystemMessage
+        if role.lower() == 'system':
+            return [SystemMessage(content=prompt)]
+        return [HumanMessage(content=prompt)]
+
+    def _start_llm_span(self, span, prompt: str, role: str, model: str, temperature: float, top_p: float, max_tokens: int):
+        span.add_event("Starting LLM generation")
+        span.set_attribute("llm.model_name", model)
+        span.set_attribute("llm.input_messages.0.role", role)
+        span.set_attribute("llm.input_messages.0.content", prompt)
+        span.set_attribute("llm.temperature", temperature if temperature else 1.0)
+        span.set_attribute("llm.top_p", top_p if top_p else 1.0)
+        span.set_attribute("llm.max_tokens", max_tokens)
+
+    @staticmethod
+    def _token_usage(response) -> tuple:
+        """(prompt, completion, total) tokens of an LLM message or aggregated stream chunk.
+
+        LangChain's standard usage_metadata is filled by both Gemini and OpenAI models
+        (for streamed OpenAI responses only with stream_usage); OpenAI's
+        response_metadata["token_usage"] is the fallback.
+        """
+        usage = getattr(response, 'usage_metadata', None)
+        if usage:
+            prompt_tokens = usage.get('input_tokens', 0) or 0
+            completion_tokens = usage.get('output_tokens', 0) or 0
+            return prompt_tokens, completion_tokens, usage.get('total_tokens') or prompt_tokens + completion_tokens
+        usage = (getattr(response, 'response_metadata', None) or {}).get('token_usage') or {}
+        prompt_tokens = usage.get('prompt_tokens', 0) or 0
+        completion_tokens = usage.get('completion_tokens', 0) or 0
+        return prompt_tokens, completion_tokens, usage.get('total_tokens') or prompt_tokens + completion_tokens
+
+    def _finish_llm_span(self, span, response) -> dict:
+        prompt_tokens, completion_tokens, total_tokens = self._token_usage(response)
+
+        span.set_attribute("llm.output_messages.0.role", "assistant")
+        span.set_attribute("llm.output_messages.0.content", response.content)
+        span.set_attribute("llm.token_count.total", total_tokens)
+        span.set_attribute("llm.token_count.prompt", prompt_tokens)
+        span.set_attribute("llm.token_count.completion", completion_tokens)
+
+        output_dict = {
+            'role': 'assistant',
+            'content': response.content,
+            'total_tokens': total_tokens,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'cache': 'bypass',
+            'span_id': self._span_id(span),
+        }
+
+        span.add_event("LLM generation completed")
+        span.set_status(Status(StatusCode.OK))
+        return output_dict
+
+    @staticmethod
+    def _span_id(span):
+        """Hex span id to annotate later, or None for no-op spans started before tracing was ready."""
+        context = span.get_span_context()
+        return format_span_id(context.span_id) if context.is_valid else None
+
+    def _record_cache_lookup(self, span, hit: bool):
+        stats = self.response_cache.stats()
+        span.set_attribute("llm.cache.hit", hit)
+        span.set_attribute("llm.cache.hits", stats["hits"])
+        span.set_attribute("llm.cache.misses", stats["misses"])
+
+    def _finish_cached_llm_span(self, span, cached: dict) -> dict:
+        span.set_attribute("llm.output_messages.0.role", "assistant")
+        span.set_attribute("llm.output_messages.0.content", cached["content"])
+        span.set_attribute("llm.token_count.total", cached["total_tokens"])
+        span.add_event("LLM response served from cache")
+        span.set_status(Status(StatusCode.OK))
+        return {
+            'role': 'assistant',
+            'content': cached["content"],
+            'total_tokens': cached["total_tokens"],
+            'cache': 'hit',
+            'span_id': self._span_id(span),
+        }
+
+    def _record_error(self, span, e: Exception):
+        span.set_status(Status(StatusCode.ERROR, str(e)))
+        span.set_attribute("error.type", type(e).__name__)
+        span.set_attribute("error.message", str(e))
+
+    @staticmethod
+    def _record_llm_metrics(type: str, model: str, seconds: float, output: dict):
+        LLM_SECONDS.observe(seconds, type=type, model=model)
+        LLM_CACHE_REQUESTS.inc(type=type, model=model, result=output.get('cache', 'bypass'))
+        if output.get('cache') != 'hit':
+            for kind in ("prompt", "completion", "total"):
+                LLM_TOKENS.inc(output.get(f"{kind}_tokens", 0), type=type, model=model, kind=kind)
 
 
     def generate_with_single_input(self, prompt: str, role: str = 'user', top_p: float = None, temperature: float = 1.0,
@@ -64,81 +314,75 @@ class PhoenixTracking:
         """Using comprehensive outlook of parameters for LLM generation with Phoenix tracking."""
         with self.tracer.start_as_current_span("llm_generation", openinference_span_kind='llm') as span:
             try:
+                self._start_llm_span(span, prompt, role, model, temperature, top_p, max_tokens)
 
-                span.add_event("Starting LLM generation")
-                span.set_attribute("llm.model_name", model)
-                span.set_attribute("llm.input_messages.0.role", role)
-                span.set_attribute("llm.input_messages.0.content", prompt)
-                span.set_attribute("llm.temperature", temperature if temperature else 1.0)
-                span.set_attribute("llm.top_p", top_p if top_p else 1.0)
-                span.set_attribute("llm.max_tokens", max_tokens)
-                
                 if top_p is None:
                     top_p = 1.0
                 if temperature is None:
                     temperature = 1.0
-                
-                if family.lower() == 'openai':
-                    if not os.environ.get("OPENAI_API_KEY"):
-                        os.environ["OPENAI_API_KEY"] = getpass.getpass("Enter your OpenAI API key: ")
-                    llm = ChatOpenAI(
-                        model=model if "gpt" in model else "gpt-3.5-turbo",
-                        temperature=temperature,
-                        max_tokens=max_tokens,
-                        top_p=top_p,
-                        model_kwargs=kwargs
-                    )
-                elif family.lower() == 'gemini':
-                    if "GOOGLE_API_KEY" not in os.environ:
-                        raise ValueError("GOOGLE_API_KEY environment variable is not set. Please set it in your .env file or environment.")
-                    
-                    llm = ChatGoogleGenerativeAI(
-                        model=model,
-                        temperature=temperature,  
-                        max_tokens=max_tokens,
-                        timeout=None,
-                        max_retries=2,
-                    )
-                
-                if role.lower() == 'system':
-                    messages = [SystemMessage(content=prompt)]
-                else:
-                    messages = [HumanMessage(content=prompt)]
-                
+
+                cache_key = None
+                if self.response_cache.applies(temperature):
+                    cache_key = self.response_cache.make_key(prompt, role, model, family, temperature, top_p, max_tokens, **kwargs)
+                    cached = self.response_cache.get(cache_key)
+                    self._record_cache_lookup(span, cached is not None)
+                    if cached is not None:
+                        return self._finish_cached_llm_span(span, cached)
+
+                llm = self._get_llm(span, family, model, temperature, top_p, max_tokens, **kwargs)
+                messages = self._build_messages(prompt, role)
+
                 span.add_event("Invoking LLM")
                 response = llm.invoke(messages)
-                
-                total_tokens = 0
-                prompt_tokens = 0
-                completion_tokens = 0
-                
-                if hasattr(response, 'response_metadata'):
-                    usage = response.response_metadata.get('token_usage', {})
-                    total_tokens = usage.get('total_tokens', 0)
-                    prompt_tokens = usage.get('prompt_tokens', 0)
-                    completion_tokens = usage.get('completion_tokens', 0)
-                
-                span.set_attribute("llm.output_messages.0.role", "assistant")
-                span.set_attribute("llm.output_messages.0.content", response.content)
-                span.set_attribute("llm.token_count.total", total_tokens)
-                span.set_attribute("llm.token_count.prompt", prompt_tokens)
-                span.set_attribute("llm.token_count.completion", completion_tokens)
-                
-                output_dict = {
-                    'role': 'assistant',
-                    'content': response.content,
-                    'total_tokens': total_tokens,
-                    'span_id':  format_span_id(span.get_span_context().span_id),
-                }
-                
-                span.add_event("LLM generation completed")
-                span.set_status(Status(StatusCode.OK))
-                return output_dict
-                
+                output = self._finish_llm_span(span, response)
+                if cache_key:
+                    output['cache'] = 'miss'
+                if cache_key and isinstance(output['content'], str):
+                    self.response_cache.put(cache_key, model, output['content'], output['total_tokens'])
+                return output
+
             except Exception as e:
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-                span.set_attribute("error.type", type(e).__name__)
-                span.set_attribute("error.message", str(e))
+                self._record_error(span, e)
+                span.add_event("LLM generation failed")
+                raise Exception(f"Failed to generate response with LangChain. Error: {e}")
+
+    async def agenerate_with_single_input(self, prompt: str, role: str = 'user', top_p: float = None, temperature: float = 1.0,
+                               max_tokens: int = 500, model: str = "gemini-2.5-pro", family: str = "gemini", **kwargs):
+        """Async counterpart of generate_with_single_input, bounded by the per-model limiter."""
+        with self.tracer.start_as_current_span("llm_generation", openinference_span_kind='llm') as span:
+            try:
+                self._start_llm_span(span, prompt, role, model, temperature, top_p, max_tokens)
+
+                if top_p is None:
+                    top_p = 1.0
+                if temperature is None:
+                    temperature = 1.0
+
+                cache_key = None
+                if self.response_cache.applies(temperature):
+                    cache_key = self.response_cache.make_key(prompt, role, model, family, temperature, top_p, max_tokens, **kwargs)
+                    cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+                    self._record_cache_lookup(span, cached is not None)
+                    if cached is not None:
+                        return self._finish_cached_llm_span(span, cached)
+
+                llm = self._get_llm(span, family, model, temperature, top_p, max_tokens, **kwargs)
+                messages = self._build_messages(prompt, role)
+
+                limiter = self._model_limiter(model)
+                span.set_attribute("llm.limiter.waiting", limiter.locked())
+                async with limiter:
+                    span.add_event("Invoking LLM")
+                    response = await llm.ainvoke(messages)
+                output = self._finish_llm_span(span, response)
+                if cache_key:
+                    output['cache'] = 'miss'
+                if cache_key and isinstance(output['content'], str):
+                    await asyncio.to_thread(self.response_cache.put, cache_key, model, output['content'], output['total_tokens'])
+                return output
+
+            except Exception as e:
+                self._record_error(span, e)
                 span.add_event("LLM generation failed")
                 raise Exception(f"Failed to generate response with LangChain. Error: {e}")
     
@@ -161,6 +405,39 @@ class PhoenixTracking:
         }
         return kwargs
     
+    def _start_retrieval_span(self, span, query: str, collection, alpha: float, top_k: int):
+        span.add_event("Starting hybrid retrieval")
+        span.set_attribute("retrieval.query", query)
+        span.set_attribute("retrieval.top_k", top_k)
+        span.set_attribute("retrieval.alpha", alpha)
+        span.set_attribute("retrieval.collection", collection.name if hasattr(collection, 'name') else "unknown")
+
+    def _retrieval_cache_key(self, query: str, collection, alpha: float, top_k: int):
+        name = getattr(collection, 'name', None)
+        if not name:
+            return None, None
+        return name, self.retrieval_cache.make_key(name, query, alpha, top_k)
+
+    def _finish_cached_retrieval_span(self, span, response_objects: list) -> list:
+        span.set_attribute("retrieval.cache.hit", True)
+        span.set_attribute("retrieval.documents.count", len(response_objects))
+        span.add_event(f"Served {len(response_objects)} documents from retrieval cache")
+        span.set_status(Status(StatusCode.OK))
+        return response_objects
+
+    def _finish_retrieval_span(self, span, response) -> list:
+        response_objects = [x.properties for x in response.objects]
+
+        span.set_attribute("retrieval.cache.hit", False)
+        span.set_attribute("retrieval.documents.count", len(response_objects))
+        for i, doc in enumerate(response_objects[:3]): 
+            span.set_attribute(f"retrieval.documents.{i}.id", i)
+            span.set_attribute(f"retrieval.documents.{i}.content", str(doc)[:200]) 
+            
+        span.add_event(f"Retrieved {len(response_objects)} documents")
+        span.set_status(Status(StatusCode.OK))
+        return response_objects
+
     def hybrid_retrieve(self, query: str, 
                         collection: "weaviate.collections.collection.sync.Collection" , 
                         alpha: float = 0.5,
@@ -169,30 +446,87 @@ class PhoenixTracking:
         """Hybrid retrieval with Phoenix tracking."""
         with self.tracer.start_as_current_span("hybrid_retrieval", openinference_span_kind='retriever') as span:
             try:
-                span.add_event("Starting hybrid retrieval")
-                span.set_attribute("retrieval.query", query)
-                span.set_attribute("retrieval.top_k", top_k)
-                span.set_attribute("retrieval.alpha", alpha)
-                span.set_attribute("retrieval.collection", collection.name if hasattr(collection, 'name') else "unknown")
-                
+                self._start_retrieval_span(span, query, collection, alpha, top_k)
+                collection_name, cache_key = self._retrieval_cache_key(query, collection, alpha, top_k)
+                if cache_key:
+                    cached = self.retrieval_cache.get(collection_name, cache_key)
+                    RETRIEVAL_CACHE_REQUESTS.inc(collection=collection_name, result="miss" if cached is None else "hit")
+                    if cached is not None:
+                        return self._finish_cached_retrieval_span(span, cached)
+
                 response = collection.query.hybrid(query=query, limit=top_k, alpha=alpha)
-                response_objects = [x.properties for x in response.objects]
-                
-                span.set_attribute("retrieval.documents.count", len(response_objects))
-                for i, doc in enumerate(response_objects[:3]): 
-                    span.set_attribute(f"retrieval.documents.{i}.id", i)
-                    span.set_attribute(f"retrieval.documents.{i}.content", str(doc)[:200]) 
-                    
-                span.add_event(f"Retrieved {len(response_objects)} documents")
-                span.set_status(Status(StatusCode.OK))
+                response_objects = self._finish_retrieval_span(span, response)
+                if cache_key:
+                    self.retrieval_cache.put(collection_name, cache_key, response_objects)
                 return response_objects
                 
             except Exception as e:
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-                span.set_attribute("error.type", type(e).__name__)
-                span.set_attribute("error.message", str(e))
+                self._record_error(span, e)
                 raise 
+
+    async def ahybrid_retrieve(self, query: str,
+                        collection: "weaviate.collections.collection.async_.CollectionAsync",
+                        alpha: float = 0.5,
+                        top_k: int = 5
+                    ) -> list:
+        """Hybrid retrieval against an async Weaviate collection."""
+        with self.tracer.start_as_current_span("hybrid_retrieval", openinference_span_kind='retriever') as span:
+            try:
+                self._start_retrieval_span(span, query, collection, alpha, top_k)
+                collection_name, cache_key = self._retrieval_cache_key(query, collection, alpha, top_k)
+                if cache_key:
+                    cached = await asyncio.to_thread(self.retrieval_cache.get, collection_name, cache_key)
+                    RETRIEVAL_CACHE_REQUESTS.inc(collection=collection_name, result="miss" if cached is None else "hit")
+                    if cached is not None:
+                        return self._finish_cached_retrieval_span(span, cached)
+
+                response = await collection.query.hybrid(query=query, limit=top_k, alpha=alpha)
+                response_objects = self._finish_retrieval_span(span, response)
+                if cache_key:
+                    await asyncio.to_thread(self.retrieval_cache.put, collection_name, cache_key, response_objects)
+                return response_objects
+
+            except Exception as e:
+                self._record_error(span, e)
+                raise
     
+    def _start_augmentation_span(self, span, query: str, top_k: int, use_rag: bool, prompt_context: str):
+        span.add_event("Creating augmented prompt")
+        span.set_attribute("rag.use_rag", use_rag)
+        span.set_attribute("rag.query", query)
+        span.set_attribute("rag.top_k", top_k)
+        span.set_attribute("rag.prompt_context", prompt_context)
+
+    def _finish_augmentation_span(self, span, query: str, top_k_documents: list, prompt_context: str) -> str:
+        formatted_data = ""
+        
+        for document in top_k_documents:
+            if 'grammatical_item' in document:
+                 document_layout = (
+                    f"Grammar Item: {document.get('grammatical_item', 'N/A')}, "
+                    f"Level: {document.get('cefr_j_level', 'N/A')}, "
+                    f"Sentence Type: {document.get('sentence_type', 'N/A')}"
+                )
+            else:
+                document_layout = (
+                    f"Title: {document.get('title', 'N/A')}, Chunk: {document.get('chunk', 'N/A')}, "
+                    f"Published at: {document.get('pubDate', 'N/A')}\nURL: {document.get('link', 'N/A')}"
+                )
+            formatted_data += document_layout + "\n"
+        
+        retrieve_data_formatted = formatted_data  
+        prompt = (
+            f"Prompt Context:{prompt_context}\n"
+            f"Query: {query}\n"
+            f"Context Information: {retrieve_data_formatted}"
+        )
+        
+        span.set_attribute("rag.augmented_prompt_length", len(prompt))
+        span.set_attribute("rag.documents_used", len(top_k_documents))
+        span.add_event("Augmented prompt created successfully")
+        span.set_status(Status(StatusCode.OK))
+        return prompt
+
     def augmented_prompt(self, query: str, 
                               collection: "weaviate.collections.collection.sync.Collection",
                             top_k: int, 
@@ -203,11 +537,7 @@ class PhoenixTracking:
         """Create augmented prompt with RAG context and Phoenix tracking."""
         with self.tracer.start_as_current_span("augmented_prompt_creation") as span:
             try:
-                span.add_event("Creating augmented prompt")
-                span.set_attribute("rag.use_rag", use_rag)
-                span.set_attribute("rag.query", query)
-                span.set_attribute("rag.top_k", top_k)
-                span.set_attribute("rag.prompt_context", prompt_context)
+                self._start_augmentation_span(span, query, top_k, use_rag, prompt_context)
 
                 if not use_rag:
                     span.add_event("RAG disabled, returning original query")
@@ -216,93 +546,217 @@ class PhoenixTracking:
                 
                 span.add_event("Retrieving documents for augmentation")
                 top_k_documents = retrieve_function(query=query, top_k=top_k, collection=collection)
-                
-                formatted_data = ""
-                
-                for document in top_k_documents:
-                    if 'grammatical_item' in document:
-                         document_layout = (
-                            f"Grammar Item: {document.get('grammatical_item', 'N/A')}, "
-                            f"Level: {document.get('cefr_j_level', 'N/A')}, "
-                            f"Sentence Type: {document.get('sentence_type', 'N/A')}"
-                        )
-                    else:
-                        document_layout = (
-                            f"Title: {document.get('title', 'N/A')}, Chunk: {document.get('chunk', 'N/A')}, "
-                            f"Published at: {document.get('pubDate', 'N/A')}\nURL: {document.get('link', 'N/A')}"
-                        )
-                    formatted_data += document_layout + "\n"
-                
-                retrieve_data_formatted = formatted_data  
-                prompt = (
-                    f"Prompt Context:{prompt_context}\n"
-                    f"Query: {query}\n"
-                    f"Context Information: {retrieve_data_formatted}"
-                )
-                
-                span.set_attribute("rag.augmented_prompt_length", len(prompt))
-                span.set_attribute("rag.documents_used", len(top_k_documents))
-                span.add_event("Augmented prompt created successfully")
-                span.set_status(Status(StatusCode.OK))
-                return prompt
+                return self._finish_augmentation_span(span, query, top_k_documents, prompt_context)
                 
             except Exception as e:
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-                span.set_attribute("error.type", type(e).__name__)
-                span.set_attribute("error.message", str(e))
+                self._record_error(span, e)
+                raise
+
+    async def aaugmented_prompt(self, query: str,
+                            collection: "weaviate.collections.collection.async_.CollectionAsync",
+                            top_k: int,
+                            retrieve_function: callable,
+                            alpha: float = 0.5,
+                            use_rag: bool = True,
+                            prompt_context: str = "") -> str:
+        """Async augmented prompt; retrieve_function must be a coroutine function."""
+        with self.tracer.start_as_current_span("augmented_prompt_creation") as span:
+            try:
+                self._start_augmentation_span(span, query, top_k, use_rag, prompt_context)
+
+                if not use_rag:
+                    span.add_event("RAG disabled, returning original query")
+                    span.set_status(Status(StatusCode.OK))
+                    return query
+
+                span.add_event("Retrieving documents for augmentation")
+                top_k_documents = await retrieve_function(query=query, top_k=top_k, collection=collection)
+                return self._finish_augmentation_span(span, query, top_k_documents, prompt_context)
+
+            except Exception as e:
+                self._record_error(span, e)
                 raise
     
 
+    def _start_generation_span(self, span, type: str, temperature, top_p, max_tokens, model):
+        span.add_event("Starting English exam generation")
+        span.set_attribute(f"{type}.temperature", temperature)
+        span.set_attribute(f"{type}.top_p", top_p)
+        span.set_attribute(f"{type}.max_tokens", max_tokens)
+        span.set_attribute(f"{type}.model", model)
+        span.set_attribute(f"{type}.type", "multiple_choice")
+        span.set_attribute(f"{type}.question_count", 5)
+
+    def _finish_generation_span(self, span, type: str, response: dict) -> dict:
+        span.set_attribute(f"{type}.output_length", len(response['content']))
+        span.set_attribute(f"{type}.total_tokens", response.get('total_tokens', 0))
+        span.add_event(f"{type.capitalize()} generation completed successfully")
+        span.set_status(Status(StatusCode.OK))
+        return {"content": response['content'], "run_id": response.get('span_id')}
+
     def generate(self, temperature, top_p, max_tokens, model, prompt_context="", name="English Exam", type="exam", collection_name="CefrGrammarProfile"):
         """Generate English exam with comprehensive RAG workflow tracking."""
+        started = time.perf_counter()
+        status = "error"
         with self.tracer.start_as_current_span(name, openinference_span_kind='chain') as span:
             try:
-                span.add_event("Starting English exam generation")
-                span.set_attribute(f"{type}.temperature", temperature)
-                span.set_attribute(f"{type}.top_p", top_p)
-                span.set_attribute(f"{type}.max_tokens", max_tokens)
-                span.set_attribute(f"{type}.model", model)
-                span.set_attribute(f"{type}.type", "multiple_choice")
-                span.set_attribute(f"{type}.question_count", 5)
+                self._start_generation_span(span, type, temperature, top_p, max_tokens, model)
                 
-                span.add_event("Connecting to Weaviate")
-                client = weaviate.connect_to_local(host="localhost", port=8080, grpc_port=50051)
+                span.add_event("Acquiring Weaviate collection")
+                collection, reused = self.weaviate.get_collection(collection_name)
+                self._record_weaviate_connection(span, reused)
                 
                 span.add_event("Creating augmented prompt")
-                augmented_prompt = self.augmented_prompt(
-                    query=prompt_context, use_rag=True,
-                    collection=client.collections.get(collection_name),
-                    top_k=5, retrieve_function=self.hybrid_retrieve)
+                try:
+                    with RETRIEVAL_SECONDS.time(type=type):
+                        augmented_prompt = self.augmented_prompt(
+                            query=prompt_context, use_rag=True,
+                            collection=collection,
+                            top_k=5, retrieve_function=self.hybrid_retrieve)
+                except Exception:
+                    self.weaviate.mark_failed()
+                    raise
                 
                 span.set_attribute(f"{type}.augmented_prompt_length", len(augmented_prompt))
                 span.add_event(f"Generating {type} with LLM")
                 
+                llm_started = time.perf_counter()
                 response = self.generate_with_single_input(
                     **self.generate_params_dict(prompt=augmented_prompt, role='user', 
                                                temperature=temperature, top_p=top_p, 
                                                max_tokens=max_tokens, model=model)
                 )
-                
-                span.set_attribute(f"{type}.output_length", len(response['content']))
-                span.set_attribute(f"{type}.total_tokens", response.get('total_tokens', 0))
-                span.add_event(f"{type.capitalize()} generation completed successfully")
-                span.set_status(Status(StatusCode.OK))
-                return {"content": response['content'], "run_id": response.get('span_id')}
+                self._record_llm_metrics(type, model, time.perf_counter() - llm_started, response)
+                result = self._finish_generation_span(span, type, response)
+                status = "ok"
+                return result
             
             except Exception as e:
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-                span.set_attribute("error.type", e.__class__.__name__)
-                span.set_attribute("error.message", str(e))
+                self._record_error(span, e)
                 span.add_event(f"{type.capitalize()} generation failed")
                 raise
 
             finally:
+                GENERATION_SECONDS.observe(time.perf_counter() - started, type=type, model=model, status=status)
+
+    async def agenerate(self, temperature, top_p, max_tokens, model, prompt_context="", name="English Exam", type="exam", collection_name="CefrGrammarProfile"):
+        """Non-blocking generate: async Weaviate retrieval and ainvoke, safe to await from request handlers."""
+        started = time.perf_counter()
+        status = "error"
+        with self.tracer.start_as_current_span(name, openinference_span_kind='chain') as span:
+            try:
+                self._start_generation_span(span, type, temperature, top_p, max_tokens, model)
+
+                span.add_event("Acquiring Weaviate collection")
+                collection, reused = await self.weaviate.aget_collection(collection_name)
+                self._record_weaviate_connection(span, reused)
+
+                span.add_event("Creating augmented prompt")
                 try:
-                    if 'client' in locals():
-                        client.close()
+                    with RETRIEVAL_SECONDS.time(type=type):
+                        augmented_prompt = await self.aaugmented_prompt(
+                            query=prompt_context, use_rag=True,
+                            collection=collection,
+                            top_k=5, retrieve_function=self.ahybrid_retrieve)
                 except Exception:
-                    pass
+                    self.weaviate.mark_failed()
+                    raise
+
+                span.set_attribute(f"{type}.augmented_prompt_length", len(augmented_prompt))
+                span.add_event(f"Generating {type} with LLM")
+
+                llm_started = time.perf_counter()
+                response = await self.agenerate_with_single_input(
+                    **self.generate_params_dict(prompt=augmented_prompt, role='user',
+                                               temperature=temperature, top_p=top_p,
+                                               max_tokens=max_tokens, model=model)
+                )
+                self._record_llm_metrics(type, model, time.perf_counter() - llm_started, response)
+                result = self._finish_generation_span(span, type, response)
+                status = "ok"
+                return result
+
+            except Exception as e:
+                self._record_error(span, e)
+                span.add_event(f"{type.capitalize()} generation failed")
+                raise
+
+            finally:
+                GENERATION_SECONDS.observe(time.perf_counter() - started, type=type, model=model, status=status)
     
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        content = chunk.content
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+        return ""
+
+    async def astream_generate(self, temperature, top_p, max_tokens, model, prompt_context="", name="English Exam", type="exam", collection_name="CefrGrammarProfile"):
+        """Streaming agenerate: yields ("chunk", text) while the LLM runs, then ("done", {"content", "run_id"})."""
+        # Spans are activated only around awaited work, never across a yield, so the
+        # OpenTelemetry context is not left attached while the consumer holds the generator.
+        span = self.tracer.start_span(name, openinference_span_kind='chain')
+        llm_span = None
+        started = time.perf_counter()
+        status = "error"
+        try:
+            with trace.use_span(span, end_on_exit=False):
+                self._start_generation_span(span, type, temperature, top_p, max_tokens, model)
+
+                span.add_event("Acquiring Weaviate collection")
+                collection, reused = await self.weaviate.aget_collection(collection_name)
+                self._record_weaviate_connection(span, reused)
+
+                span.add_event("Creating augmented prompt")
+                try:
+                    with RETRIEVAL_SECONDS.time(type=type):
+                        augmented_prompt = await self.aaugmented_prompt(
+                            query=prompt_context, use_rag=True,
+                            collection=collection,
+                            top_k=5, retrieve_function=self.ahybrid_retrieve)
+                except Exception:
+                    self.weaviate.mark_failed()
+                    raise
+                span.set_attribute(f"{type}.augmented_prompt_length", len(augmented_prompt))
+
+            llm_started = time.perf_counter()
+            llm_span = self.tracer.start_span("llm_generation", context=trace.set_span_in_context(span), openinference_span_kind='llm')
+            self._start_llm_span(llm_span, augmented_prompt, 'user', model, temperature, top_p, max_tokens)
+            llm = self._get_llm(llm_span, "gemini", model, temperature, top_p, max_tokens)
+            messages = self._build_messages(augmented_prompt, 'user')
+
+            response = None
+            async with self._model_limiter(model):
+                llm_span.add_event("Streaming LLM")
+                async for chunk in llm.astream(messages):
+                    response = chunk if response is None else response + chunk
+                    text = self._chunk_text(chunk)
+                    if text:
+                        yield "chunk", text
+
+            if response is None:
+                raise ValueError("LLM stream returned no content.")
+            response.content = self._chunk_text(response)
+            output = self._finish_llm_span(llm_span, response)
+            self._record_llm_metrics(type, model, time.perf_counter() - llm_started, output)
+            status = "ok"
+            yield "done", self._finish_generation_span(span, type, output)
+
+        except Exception as e:
+            if llm_span is not None:
+                self._record_error(llm_span, e)
+            self._record_error(span, e)
+            span.add_event(f"{type.capitalize()} generation failed")
+            raise
+
+        finally:
+            if llm_span is not None:
+                llm_span.end()
+            span.end()
+            GENERATION_SECONDS.observe(time.perf_counter() - started, type=type, model=model, status=status)
+
     def generate_image(self, prompt: str, model: str = "gemini-3-pro-image-preview", size: str = "1024x1024", n: int =1) -> dict:
         """Generate image with Phoenix tracking."""
         with self.tracer.start_as_current_span("image_generation", openinference_span_kind='llm') as span:
@@ -316,6 +770,7 @@ class PhoenixTracking:
                 if "GOOGLE_API_KEY" not in os.environ:
                     raise ValueError("GOOGLE_API_KEY environment variable is not set. Please set it in your .env file or environment.")
                 
+                from langchain_google_genai import ChatGoogleGenerativeAI
                 llm = ChatGoogleGenerativeAI(
                     model=model,
                     temperature=1.0,  
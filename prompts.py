@@ -0,0 +1,104 @@
+GENERATION_MODEL = "gemini-2.5-flash-preview-09-2025"
+RAG_COLLECTION = "CefrGrammarProfile"
+
+EXAM_PROMPT = """You are an expert English exam creator. Generate a 30-question multiple-choice English placement test.
+                
+                IMPORTANT: Return ONLY a valid JSON object. Do NOT include any introductory text, markdown formatting (like ```json), or explanations. The output must be parseable by JSON.parse().
+                
+                The JSON structure MUST be:
+                {
+                    "questions": [
+                        {
+                            "id": 1,
+                            "question": "Question text here",
+                            "options": {
+                                "A": "Option A text",
+                                "B": "Option B text",
+                                "C": "Option C text",
+                                "D": "Option D text"
+                            }
+                        }
+                    ]
+                }
+                
+                Ensure the questions cover a range of difficulty levels (A1 to C2) to assess proficiency accurately.
+                JSON ONLY."""
+
+
+def exam_generation_params() -> dict:
+    """Keyword arguments for PhoenixTracking.agenerate that produce a placement exam."""
+    return dict(
+        temperature=1.0,
+        top_p=0.9,
+        max_tokens=2000,
+        model=GENERATION_MODEL,
+        prompt_context=EXAM_PROMPT,
+        name="English Exam",
+        type="exam",
+        collection_name=RAG_COLLECTION,
+    )
+
+
+def course_prompt(level: str) -> str:
+    return f"""You are an expert English course creator. Create a detailed 8-week English course for a student at {level} level. 
+            IMPORTANT: Return ONLY a valid JSON object. Do NOT include any introductory text, markdown formatting (like ```json), or explanations. The output must be parseable by JSON.parse(). The JSON structure MUST be:
+            {{
+                "title": "Course Title",
+                "description": "Brief description of the course",
+                "duration_weeks": 8,
+                "course_plan": [
+                    {{
+                        "module": 1,
+                        "topics": ["Topic 1", "Topic 2"],
+                        "objectives": ["Objective 1", "Objective 2"],
+                        "activities": ["Activity 1", "Activity 2"]
+                    }}
+                ]
+            }}
+            Ensure the course is engaging and covers all essential skills: reading, writing, speaking.
+            JSON ONLY."""
+
+
+def course_generation_params(level: str) -> dict:
+    """Keyword arguments for PhoenixTracking.agenerate that produce an 8-week course plan."""
+    return dict(
+        temperature=0.7,
+        top_p=0.9,
+        max_tokens=3000,
+        model=GENERATION_MODEL,
+        prompt_context=course_prompt(level),
+        name="English Course",
+        type="course",
+        collection_name=RAG_COLLECTION,
+    )
+
+
+def module_prompt(module_number: int, course_plan: str) -> str:
+    return f"""You are an expert English course module creator. Create a detailed module {module_number} for the following course plan:
+            {course_plan}
+            IMPORTANT: Return ONLY a valid JSON object. Do NOT include any introductory text, markdown formatting (like ```json), or explanations. In JSON format, provide:
+            HTML content for module {module_number} including lessons, exercises, and resources. The output must be parseable by JSON.parse(). Use consistent formatting and html classes for easy rendering. 
+            Each exercise should have clear instructions and answer sections.
+
+            For exercises requiring user input, use the following HTML structure and classes:
+            - For text inputs: use <input type="text" class="exercise-input" placeholder="...">
+            - For longer text inputs (writing prompts): use <textarea class="exercise-input" rows="4" placeholder="..."></textarea>
+            - For multiple choice/radio buttons: wrap each option in a label with class "exercise-radio-label". Inside the label, put the <input type="radio" class="exercise-radio-input" name="group_name"> first, then the text. Wrap the group of radio buttons in a div with class "exercise-radio-group".
+            - Wrap each exercise in a div with class "exercise-box".
+
+            Ensure the JSON output is a single valid JSON string. Do not use Python-style string concatenation (e.g. "..." + "...") inside values.
+            JSON ONLY."""
+
+
+def module_generation_params(module_number: int, course_plan: str) -> dict:
+    """Keyword arguments for PhoenixTracking.agenerate/astream_generate that produce one course module."""
+    return dict(
+        temperature=0.7,
+        top_p=0.9,
+        max_tokens=2000,
+        model=GENERATION_MODEL,
+        prompt_context=module_prompt(module_number, course_plan),
+        name="English Course Module",
+        type="course_module",
+        collection_name=RAG_COLLECTION,
+    )
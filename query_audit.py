@@ -0,0 +1,149 @@
+"""EXPLAIN QUERY PLAN audit for every query issued by Database.
+
+Runs each public Database method once against a throwaway copy of the database,
+captures the SQL it executes, and fails (exit code 1) if any statement does a
+full table scan on a table with at least --min-rows rows, or if a method cannot
+be called because SAMPLE_ARGS has no value for one of its parameters.
+
+    python query_audit.py --db English_courses.db --min-rows 1000
+"""
+import argparse
+import inspect
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+from database import Database
+
+# Schema and maintenance entry points (migrations walk whole tables on purpose).
+SKIPPED_METHODS = {"init_db", "close", "pool_stats"}
+
+SAMPLE_ARGS = {
+    "user_id": 1, "course_id": 1, "module_id": 1, "test_id": 1, "certificate_id": 1, "ref_id": 1,
+    "name": "Audit", "surname": "Audit", "email": "audit@example.com", "password": "audit-password",
+    "new_password": "audit-password", "role": "Student", "level": "B1", "new_level": "B1", "assessed_level": "B1",
+    "kind": "exam", "title": "Audit", "description": "Audit", "duration_weeks": 1, "course_plan": "[]",
+    "week_number": 1, "content_html": "{}", "test_html": "{}", "submitted_answers_json": "{}", "answers_json": "{}",
+    "assessed": False, "assessed_score": 0, "assessed_by_model": "audit", "comments_from_model": "",
+    "phoenix_run_id": None, "start_date": "2025-01-01", "rating": True, "review": "", "native_language": "en",
+    "interface_language": "en", "image_data": "", "certificate": "", "admin_note": "", "word": "audit",
+    "definition": "audit", "words": {"audit": "audit"}, "password_hash": "audit-hash", "plan_signature": "audit-signature", "module_number": 1,
+    "now": 0.0, "outbox_ids": [1], "outbox_id": 1, "next_attempt_at": 0.0, "error": "audit", "max_attempts": 1,
+    "target": 1, "lease_seconds": 1.0, "reservation_id": 1,
+}
+
+# Extra calls for methods whose SQL depends on optional arguments.
+EXTRA_CALLS = [
+    ("get_vocabulary_page", {"user_id": 1, "sort": "recent", "after": [10]}),
+    ("get_vocabulary_page", {"user_id": 1, "sort": "level", "after": ["B1", "audit"]}),
+    ("get_vocabulary_page", {"user_id": 1, "after": ["audit"], "query": "au"}),
+    ("get_vocabulary_page", {"user_id": 1, "query": "au", "match": "substring"}),
+    ("count_vocabulary", {"user_id": 1, "query": "au"}),
+    ("get_module_by_signature", {"plan_signature": "audit-signature", "exclude_course_id": 1}),
+]
+
+AUDITED_PREFIXES = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+
+def _method_calls(database, unbound: list):
+    """Yield (method name, kwargs) for every public Database method; methods missing a sample go to unbound."""
+    for name, method in inspect.getmembers(database, inspect.ismethod):
+        if name.startswith("_") or name in SKIPPED_METHODS:
+            continue
+        kwargs = {}
+        for param in inspect.signature(method).parameters.values():
+            if param.default is not inspect.Parameter.empty:
+                continue
+            if param.name not in SAMPLE_ARGS:
+                unbound.append(f"{name}({param.name})")
+                break
+            kwargs[param.name] = SAMPLE_ARGS[param.name]
+        else:
+            yield name, kwargs
+    yield from EXTRA_CALLS
+
+
+def capture_statements(database, unbound: list = None) -> list:
+    """Call every Database method on one leased connection and return the distinct SQL it ran.
+
+    Methods that cannot be called because SAMPLE_ARGS lacks one of their
+    parameters are appended to unbound as "method(param)".
+    """
+    statements = []
+    unbound = [] if unbound is None else unbound
+    with database.pool.connection() as connection:
+        connection.set_trace_callback(statements.append)
+        try:
+            for name, kwargs in _method_calls(database, unbound):
+                try:
+                    getattr(database, name)(**kwargs)
+                except Exception as e:
+                    print(f"Warning: {name} raised {e!r}; its earlier statements are still audited.")
+        finally:
+            connection.set_trace_callback(None)
+    seen = []
+    for statement in statements:
+        statement = statement.strip()
+        if statement.upper().startswith(AUDITED_PREFIXES) and statement not in seen:
+            seen.append(statement)
+    return seen
+
+
+def full_scans(connection, statement: str) -> list:
+    """Return (table, plan detail) for each table the statement scans without an index lookup."""
+    aliases = {alias: table for table, alias in re.findall(
+        r"\b(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?(?!WHERE|ON|JOIN|ORDER|GROUP|LIMIT|LEFT|INNER|SET)(\w+)", statement, re.IGNORECASE
+    )}
+    tables = []
+    for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}"):
+        detail = row[3]
+        if not detail.startswith("SCAN ") or detail.startswith(("SCAN CONSTANT", "SCAN (")):
+            continue
+        name = detail.split()[1]
+        tables.append((aliases.get(name, name), detail))
+    return tables
+
+
+def audit(db_name: str, min_rows: int = 1000) -> int:
+    """Audit a copy of db_name and return the number of failures.
+
+    Failures are full scans on tables with >= min_rows rows plus Database methods
+    that could not be audited because SAMPLE_ARGS has no value for a parameter.
+    """
+    workdir = tempfile.mkdtemp(prefix="query_audit_")
+    copy = os.path.join(workdir, os.path.basename(db_name))
+    if os.path.exists(db_name):
+        shutil.copy(db_name, copy)
+    database = Database(db_name=copy, pool_size=1)
+    try:
+        database.init_db()
+        unbound = []
+        statements = capture_statements(database, unbound)
+        violations = len(unbound)
+        for call in unbound:
+            print(f"FAIL {call}: no sample value in SAMPLE_ARGS; add one so this method is audited.")
+        with database.pool.connection() as connection:
+            tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for statement in statements:
+                for table, detail in full_scans(connection, statement):
+                    rows = connection.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] if table in tables else 0
+                    status = "FAIL" if rows >= min_rows else "ok  "
+                    if rows >= min_rows:
+                        violations += 1
+                    print(f"{status} {table}: {detail} ({rows} rows)\n     {statement}")
+        print(f"Audited {len(statements)} statements; {violations - len(unbound)} full scan(s) on tables with >= {min_rows} rows, "
+              f"{len(unbound)} unaudited method(s).")
+        return violations
+    finally:
+        database.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if any Database query full-scans a large table.")
+    parser.add_argument("--db", default="English_courses.db", help="database to audit (a temporary copy is used)")
+    parser.add_argument("--min-rows", type=int, default=1000, help="row count at which a full scan fails the audit")
+    args = parser.parse_args()
+    sys.exit(1 if audit(args.db, args.min_rows) else 0)
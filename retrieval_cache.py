@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from connection_pool import ConnectionPool
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS retrieval_collection_version (
+    collection TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS retrieval_cache (
+    cache_key TEXT PRIMARY KEY,
+    collection TEXT,
+    version INTEGER,
+    results_json TEXT,
+    created_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_retrieval_cache_collection ON retrieval_cache(collection);
+'''
+
+
+class RetrievalCache:
+    """In-process LRU of hybrid retrieval results, optionally backed by SQLite.
+
+    Every entry is tagged with its collection's version; re-ingesting a collection
+    bumps the version (see invalidate_collection) so stale results are never served,
+    even from other processes.
+    """
+
+    def __init__(self, db_name: str = "cache.db", max_entries: int = 256, persistent: bool = False,
+                 ttl_seconds: float = 24 * 3600, version_check_interval: float = 5.0):
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self.ttl_seconds = ttl_seconds
+        self.version_check_interval = version_check_interval
+        self.pool = ConnectionPool(db_name, pool_size=2)
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "persistent_hits": 0, "misses": 0, "invalidations": 0}
+
+        with self.pool.connection() as connection:
+            connection.executescript(SCHEMA)
+            connection.commit()
+
+    @staticmethod
+    def make_key(collection: str, query: str, alpha: float, top_k: int) -> str:
+        query_hash = hashlib.sha256(query.encode("utf-8")).hexdigest()
+        return f"{collection}:{query_hash}:{alpha}:{top_k}"
+
+    def _collection_version(self, collection: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(collection)
+        if cached and now - cached[1] < self.version_check_interval:
+            return cached[0]
+
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT version FROM retrieval_collection_version WHERE collection = ?",
+                (collection,)
+            ).fetchone()
+        version = row[0] if row else 0
+        with self._lock:
+            self._versions[collection] = (version, now)
+        return version
+
+    def get(self, collection: str, cache_key: str):
+        version = self._collection_version(collection)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                entry_version, created_at, results = entry
+                if entry_version == version and now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(cache_key)
+                    self._stats["hits"] += 1
+                    return list(results)
+                del self._entries[cache_key]
+
+        if self.persistent:
+            with self.pool.connection() as connection:
+                row = connection.execute(
+                    "SELECT results_json, created_at FROM retrieval_cache WHERE cache_key = ? AND version = ?",
+                    (cache_key, version)
+                ).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                results = json.loads(row[0])
+                self._remember(cache_key, version, row[1], results)
+                with self._lock:
+                    self._stats["persistent_hits"] += 1
+                return list(results)
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def _remember(self, cache_key: str, version: int, created_at: float, results: list):
+        with self._lock:
+            self._entries[cache_key] = (version, created_at, results)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, collection: str, cache_key: str, results: list):
+        version = self._collection_version(collection)
+        now = time.time()
+        self._remember(cache_key, version, now, list(results))
+
+        if self.persistent:
+            with self.pool.connection() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO retrieval_cache (cache_key, collection, version, results_json, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (cache_key, collection, version, json.dumps(results, ensure_ascii=False, default=str), now)
+                )
+                connection.commit()
+
+    def invalidate(self, collection: str):
+        invalidate_collection(collection, pool=self.pool)
+        with self._lock:
+            self._versions.pop(collection, None)
+            for key in [k for k in self._entries if k.startswith(f"{collection}:")]:
+                del self._entries[key]
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, size=len(self._entries), max_size=self.max_entries)
+
+    def close(self):
+        self.pool.close()
+
+
+def invalidate_collection(collection: str, db_name: str = None, pool: ConnectionPool = None):
+    """Bump a collection's cache version and drop its persisted results; call after (re-)ingesting it."""
+    owned = pool is None
+    if owned:
+        pool = ConnectionPool(db_name or os.environ.get("CACHE_DB_PATH", "cache.db"), pool_size=1)
+    try:
+        with pool.connection() as connection:
+            connection.executescript(SCHEMA)
+            connection.execute(
+                '''
+                INSERT INTO retrieval_collection_version (collection, version) VALUES (?, 1)
+                ON CONFLICT(collection) DO UPDATE SET version = version + 1
+                ''',
+                (collection,)
+            )
+            connection.execute("DELETE FROM retrieval_cache WHERE collection = ?", (collection,))
+            connection.commit()
+    finally:
+        if owned:
+            pool.close()
@@ -0,0 +1,110 @@
+"""Cold-start benchmark: import cost per dependency and init cost per startup step.
+
+Each measurement runs in a fresh interpreter, so shared sub-dependencies are
+counted in every row that needs them. Init steps run against a throwaway copy of
+the database and static files.
+
+    python startup_benchmark.py --repeat 3
+    python startup_benchmark.py --with-tracing     # also time PhoenixTracking.start_tracing()
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+DEPENDENCIES = (
+    "fastapi", "starlette.staticfiles", "jinja2", "dotenv", "pwdlib", "opentelemetry.trace", "httpx",
+    "requests", "weaviate", "weaviate.classes.query", "langchain_core.messages", "langchain_google_genai",
+    "langchain_openai", "phoenix", "phoenix.otel",
+)
+
+# (label, setup statements, timed statement)
+INIT_STEPS = (
+    ("Database.init_db", "from database import Database", "Database().init_db()"),
+    ("PhoenixTracking()", "from phoenix_tracking import PhoenixTracking", "PhoenixTracking(app_name='benchmark')"),
+    ("import main_class", "", "import main_class"),
+)
+TRACING_STEP = (
+    "PhoenixTracking.start_tracing",
+    "from phoenix_tracking import PhoenixTracking; tracker = PhoenixTracking(app_name='benchmark')",
+    "tracker.start_tracing()",
+)
+
+TIMER = """
+import sys, time
+sys.path.insert(0, {root!r})
+{setup}
+started = time.perf_counter()
+{statement}
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def _time(setup: str, statement: str, cwd: str) -> float:
+    script = TIMER.format(root=ROOT, setup=setup, statement=statement)
+    result = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _best_of(repeat: int, setup: str, statement: str, cwd: str):
+    try:
+        return min(_time(setup, statement, cwd) for _ in range(repeat)), None
+    except RuntimeError as e:
+        return None, str(e)
+
+
+def _workdir() -> str:
+    workdir = tempfile.mkdtemp(prefix="startup_benchmark_")
+    db = os.path.join(ROOT, "English_courses.db")
+    if os.path.exists(db):
+        shutil.copy(db, workdir)
+    shutil.copytree(os.path.join(ROOT, "static"), os.path.join(workdir, "static"))
+    return workdir
+
+
+def run(repeat: int = 1, with_tracing: bool = False) -> dict:
+    """Return {"imports": {module: ms}, "init": {step: ms}}; failed measurements are None."""
+    workdir = _workdir()
+    results = {"imports": {}, "init": {}}
+    try:
+        for module in DEPENDENCIES:
+            ms, error = _best_of(repeat, "", f"import {module}", workdir)
+            results["imports"][module] = ms
+            if error:
+                print(f"Warning: import {module} failed: {error}")
+        steps = INIT_STEPS + ((TRACING_STEP,) if with_tracing else ())
+        for label, setup, statement in steps:
+            ms, error = _best_of(repeat, setup, statement, workdir)
+            results["init"][label] = ms
+            if error:
+                print(f"Warning: {label} failed: {error}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _print_table(title: str, rows: dict):
+    print(title)
+    for name, ms in sorted(rows.items(), key=lambda item: -(item[1] or 0)):
+        print(f"  {name:<32} {'failed' if ms is None else f'{ms:9.1f} ms'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold import and startup cost per dependency.")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per measurement; the fastest is reported")
+    parser.add_argument("--with-tracing", action="store_true", help="also time PhoenixTracking.start_tracing()")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    results = run(args.repeat, args.with_tracing)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table("Import (fresh interpreter):", results["imports"])
+        _print_table("Startup steps:", results["init"])
@@ -81,3 +81,42 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 });
+
+document.addEventListener('DOMContentLoaded', () => {
+    const streamBtn = document.getElementById('stream-module-btn');
+    // Bind once even if this script ends up on the page twice.
+    if (!streamBtn || streamBtn.dataset.bound) return;
+    streamBtn.dataset.bound = "true";
+
+    streamBtn.addEventListener('click', () => {
+        if (streamBtn.disabled) return;
+        const emptyState = document.getElementById('module-empty-state');
+        const preview = document.getElementById('module-stream-preview');
+        const { courseId, moduleNumber } = emptyState.dataset;
+
+        streamBtn.disabled = true;
+        streamBtn.textContent = "Generating...";
+        preview.textContent = "";
+        preview.classList.remove('hidden');
+
+        const source = new EventSource(`/api/generate-module/stream?course_id=${courseId}&module_number=${moduleNumber}`);
+
+        source.addEventListener('chunk', (event) => {
+            preview.textContent += JSON.parse(event.data).text;
+            preview.scrollTop = preview.scrollHeight;
+        });
+
+        source.addEventListener('done', () => {
+            source.close();
+            window.location.reload();
+        });
+
+        source.addEventListener('error', (event) => {
+            source.close();
+            const message = event.data ? JSON.parse(event.data).message : "Connection lost.";
+            alert("Failed to generate module: " + message);
+            streamBtn.disabled = false;
+            streamBtn.textContent = "Generate this module";
+        });
+    });
+});
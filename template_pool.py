@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+
+from content_parsing import parse_course_content, parse_course_plan, parse_exam_content
+from metrics import PARSE_SECONDS
+from prompts import course_generation_params, exam_generation_params
+
+DEFAULT_COURSE_TARGETS = "A1:1,A2:1,B1:1,B2:1,C1:1,C2:1"
+
+
+def parse_level_targets(spec: str) -> dict:
+    """Parse "B1:2,B2:1" into {"B1": 2, "B2": 1}."""
+    targets = {}
+    for part in (spec or "").split(","):
+        if ":" not in part:
+            continue
+        level, count = part.split(":", 1)
+        level = level.strip().upper()
+        if level:
+            targets[level] = max(int(count), 0)
+    return targets
+
+
+class TemplatePool:
+    """Keeps validated placement exams and per-level course plans generated ahead of demand.
+
+    Pooled exams live in the `test` table with no user, pooled courses in `course`
+    with no enrolment; `template_pool` tracks which of them are still unclaimed.
+    Every worker process runs its own refills, so each generation first reserves a
+    slot in SQLite (Database.reserve_pool_slot); together the workers never
+    generate more than the target.
+    """
+
+    def __init__(self, db, tracker, exam_target: int = 2, course_targets: dict = None, retry_delay: float = 60.0,
+                 max_failures: int = 3, reservation_seconds: float = 600.0):
+        self.db = db
+        self.tracker = tracker
+        self.exam_target = exam_target
+        self.course_targets = course_targets if course_targets is not None else parse_level_targets(DEFAULT_COURSE_TARGETS)
+        self.retry_delay = retry_delay
+        self.max_failures = max_failures
+        self.reservation_seconds = reservation_seconds
+        self._tasks = {}
+        self._stats = {"claimed": 0, "empty": 0, "generated": 0, "rejected": 0}
+
+    def start(self):
+        self.request_refill("exam")
+        for level in self.course_targets:
+            self.request_refill("course", level)
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def request_refill(self, kind: str, level: str = None):
+        """Schedule a background top-up for kind/level unless one is already running."""
+        key = (kind, level)
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            return
+        self._tasks[key] = asyncio.create_task(self._refill(kind, level))
+
+    def _target(self, kind: str, level: str = None) -> int:
+        if kind == "exam":
+            return self.exam_target
+        return self.course_targets.get(level, 0)
+
+    async def _refill(self, kind: str, level: str = None):
+        failures = 0
+        while failures < self.max_failures:
+            reservation_id = await self.db.reserve_pool_slot(kind, level, self._target(kind, level), time.time(),
+                                                             self.reservation_seconds)
+            if reservation_id is None:
+                return
+            try:
+                if kind == "exam":
+                    await self._generate_exam(reservation_id)
+                else:
+                    await self._generate_course(level, reservation_id)
+                self._stats["generated"] += 1
+                failures = 0
+            except asyncio.CancelledError:
+                await asyncio.shield(self.db.release_pool_slot(reservation_id))
+                raise
+            except Exception as e:
+                await self.db.release_pool_slot(reservation_id)
+                failures += 1
+                self._stats["rejected"] += 1
+                print(f"Warning: template pool could not pre-generate {kind} {level or ''}: {e}")
+                await asyncio.sleep(self.retry_delay)
+
+    async def _generate_exam(self, reservation_id: int):
+        response = await self.tracker.agenerate(**exam_generation_params())
+        with PARSE_SECONDS.time(type="exam"):
+            exam = parse_exam_content(response["content"])
+        test_id = await self.db.create_pending_test(None, json.dumps(exam, ensure_ascii=False))
+        await self.db.add_pool_item("exam", None, test_id, reservation_id)
+
+    async def _generate_course(self, level: str, reservation_id: int):
+        response = await self.tracker.agenerate(**course_generation_params(level))
+        with PARSE_SECONDS.time(type="course"):
+            course_content = parse_course_content(response["content"])
+        if not parse_course_plan(course_content.get("course_plan")):
+            raise ValueError("Course plan is empty.")
+        course_id = await self.db.add_course(level=level, title=course_content.get('title'), description=course_content.get('description'),
+                      duration_weeks=course_content.get('duration_weeks'), course_plan=course_content.get('course_plan'))
+        await self.db.add_pool_item("course", level, course_id, reservation_id)
+
+    async def claim_exam(self, user_id: int):
+        """Hand a pooled exam to user_id and return its test_id, or None if the pool is empty."""
+        test_id = await self.db.claim_pool_item("exam", None)
+        self.request_refill("exam")
+        if test_id is None:
+            self._stats["empty"] += 1
+            return None
+        await self.db.assign_test_to_user(test_id, user_id)
+        self._stats["claimed"] += 1
+        return test_id
+
+    async def claim_course(self, level: str):
+        """Return (course_id, course_content) for a pooled course at level, or None if none is ready."""
+        if level not in self.course_targets:
+            return None
+        course_id = await self.db.claim_pool_item("course", level)
+        self.request_refill("course", level)
+        if course_id is None:
+            self._stats["empty"] += 1
+            return None
+        course = await self.db.get_course_by_id(course_id)
+        self._stats["claimed"] += 1
+        return course_id, {
+            "title": course["title"],
+            "description": course["description"],
+            "duration_weeks": course["duration_weeks"],
+            "course_plan": parse_course_plan(course["course_plan"]),
+        }
+
+    def stats(self) -> dict:
+        return dict(self._stats)
@@ -667,6 +667,7 @@ Instructions:
 """
 
 phoenix_tracker = PhoenixTracking(app_name="EnglishTestApp")
+phoenix_tracker.start_tracing()
 # start_time = time.time()
 response = phoenix_tracker.generate_with_single_input(prompt = english_test_check_propmt, model = "gpt-3.5-turbo", family="openai")
 # end_time = time.time()
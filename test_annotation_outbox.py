@@ -0,0 +1,146 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from annotation_outbox import INVALID_SPAN_ID, AnnotationOutbox, is_valid_span_id
+from async_database import AsyncDatabase
+from database import Database
+
+SPAN_IDS = ["00000000000000a1", "00000000000000a2", "00000000000000a3"]
+
+
+class Phoenix:
+    """MockTransport handler: answers each POST with the next queued response or exception."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append([item["span_id"] for item in json.loads(request.content)["data"]])
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response(request) if callable(response) else httpx.Response(response)
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(db_name=str(tmp_path / "outbox.db"))
+    database.init_db()
+    yield database
+    database.close()
+
+
+def make_outbox(database, phoenix, **kwargs):
+    outbox = AnnotationOutbox(AsyncDatabase(database), base_backoff=10, max_backoff=100, **kwargs)
+    outbox._client = httpx.AsyncClient(transport=httpx.MockTransport(phoenix))
+    return outbox
+
+
+def flush(outbox):
+    async def run():
+        try:
+            return await outbox.flush()
+        finally:
+            await outbox._client.aclose()
+    return asyncio.run(run())
+
+
+def queue(database, *span_ids):
+    with database.pool.connection() as connection:
+        connection.executemany(
+            "INSERT INTO annotation_outbox (span_id, payload_json) VALUES (?, ?)",
+            [(span_id, json.dumps({"span_id": span_id, "name": "user_rating"})) for span_id in span_ids])
+        connection.commit()
+
+
+def rows(database) -> list:
+    with database.pool.connection() as connection:
+        return [dict(zip(("span_id", "status", "attempts", "next_attempt_at", "last_error"), row)) for row in connection.execute(
+            "SELECT span_id, status, attempts, next_attempt_at, last_error FROM annotation_outbox ORDER BY outbox_id")]
+
+
+@pytest.mark.parametrize("status", [200, 202])
+def test_rows_are_deleted_after_a_2xx(database, status):
+    queue(database, *SPAN_IDS)
+    phoenix = Phoenix(status)
+    outbox = make_outbox(database, phoenix)
+    assert flush(outbox) == 3
+    assert phoenix.requests == [SPAN_IDS]
+    assert rows(database) == []
+    assert outbox.stats()["delivered"] == 3
+
+
+@pytest.mark.parametrize("failure", [500, 404, httpx.ConnectError("connection refused")])
+def test_failed_delivery_keeps_rows_and_backs_off(database, failure):
+    queue(database, SPAN_IDS[0])
+    outbox = make_outbox(database, Phoenix(failure))
+    before = time.time()
+    flush(outbox)
+    [row] = rows(database)
+    assert (row["status"], row["attempts"]) == ("pending", 1)
+    # base_backoff * 2 ** attempts, with up to half taken off as jitter.
+    assert before + 10 <= row["next_attempt_at"] <= time.time() + 20
+    assert row["last_error"].startswith("ConnectError" if isinstance(failure, Exception) else f"HTTP {failure}")
+    assert outbox.stats()["retried"] == 1
+    # Not due again until the backoff has passed.
+    assert flush(make_outbox(database, Phoenix(200))) == 0
+
+
+def test_backoff_grows_and_is_capped():
+    outbox = AnnotationOutbox(None, base_backoff=10, max_backoff=100)
+    for attempts, ceiling in [(1, 20), (2, 40), (3, 80), (4, 100), (10, 100)]:
+        delay = outbox._backoff(attempts)
+        assert ceiling / 2 <= delay <= ceiling
+
+
+def test_rows_fail_after_max_attempts(database):
+    queue(database, SPAN_IDS[0])
+    with database.pool.connection() as connection:
+        connection.execute("UPDATE annotation_outbox SET attempts = 2")
+        connection.commit()
+    outbox = make_outbox(database, Phoenix(httpx.ReadTimeout("timed out")), max_attempts=3)
+    flush(outbox)
+    assert rows(database)[0]["status"] == "failed"
+    assert database.count_annotations("pending") == 0
+    assert outbox.stats()["failed"] == 1
+
+
+def test_rejected_row_does_not_hold_back_the_batch(database):
+    queue(database, *SPAN_IDS)
+
+    def reject_second(request):
+        span_ids = [item["span_id"] for item in json.loads(request.content)["data"]]
+        return httpx.Response(422 if SPAN_IDS[1] in span_ids else 200)
+
+    phoenix = Phoenix(reject_second)
+    flush(make_outbox(database, phoenix))
+    assert phoenix.requests == [SPAN_IDS, [SPAN_IDS[0]], [SPAN_IDS[1]], [SPAN_IDS[2]]]
+    assert [(row["span_id"], row["attempts"]) for row in rows(database)] == [(SPAN_IDS[1], 1)]
+
+
+def test_invalid_span_ids_are_dropped_without_posting(database):
+    queue(database, INVALID_SPAN_ID, "not-a-span-id", SPAN_IDS[0])
+    phoenix = Phoenix(200)
+    outbox = make_outbox(database, phoenix)
+    assert flush(outbox) == 3
+    assert phoenix.requests == [[SPAN_IDS[0]]]
+    assert rows(database) == []
+    assert outbox.stats()["failed"] == 2
+
+    queue(database, INVALID_SPAN_ID)
+    phoenix = Phoenix(200)
+    assert flush(make_outbox(database, phoenix)) == 1
+    assert phoenix.requests == []
+
+
+def test_is_valid_span_id():
+    assert is_valid_span_id("0123456789abcdef")
+    assert not is_valid_span_id(INVALID_SPAN_ID)
+    assert not is_valid_span_id("0123456789ABCDEF")
+    assert not is_valid_span_id("0123456789abcde")
+    assert not is_valid_span_id(None)
@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+
+import pytest
+
+from connection_pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), pool_size=2, timeout=0.2)
+    yield pool
+    pool.close()
+
+
+def test_nested_leases_share_one_connection(pool):
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+        assert pool.stats()["in_use"] == 1
+    stats = pool.stats()
+    assert stats["leases"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_released_connection_is_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert pool.stats()["created"] == 1
+
+
+def test_pool_never_opens_more_than_pool_size(pool):
+    leased = threading.Barrier(3)
+    done = threading.Event()
+    connections = []
+
+    def hold():
+        with pool.connection() as connection:
+            connections.append(connection)
+            leased.wait()
+            done.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    leased.wait()
+    try:
+        assert pool.stats()["open"] == 2
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+    assert len(set(map(id, connections))) == 2
+    assert pool.stats()["idle"] == 2
+
+
+def test_waiting_caller_gets_the_released_connection(pool):
+    pool.timeout = 5
+    release = threading.Event()
+    holders = threading.Barrier(3)
+
+    def hold():
+        with pool.connection():
+            holders.wait()
+            release.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    holders.wait()
+    threading.Timer(0.05, release.set).start()
+    with pool.connection():
+        pass
+    for thread in threads:
+        thread.join()
+    stats = pool.stats()
+    assert stats["waits"] == 1
+    assert stats["created"] == 2
+
+
+def test_open_transaction_is_rolled_back_on_release(pool):
+    with pool.connection() as connection:
+        connection.execute("CREATE TABLE item (name TEXT)")
+        connection.commit()
+        connection.execute("INSERT INTO item VALUES ('uncommitted')")
+        assert connection.in_transaction
+    with pool.connection() as connection:
+        assert not connection.in_transaction
+        assert connection.execute("SELECT COUNT(*) FROM item").fetchone()[0] == 0
+
+
+def test_broken_connection_is_discarded(pool):
+    with pytest.raises(sqlite3.InterfaceError):
+        with pool.connection():
+            raise sqlite3.InterfaceError("broken")
+    stats = pool.stats()
+    assert stats["discarded"] == 1
+    assert stats["open"] == 0
+
+
+def test_closed_pool_refuses_new_leases(pool):
+    with pool.connection():
+        pass
+    pool.close()
+    assert pool.stats()["open"] == 0
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            pass
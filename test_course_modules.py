@@ -0,0 +1,43 @@
+import pytest
+
+from database import Database
+
+PLAN = [{"module": 1, "title": "Greetings"}, {"module": 2, "title": "Numbers"}]
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(db_name=str(tmp_path / "courses.db"))
+    database.init_db()
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def course(database):
+    """A course with two modules stored for week 1 (a legacy duplicate) and none for week 2."""
+    course_id = database.add_course(level="A1", title="Course", description="", duration_weeks=2, course_plan=PLAN)
+    first = database.add_module(course_id, "First", 1, "first content", rendered_html="<p>first</p>")
+    database.add_module(course_id, "Duplicate", 1, "duplicate content", rendered_html="<p>duplicate</p>")
+    return course_id, first
+
+
+def test_every_week_lookup_picks_the_first_stored_module(database, course):
+    course_id, first = course
+    assert database.get_module_content_by_week(course_id, 1) == "first content"
+
+    plan = database.get_course_plan_modules(course_id)
+    assert [(item["module_number"], item["module_id"], item["module_title"]) for item in plan] == [
+        (1, first, "First"), (2, None, None)]
+
+    view = database.get_course_view(course_id, 1)
+    assert [module["module_id"] for module in view["modules"]] == [first]
+    assert (view["module"]["module_id"], view["module"]["rendered_html"]) == (first, "<p>first</p>")
+
+
+def test_course_view_without_modules(database):
+    course_id = database.add_course(level="A1", title="Empty", description="", duration_weeks=2, course_plan=PLAN)
+    view = database.get_course_view(course_id, 1)
+    assert view["course"]["title"] == "Empty"
+    assert (view["modules"], view["module"]) == ([], None)
+    assert database.get_course_view(course_id + 1) is None
@@ -0,0 +1,89 @@
+import pytest
+
+import llm_cache
+from llm_cache import LLMResponseCache
+
+KEY_ARGS = {"prompt": "Explain the past simple.", "role": "teacher", "model": "gpt-4o-mini", "family": "openai",
+            "temperature": 0.0, "top_p": 1.0, "max_tokens": 500}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(db_name=str(tmp_path / "cache.db"), ttl_seconds=60, max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_only_temperatures_below_the_threshold_are_cached(cache):
+    assert cache.temperature_threshold == 0.3
+    assert cache.applies(0.0)
+    assert cache.applies(0.2)
+    assert not cache.applies(0.3)
+    assert not cache.applies(1.0)
+    assert not cache.applies(None)
+
+
+@pytest.mark.parametrize("field, value", [
+    ("prompt", "Explain the present perfect."),
+    ("role", "student"),
+    ("model", "gemini-2.0-flash"),
+    ("family", "google"),
+    ("temperature", 0.1),
+    ("top_p", 0.9),
+    ("max_tokens", 800),
+])
+def test_key_changes_with_every_input(field, value):
+    assert LLMResponseCache.make_key(**KEY_ARGS) == LLMResponseCache.make_key(**dict(KEY_ARGS))
+    assert LLMResponseCache.make_key(**dict(KEY_ARGS, **{field: value})) != LLMResponseCache.make_key(**KEY_ARGS)
+
+
+def test_key_includes_extra_parameters():
+    assert LLMResponseCache.make_key(**KEY_ARGS, type="course") != LLMResponseCache.make_key(**KEY_ARGS, type="exam")
+    assert LLMResponseCache.make_key(**KEY_ARGS, a=1, b=2) == LLMResponseCache.make_key(**KEY_ARGS, b=2, a=1)
+
+
+def test_entries_expire_after_the_ttl(cache, clock):
+    cache.put("key", "model", "answer", 42)
+    clock.now += 60
+    assert cache.get("key") == {"content": "answer", "total_tokens": 42}
+    clock.now += 1
+    assert cache.get("key") is None
+    assert cache.get("key") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "stores": 1, "evictions": 0}
+
+
+def test_least_recently_used_entry_is_evicted_past_max_entries(cache, clock):
+    for key in ("a", "b"):
+        clock.now += 1
+        cache.put(key, "model", key, 1)
+    clock.now += 1
+    assert cache.get("a")
+    clock.now += 1
+    cache.put("c", "model", "c", 1)
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_evicted_on_put(cache, clock):
+    cache.put("old", "model", "old", 1)
+    clock.now += 61
+    cache.put("new", "model", "new", 1)
+    assert cache.stats()["evictions"] == 1
+    with cache.pool.connection() as connection:
+        assert [row[0] for row in connection.execute("SELECT cache_key FROM llm_response_cache")] == ["new"]
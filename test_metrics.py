@@ -0,0 +1,38 @@
+from metrics import COMPONENT_STATS, MetricsRegistry, REGISTRY, register_component_stats
+
+
+def test_gauge_renders_the_latest_value():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("test_depth", "Queue depth.", ("queue",))
+    gauge.set(3, queue="a")
+    gauge.set(1, queue="a")
+    text = registry.render()
+    assert "# TYPE test_depth gauge" in text
+    assert 'test_depth{queue="a"} 1' in text
+
+
+def test_collectors_run_at_render_and_a_failure_does_not_break_the_scrape():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("test_size", "Size.")
+    sizes = iter([5, 7])
+
+    def broken():
+        raise RuntimeError("boom")
+
+    registry.add_collector("size", lambda: gauge.set(next(sizes)))
+    registry.add_collector("broken", broken)
+    assert "test_size 5" in registry.render()
+    assert "test_size 7" in registry.render()
+
+
+def test_component_stats_export_numeric_values_only():
+    state = {"in_use": 2, "idle": 3, "healthy": True, "host": "localhost"}
+    register_component_stats("test_pool", lambda: state)
+    text = REGISTRY.render()
+    assert 'fluentmind_component_stats{component="test_pool",stat="in_use"} 2' in text
+    assert 'fluentmind_component_stats{component="test_pool",stat="healthy"} 1' in text
+    assert 'stat="host"' not in text
+
+    state["in_use"] = 0
+    REGISTRY.render()
+    assert COMPONENT_STATS.value(component="test_pool", stat="in_use") == 0
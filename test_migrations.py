@@ -0,0 +1,105 @@
+import logging
+import os
+import shutil
+import threading
+
+import pytest
+
+from database import Database
+from migrations import LATEST_VERSION, MIGRATIONS
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+VERSIONS = [migration.version for migration in MIGRATIONS]
+
+
+def _table_counts(database) -> dict:
+    with database.pool.connection() as connection:
+        tables = [row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name != 'schema_version'")]
+        return {table: connection.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+
+
+def _schema(database) -> list:
+    with database.pool.connection() as connection:
+        return sorted(connection.execute("SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"))
+
+
+def _versions(database) -> list:
+    with database.pool.connection() as connection:
+        return [row[0] for row in connection.execute("SELECT version FROM schema_version ORDER BY version")]
+
+
+@pytest.fixture
+def fresh(tmp_path):
+    database = Database(db_name=str(tmp_path / "fresh.db"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def existing(tmp_path):
+    """A copy of the shipped database, which predates the newest migrations."""
+    source = os.path.join(ROOT, "English_courses.db")
+    if not os.path.exists(source):
+        pytest.skip("English_courses.db is not available.")
+    path = str(tmp_path / "English_courses.db")
+    shutil.copy(source, path)
+    database = Database(db_name=path)
+    yield database
+    database.close()
+
+
+def test_fresh_database_applies_every_migration_once(fresh, caplog):
+    with caplog.at_level(logging.INFO, logger="migrations"):
+        assert fresh.init_db() == VERSIONS
+        assert fresh.init_db() == []
+    assert [record.getMessage() for record in caplog.records] == [
+        f"Applied migration {migration.version}: {migration.name}" for migration in MIGRATIONS]
+    assert _versions(fresh) == VERSIONS
+    assert VERSIONS[-1] == LATEST_VERSION
+
+
+def test_existing_database_migrates_once_and_keeps_its_data(existing):
+    existing.init_db()
+    counts = _table_counts(existing)
+    schema = _schema(existing)
+    assert existing.init_db() == []
+    assert _versions(existing) == VERSIONS
+    assert _table_counts(existing) == counts
+    assert _schema(existing) == schema
+
+
+def test_replaying_every_step_changes_nothing(existing):
+    """Schema steps and backfills must be safe to run again (e.g. after a lost schema_version row)."""
+    existing.init_db()
+    counts = _table_counts(existing)
+    schema = _schema(existing)
+    with existing.pool.connection() as connection:
+        connection.execute("DELETE FROM schema_version")
+        connection.commit()
+    assert existing.init_db() == VERSIONS
+    assert _table_counts(existing) == counts
+    assert _schema(existing) == schema
+
+
+def test_concurrent_workers_apply_each_migration_once(tmp_path):
+    path = str(tmp_path / "shared.db")
+    databases = [Database(db_name=path) for _ in range(4)]
+    results = [None] * len(databases)
+    start = threading.Barrier(len(databases))
+
+    def migrate(index):
+        start.wait()
+        results[index] = databases[index].init_db()
+
+    threads = [threading.Thread(target=migrate, args=(index,)) for index in range(len(databases))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert sorted(version for applied in results for version in applied) == VERSIONS
+        assert _versions(databases[0]) == VERSIONS
+    finally:
+        for database in databases:
+            database.close()
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import types
+
+import pytest
+
+from module_store import plan_signature
+
+MODULE = {"title": "Module", "html": "<p>Lesson</p>"}
+PLAN = [
+    {"module": 1, "title": "Greetings", "topics": ["Greetings"], "objectives": ["Say hello"], "activities": ["Dialogue"]},
+    {"module": 2, "title": "Numbers", "topics": ["Numbers"], "objectives": ["Count to ten"], "activities": ["Game"]},
+]
+
+
+class FakeTracker:
+    def __init__(self):
+        self.calls = 0
+
+    async def agenerate(self, **kwargs):
+        self.calls += 1
+        return {"content": json.dumps(MODULE), "run_id": None}
+
+    async def astream_generate(self, **kwargs):
+        self.calls += 1
+        yield "done", {"content": json.dumps(MODULE), "run_id": None}
+
+
+class FakeWeaviate:
+    """GeneratedModules collection whose nearest neighbour is always `nearest` (a module_id, or None)."""
+
+    def __init__(self):
+        self.nearest = None
+        self.indexed = []
+
+    async def aget_collection(self, name):
+        weaviate = self
+
+        class Query:
+            @staticmethod
+            async def near_text(**kwargs):
+                objects = []
+                if weaviate.nearest is not None:
+                    objects.append(types.SimpleNamespace(metadata=types.SimpleNamespace(distance=0.0),
+                                                         properties={"module_id": weaviate.nearest}))
+                return types.SimpleNamespace(objects=objects)
+
+        class Data:
+            @staticmethod
+            async def insert(properties):
+                weaviate.indexed.append(properties["module_id"])
+
+        return types.SimpleNamespace(query=Query, data=Data), True
+
+
+@pytest.fixture
+def app(fluent_app):
+    fluent_app.phoenix_tracker = FakeTracker()
+    fluent_app.module_store.weaviate = FakeWeaviate()
+    return fluent_app
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def request():
+    return types.SimpleNamespace(session={"user_id": 1})
+
+
+def new_course(app, level="A1"):
+    return app.database.add_course(level=level, title="Course", description="", duration_weeks=2, course_plan=PLAN)
+
+
+def modules(app, course_id):
+    with app.database.pool.connection() as connection:
+        return connection.execute(
+            "SELECT module_id, week_number, source_module_id FROM module WHERE course_id = ? ORDER BY module_id",
+            (course_id,)
+        ).fetchall()
+
+
+def generate(app, course_id, week):
+    response = run(app.generate_module(request(), course_id, week))
+    assert response.status_code == 200
+    return json.loads(response.body)["module"]
+
+
+def test_repeat_request_returns_the_stored_module(app):
+    course_id = new_course(app)
+    assert generate(app, course_id, 1) == MODULE
+    assert generate(app, course_id, 1) == MODULE
+    assert app.phoenix_tracker.calls == 1
+    assert len(modules(app, course_id)) == 1
+
+
+def test_matching_plan_in_another_course_is_linked_not_generated(app):
+    original_course = new_course(app, level="A2")
+    generate(app, original_course, 1)
+    [(original_id, _, _)] = modules(app, original_course)
+
+    course_id = new_course(app, level="A2")
+    assert generate(app, course_id, 1) == MODULE
+    assert generate(app, course_id, 1) == MODULE
+    assert app.phoenix_tracker.calls == 1
+    assert [(week, source) for _, week, source in modules(app, course_id)] == [(1, original_id)]
+
+    # A third course links to the generated original, never to a copy.
+    third_course = new_course(app, level="A2")
+    generate(app, third_course, 1)
+    assert [source for _, _, source in modules(app, third_course)] == [original_id]
+
+
+def test_exact_match_skips_the_requesting_course(app):
+    course_id = new_course(app, level="B1")
+    generate(app, course_id, 1)
+    [(module_id, _, _)] = modules(app, course_id)
+    _, signature = plan_signature("B1", PLAN[0])
+    assert run(app.db.get_module_by_signature(signature, course_id)) is None
+    assert run(app.db.get_module_by_signature(signature))["module_id"] == module_id
+
+
+def test_similar_module_from_the_same_course_is_not_reused(app):
+    course_id = new_course(app, level="B2")
+    generate(app, course_id, 1)
+    [(module_id, _, _)] = modules(app, course_id)
+    app.module_store.weaviate.nearest = module_id
+
+    generate(app, course_id, 2)
+    assert app.phoenix_tracker.calls == 2
+    assert [(week, source) for _, week, source in modules(app, course_id)] == [(1, None), (2, None)]
+
+
+def test_similar_module_from_another_course_is_reused(app):
+    source_course = new_course(app, level="C1")
+    generate(app, source_course, 1)
+    [(module_id, _, _)] = modules(app, source_course)
+    app.module_store.weaviate.nearest = module_id
+
+    course_id = new_course(app, level="C1")
+    generate(app, course_id, 2)
+    assert app.phoenix_tracker.calls == 1
+    assert [(week, source) for _, week, source in modules(app, course_id)] == [(2, module_id)]
+
+
+def test_stream_serves_an_existing_week_without_generating(app):
+    course_id = new_course(app, level="C2")
+    generate(app, course_id, 1)
+
+    async def stream():
+        response = await app.generate_module_stream(request(), course_id, 1)
+        return "".join([chunk async for chunk in response.body_iterator])
+
+    body = run(stream())
+    assert body.startswith("event: done")
+    assert json.loads(body.split("data: ", 1)[1])["module"] == MODULE
+    assert app.phoenix_tracker.calls == 1
+    assert len(modules(app, course_id)) == 1
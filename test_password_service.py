@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+import types
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from password_service import PasswordService
+
+CHEAP = PasswordHash((Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1),))
+CHEAPER = PasswordHash((Argon2Hasher(time_cost=1, memory_cost=4096, parallelism=1),))
+
+
+class BlockingHash:
+    """verify() blocks until released and records how many calls ran at once."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def verify(self, password, stored_hash):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.release.wait(5)
+        with self._lock:
+            self.running -= 1
+        return True
+
+
+def test_outdated_hash_is_rehashed_on_verify():
+    passwords = PasswordService(max_workers=1, password_hash=CHEAP)
+    try:
+        outdated = CHEAPER.hash("secret")
+        valid, new_hash = asyncio.run(passwords.verify_and_update("secret", outdated))
+        assert valid and new_hash and new_hash != outdated
+        assert asyncio.run(passwords.verify_and_update("secret", new_hash)) == (True, None)
+        assert asyncio.run(passwords.verify_and_update("wrong", outdated)) == (False, None)
+        assert passwords.stats()["rehashed"] == 1
+    finally:
+        passwords.close()
+
+
+def test_login_stores_the_upgraded_hash(fluent_app, monkeypatch):
+    monkeypatch.setattr(fluent_app, "passwords", PasswordService(max_workers=1, password_hash=CHEAP))
+    database = fluent_app.database
+    database.add_user("Old", "Hash", "old-hash@example.com", CHEAPER.hash("secret"))
+    user_id = database.get_credentials("old-hash@example.com")["id"]
+    try:
+        request = types.SimpleNamespace(session={}, state=types.SimpleNamespace())
+        response = asyncio.run(fluent_app.api_login(request, email="old-hash@example.com", password="secret"))
+        assert response.status_code == 302
+        assert request.session["user_id"] == user_id
+        stored = database.get_credentials("old-hash@example.com")["password_hash"]
+        assert CHEAP.verify_and_update("secret", stored) == (True, None)
+        assert fluent_app.passwords.stats()["rehashed"] == 1
+    finally:
+        fluent_app.passwords.close()
+
+
+def test_hashing_runs_at_most_max_workers_at_once():
+    blocking = BlockingHash()
+    passwords = PasswordService(max_workers=2, max_pending=1, password_hash=blocking)
+
+    async def burst():
+        calls = [asyncio.create_task(passwords.verify("secret", "hash")) for _ in range(6)]
+        deadline = time.monotonic() + 5
+        while passwords.stats()["running"] < 2 and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        stats = passwords.stats()
+        blocking.release.set()
+        return stats, await asyncio.gather(*calls)
+
+    try:
+        stats, results = asyncio.run(burst())
+    finally:
+        blocking.release.set()
+        passwords.close()
+    assert results == [True] * 6
+    assert blocking.max_running == 2
+    # Two hashing, one in the executor queue, the rest held at the semaphore.
+    assert (stats["running"], stats["queued"], stats["waiting"]) == (2, 1, 3)
+    assert stats["queue_depth"] == 4
+    assert passwords.stats()["completed"] == 6
@@ -0,0 +1,86 @@
+import pytest
+
+from retrieval_cache import RetrievalCache, invalidate_collection
+
+RESULTS = [{"text": "Past simple", "score": 0.9}]
+
+
+@pytest.fixture
+def db_name(tmp_path):
+    return str(tmp_path / "cache.db")
+
+
+@pytest.fixture
+def cache(db_name):
+    cache = RetrievalCache(db_name=db_name, persistent=True, version_check_interval=0)
+    yield cache
+    cache.close()
+
+
+def _version(cache, collection) -> int:
+    with cache.pool.connection() as connection:
+        row = connection.execute(
+            "SELECT version FROM retrieval_collection_version WHERE collection = ?", (collection,)).fetchone()
+    return row[0] if row else 0
+
+
+def test_invalidate_collection_bumps_the_version_and_forces_a_miss(cache, db_name):
+    key = RetrievalCache.make_key("Grammar", "past simple", 0.5, 3)
+    cache.put("Grammar", key, RESULTS)
+    assert cache.get("Grammar", key) == RESULTS
+
+    # As the ingestion script does it: from another process, through the database only.
+    invalidate_collection("Grammar", db_name=db_name)
+    assert _version(cache, "Grammar") == 1
+    assert cache.get("Grammar", key) is None
+    invalidate_collection("Grammar", db_name=db_name)
+    assert _version(cache, "Grammar") == 2
+
+    cache.put("Grammar", key, RESULTS)
+    assert cache.get("Grammar", key) == RESULTS
+
+
+def test_invalidation_drops_persisted_results_for_new_processes(cache, db_name):
+    key = RetrievalCache.make_key("Grammar", "past simple", 0.5, 3)
+    cache.put("Grammar", key, RESULTS)
+    invalidate_collection("Other", db_name=db_name)
+    restarted = RetrievalCache(db_name=db_name, persistent=True)
+    try:
+        assert restarted.get("Grammar", key) == RESULTS
+        assert restarted.stats()["persistent_hits"] == 1
+    finally:
+        restarted.close()
+
+    invalidate_collection("Grammar", db_name=db_name)
+    restarted = RetrievalCache(db_name=db_name, persistent=True)
+    try:
+        assert restarted.get("Grammar", key) is None
+        with restarted.pool.connection() as connection:
+            assert connection.execute("SELECT COUNT(*) FROM retrieval_cache").fetchone()[0] == 0
+    finally:
+        restarted.close()
+
+
+def test_invalidation_only_affects_its_collection(cache):
+    grammar = RetrievalCache.make_key("Grammar", "query", 0.5, 3)
+    vocabulary = RetrievalCache.make_key("Vocabulary", "query", 0.5, 3)
+    cache.put("Grammar", grammar, RESULTS)
+    cache.put("Vocabulary", vocabulary, RESULTS)
+    cache.invalidate("Grammar")
+    assert cache.get("Grammar", grammar) is None
+    assert cache.get("Vocabulary", vocabulary) == RESULTS
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_version_is_rechecked_after_the_interval(db_name):
+    cache = RetrievalCache(db_name=db_name, version_check_interval=3600)
+    try:
+        key = RetrievalCache.make_key("Grammar", "query", 0.5, 3)
+        cache.put("Grammar", key, RESULTS)
+        invalidate_collection("Grammar", db_name=db_name)
+        # Another process's bump is only seen once the cached version is older than the interval.
+        assert cache.get("Grammar", key) == RESULTS
+        cache.version_check_interval = 0
+        assert cache.get("Grammar", key) is None
+    finally:
+        cache.close()
@@ -0,0 +1,74 @@
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode, set_span_in_context
+
+from tracing import SamplingSpanProcessor
+
+
+@pytest.fixture
+def traced():
+    """(tracer, exporter, sampler) exporting synchronously through a sampler that drops every success."""
+    exporter = InMemorySpanExporter()
+    sampler = SamplingSpanProcessor(SimpleSpanProcessor(exporter), success_ratio=0.0, max_traces=2)
+    provider = TracerProvider()
+    provider.add_span_processor(sampler)
+    yield provider.get_tracer("test"), exporter, sampler
+    provider.shutdown()
+
+
+def _fail(span):
+    span.set_status(Status(StatusCode.ERROR, "failed"))
+
+
+def _names(exporter) -> list:
+    return sorted(span.name for span in exporter.get_finished_spans())
+
+
+def test_successful_child_is_exported_when_its_parent_errors(traced):
+    tracer, exporter, sampler = traced
+    with tracer.start_as_current_span("request") as root:
+        with tracer.start_as_current_span("retrieval"):
+            pass
+        with tracer.start_as_current_span("llm") as llm:
+            _fail(llm)
+        assert exporter.get_finished_spans() == ()
+    assert _names(exporter) == ["llm", "request", "retrieval"]
+    assert root.status.status_code == StatusCode.UNSET
+    assert sampler.stats()["exported"] == 3
+
+
+def test_successful_trace_is_dropped_whole(traced):
+    tracer, exporter, sampler = traced
+    with tracer.start_as_current_span("request"):
+        with tracer.start_as_current_span("retrieval"):
+            pass
+    assert _names(exporter) == []
+    assert sampler.stats()["dropped"] == 2
+    assert sampler.stats()["pending_traces"] == 0
+
+
+def test_late_error_after_the_root_ended_is_still_exported(traced):
+    tracer, exporter, _ = traced
+    with tracer.start_as_current_span("request"):
+        background = tracer.start_span("background")
+    _fail(background)
+    background.end()
+    assert _names(exporter) == ["background"]
+
+
+def test_buffer_is_bounded_by_deciding_the_oldest_trace_early(traced):
+    tracer, exporter, sampler = traced
+    roots = [tracer.start_span(f"request-{index}") for index in range(3)]
+    for index, root in enumerate(roots):
+        with tracer.start_as_current_span(f"child-{index}", context=set_span_in_context(root)) as child:
+            if index == 0:
+                _fail(child)
+    assert _names(exporter) == ["child-0"]
+    assert sampler.stats()["early_decisions"] == 1
+    assert sampler.stats()["pending_traces"] == 2
+
+    # The root of the early-decided trace follows the decision.
+    roots[0].end()
+    assert _names(exporter) == ["child-0", "request-0"]
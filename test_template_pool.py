@@ -0,0 +1,131 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from async_database import AsyncDatabase
+from database import Database
+from template_pool import TemplatePool
+
+EXAM = '{"questions": [{"id": 1, "question": "Pick one", "options": {"A": "a", "B": "b"}}]}'
+
+
+class FakeTracker:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def agenerate(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+        return {"content": EXAM, "run_id": None}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "pool.db")
+    database = Database(db_name=path)
+    database.init_db()
+    database.close()
+    return path
+
+
+@pytest.fixture
+def database(db_path):
+    database = Database(db_name=db_path)
+    yield database
+    database.close()
+
+
+def test_reservations_count_towards_the_target(database):
+    first = database.reserve_pool_slot("exam", None, 2, now=0, lease_seconds=60)
+    second = database.reserve_pool_slot("exam", None, 2, now=0, lease_seconds=60)
+    assert first is not None and second is not None
+    assert database.reserve_pool_slot("exam", None, 2, now=0, lease_seconds=60) is None
+    # Levels are counted separately.
+    assert database.reserve_pool_slot("course", "B1", 1, now=0, lease_seconds=60) is not None
+
+
+def test_add_pool_item_turns_a_reservation_into_an_item(database):
+    reservation_id = database.reserve_pool_slot("exam", None, 1, now=0, lease_seconds=60)
+    database.add_pool_item("exam", None, 7, reservation_id)
+    assert database.count_pool_items("exam") == 1
+    assert database.reserve_pool_slot("exam", None, 1, now=0, lease_seconds=60) is None
+    assert database.claim_pool_item("exam") == 7
+    assert database.reserve_pool_slot("exam", None, 1, now=0, lease_seconds=60) is not None
+
+
+def test_released_and_expired_reservations_free_their_slot(database):
+    reservation_id = database.reserve_pool_slot("exam", None, 1, now=0, lease_seconds=60)
+    database.release_pool_slot(reservation_id)
+    assert database.reserve_pool_slot("exam", None, 1, now=0, lease_seconds=60) is not None
+    assert database.reserve_pool_slot("exam", None, 1, now=59, lease_seconds=60) is None
+    assert database.reserve_pool_slot("exam", None, 1, now=60, lease_seconds=60) is not None
+
+
+def test_concurrent_pools_fill_to_the_target_only(db_path):
+    async def run():
+        databases = [AsyncDatabase(Database(db_name=db_path)) for _ in range(3)]
+        pools = [TemplatePool(db, FakeTracker(delay=0.05), exam_target=2, course_targets={}) for db in databases]
+        for pool in pools:
+            pool.start()
+        await asyncio.gather(*(task for pool in pools for task in pool._tasks.values()))
+        generated = sum(pool.stats()["generated"] for pool in pools)
+        for db in databases:
+            db.close()
+        return generated
+
+    assert asyncio.run(run()) == 2
+    database = Database(db_name=db_path)
+    assert database.count_pool_items("exam") == 2
+    with database.pool.connection() as connection:
+        assert connection.execute("SELECT COUNT(*) FROM template_pool_reservation").fetchone()[0] == 0
+    database.close()
+
+
+def test_failed_generation_releases_its_reservation(db_path):
+    async def run():
+        db = AsyncDatabase(Database(db_name=db_path))
+        pool = TemplatePool(db, FakeTracker(fail=True), exam_target=1, course_targets={}, retry_delay=0, max_failures=2)
+        await pool._refill("exam")
+        db.close()
+        return pool.stats()
+
+    assert asyncio.run(run())["rejected"] == 2
+    database = Database(db_name=db_path)
+    with database.pool.connection() as connection:
+        assert connection.execute("SELECT COUNT(*) FROM template_pool_reservation").fetchone()[0] == 0
+    database.close()
+
+
+WORKER = textwrap.dedent("""
+    import asyncio, sys
+    sys.path.insert(0, {root!r})
+    from async_database import AsyncDatabase
+    from database import Database
+    from template_pool import TemplatePool
+    from test_template_pool import FakeTracker
+
+    async def main():
+        db = AsyncDatabase(Database(db_name={db_path!r}))
+        pool = TemplatePool(db, FakeTracker(delay=0.05), exam_target=3, course_targets={{}})
+        await pool._refill("exam")
+        db.close()
+
+    asyncio.run(main())
+""")
+
+
+def test_worker_processes_do_not_overfill_the_pool(db_path):
+    script = WORKER.format(root=os.path.dirname(os.path.abspath(__file__)), db_path=db_path)
+    workers = [subprocess.Popen([sys.executable, "-c", script]) for _ in range(4)]
+    assert all(worker.wait(timeout=60) == 0 for worker in workers)
+    database = Database(db_name=db_path)
+    assert database.count_pool_items("exam") == 3
+    database.close()
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from metrics import LLM_TOKENS, REGISTRY
+from phoenix_tracking import PhoenixTracking
+
+USAGE = {"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}
+
+
+class FakeLLM:
+    """Chat model that answers like ChatGoogleGenerativeAI: usage only in usage_metadata."""
+
+    async def ainvoke(self, messages):
+        return AIMessage(content="answer", usage_metadata=USAGE)
+
+    async def astream(self, messages):
+        yield AIMessageChunk(content="ans", usage_metadata={"input_tokens": 120, "output_tokens": 10, "total_tokens": 130})
+        yield AIMessageChunk(content="wer", usage_metadata={"input_tokens": 0, "output_tokens": 20, "total_tokens": 20})
+
+
+class FakeWeaviate:
+    async def aget_collection(self, name):
+        return object(), True
+
+    def mark_failed(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def tracker(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_DB_PATH", str(tmp_path / "cache.db"))
+    tracker = PhoenixTracking(app_name="test")
+    tracker.weaviate = FakeWeaviate()
+    tracker._get_llm = lambda span, *args, **kwargs: FakeLLM()
+
+    async def augmented_prompt(query, **kwargs):
+        return query
+
+    tracker.aaugmented_prompt = augmented_prompt
+    return tracker
+
+
+def _tokens(type: str, model: str) -> dict:
+    return {kind: LLM_TOKENS.value(type=type, model=model, kind=kind) for kind in ("prompt", "completion", "total")}
+
+
+def test_usage_metadata_is_read_before_openai_token_usage():
+    gemini = AIMessage(content="", usage_metadata=USAGE)
+    assert PhoenixTracking._token_usage(gemini) == (120, 30, 150)
+    openai = AIMessage(content="", response_metadata={"token_usage": {"prompt_tokens": 5, "completion_tokens": 7, "total_tokens": 12}})
+    assert PhoenixTracking._token_usage(openai) == (5, 7, 12)
+    assert PhoenixTracking._token_usage(AIMessage(content="")) == (0, 0, 0)
+
+
+def test_generation_exports_usage_metadata_tokens(tracker):
+    asyncio.run(tracker.agenerate(temperature=1.0, top_p=1.0, max_tokens=100, model="tokens-model",
+                                  prompt_context="prompt", type="token_test"))
+    assert _tokens("token_test", "tokens-model") == {"prompt": 120, "completion": 30, "total": 150}
+    assert ('fluentmind_llm_tokens_total{type="token_test",model="tokens-model",kind="total"} 150'
+            in REGISTRY.render())
+
+
+def test_cached_response_keeps_the_token_count(tracker):
+    prompt = "cached prompt"
+    first = asyncio.run(tracker.agenerate_with_single_input(prompt, temperature=0.0, model="cache-model"))
+    second = asyncio.run(tracker.agenerate_with_single_input(prompt, temperature=0.0, model="cache-model"))
+    assert first["total_tokens"] == 150
+    assert second["cache"] == "hit"
+    assert second["total_tokens"] == 150
+
+
+def test_streamed_chunks_are_summed(tracker):
+    async def consume():
+        return [event async for event in tracker.astream_generate(
+            temperature=1.0, top_p=1.0, max_tokens=100, model="stream-model", prompt_context="prompt", type="stream_test")]
+
+    events = asyncio.run(consume())
+    assert events[-1][0] == "done"
+    assert events[-1][1]["content"] == "answer"
+    assert _tokens("stream_test", "stream-model") == {"prompt": 120, "completion": 30, "total": 150}
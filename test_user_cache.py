@@ -0,0 +1,117 @@
+import asyncio
+import types
+
+import pytest
+
+from user_cache import UserProfileCache
+
+
+class FakeDb:
+    def __init__(self):
+        self.profiles = {1: {"id": 1, "name": "Ann", "native_language": "Ukrainian"}}
+        self.reads = 0
+
+    async def get_user_profile(self, user_id):
+        self.reads += 1
+        profile = self.profiles.get(user_id)
+        return dict(profile) if profile else None
+
+
+class FakeRequest:
+    """The parts of a Starlette request the profile handlers use."""
+
+    def __init__(self, session=None, payload=None):
+        self.session = session or {}
+        self.state = types.SimpleNamespace()
+        self.headers = {"content-type": "application/json"}
+        self._payload = payload or {}
+
+    async def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def db():
+    return FakeDb()
+
+
+def get(cache, request, user_id=1):
+    return asyncio.run(cache.get(request, user_id))
+
+
+def test_profile_is_read_once_per_request_and_once_per_ttl(db):
+    cache = UserProfileCache(db, ttl_seconds=60)
+    request = FakeRequest()
+    assert get(cache, request)["name"] == "Ann"
+    assert get(cache, request)["name"] == "Ann"
+    assert get(cache, FakeRequest())["name"] == "Ann"
+    assert db.reads == 1
+    assert cache.stats()["request_hits"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_request_memo_does_not_leak_across_requests(db):
+    cache = UserProfileCache(db, ttl_seconds=0)
+    first = FakeRequest()
+    assert get(cache, first)["native_language"] == "Ukrainian"
+    db.profiles[1]["native_language"] = "Polish"
+    assert get(cache, first)["native_language"] == "Ukrainian"
+    assert get(cache, FakeRequest())["native_language"] == "Polish"
+    assert not hasattr(FakeRequest().state, "user_profiles")
+
+
+def test_returned_profiles_are_copies(db):
+    cache = UserProfileCache(db)
+    request = FakeRequest()
+    get(cache, request)["name"] = "Changed"
+    assert get(cache, request)["name"] == "Ann"
+    assert get(cache, FakeRequest())["name"] == "Ann"
+
+
+def test_missing_user_is_memoized_but_not_cached(db):
+    cache = UserProfileCache(db)
+    request = FakeRequest()
+    assert get(cache, request, 99) is None
+    assert get(cache, request, 99) is None
+    assert db.reads == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidate_drops_the_entry_and_the_request_memo(db):
+    cache = UserProfileCache(db)
+    request = FakeRequest()
+    get(cache, request)
+    db.profiles[1]["name"] = "Anna"
+    cache.invalidate(1, request)
+    assert get(cache, request)["name"] == "Anna"
+    assert db.reads == 2
+
+
+def test_lru_entries_beyond_max_entries_are_dropped():
+    db = FakeDb()
+    db.profiles.update({2: {"id": 2}, 3: {"id": 3}})
+    cache = UserProfileCache(db, max_entries=2)
+    for user_id in (1, 2, 1, 3):
+        get(cache, FakeRequest(), user_id)
+    assert cache.stats()["size"] == 2
+    get(cache, FakeRequest(), 2)
+    assert db.reads == 4
+
+
+def test_update_handler_invalidates_the_cached_profile(fluent_app):
+    database = fluent_app.database
+    database.add_user("Cache", "User", "cache-user@example.com", "hash")
+    user_id = database.get_credentials("cache-user@example.com")["id"]
+    session = {"user_id": user_id}
+
+    request = FakeRequest(session)
+    assert asyncio.run(fluent_app.user_cache.get(request, user_id))["native_language"] != "Polish"
+    response = asyncio.run(fluent_app.native_language_changes(FakeRequest(session, {"native_language": "Polish"})))
+    assert response.status_code == 200
+    assert asyncio.run(fluent_app.user_cache.get(FakeRequest(), user_id))["native_language"] == "Polish"
+
+    # The handler's own request sees the change too.
+    request = FakeRequest(session, {"interface_language": "Ukrainian"})
+    asyncio.run(fluent_app.user_cache.get(request, user_id))
+    asyncio.run(fluent_app.interface_language_changes(request))
+    assert asyncio.run(fluent_app.user_cache.get(request, user_id))["interface_language"] == "Ukrainian"
@@ -0,0 +1,104 @@
+import pytest
+
+from database import Database
+
+USER_ID = 1
+OTHER_USER_ID = 2
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(db_name=str(tmp_path / "vocabulary.db"))
+    database.init_db()
+    yield database
+    database.close()
+
+
+def _add(database, *words, user_id=USER_ID):
+    for word in words:
+        database.upsert_vocabulary_word(user_id, word, f"definition of {word}")
+
+
+def _walk(database, limit: int, **kwargs) -> list:
+    """Follow next_after until the last page; returns the pages as lists of words."""
+    pages, after = [], None
+    while True:
+        entries, after = database.get_vocabulary_page(USER_ID, limit=limit, after=after, **kwargs)
+        pages.append([entry["word"] for entry in entries])
+        if after is None:
+            return pages
+        assert len(pages) < 100, "pagination did not terminate"
+
+
+def test_empty_vocabulary_is_one_empty_last_page(database):
+    _add(database, "apple", user_id=OTHER_USER_ID)
+    assert database.get_vocabulary_page(USER_ID, limit=10) == ([], None)
+    assert database.count_vocabulary(USER_ID) == 0
+
+
+def test_full_last_page_has_no_cursor(database):
+    _add(database, "date", "apple", "cherry", "banana")
+    assert _walk(database, limit=2) == [["apple", "banana"], ["cherry", "date"]]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7])
+def test_every_page_size_visits_each_word_once(database, limit):
+    words = ["Zebra", "apple", "Banana", "cherry", "apricot", "banana split", "Éclair"]
+    _add(database, *words)
+    for sort in ("alpha", "recent", "level"):
+        pages = _walk(database, limit=limit, sort=sort)
+        seen = [word for page in pages for word in page]
+        assert sorted(seen) == sorted(words), sort
+        assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_alpha_sort_ignores_case(database):
+    _add(database, "cherry", "Banana", "apple")
+    assert _walk(database, limit=1) == [["apple"], ["Banana"], ["cherry"]]
+
+
+def test_recent_sort_is_newest_first(database):
+    _add(database, "first", "second", "third")
+    assert _walk(database, limit=2, sort="recent") == [["third", "second"], ["first"]]
+
+
+def test_level_sort_breaks_ties_by_word_and_puts_unknown_words_last(database):
+    _add(database, "qwertyuiop", "house", "apple", "zzzunknown")
+    levels = {entry["word"]: entry["cefr_level"] for entry in database.get_vocabulary_page(USER_ID, limit=10)[0]}
+    assert levels["qwertyuiop"] is None and levels["zzzunknown"] is None
+    seen = [word for page in _walk(database, limit=1, sort="level") for word in page]
+    assert seen[-2:] == ["qwertyuiop", "zzzunknown"]
+    known = [word for word in seen if levels[word] is not None]
+    assert known == sorted(known, key=lambda word: (levels[word], word))
+
+
+def test_words_added_behind_the_cursor_are_not_repeated(database):
+    _add(database, "b", "d", "f")
+    first, after = database.get_vocabulary_page(USER_ID, limit=2)
+    assert [entry["word"] for entry in first] == ["b", "d"]
+    _add(database, "a", "c", "e")
+    rest, after = database.get_vocabulary_page(USER_ID, limit=10, after=after)
+    assert [entry["word"] for entry in rest] == ["e", "f"]
+    assert after is None
+
+
+def test_deleted_cursor_word_still_positions_the_next_page(database):
+    _add(database, "a", "b", "c")
+    _, after = database.get_vocabulary_page(USER_ID, limit=2)
+    database.delete_vocabulary_word(USER_ID, "b")
+    rest, _ = database.get_vocabulary_page(USER_ID, limit=2, after=after)
+    assert [entry["word"] for entry in rest] == ["c"]
+
+
+def test_search_pages_and_counts_only_matches(database):
+    _add(database, "cat", "Catalog", "category", "concat", "dog")
+    assert _walk(database, limit=2, query="cat") == [["cat", "Catalog"], ["category"]]
+    assert database.count_vocabulary(USER_ID, query="cat") == 3
+    assert _walk(database, limit=10, query="cat", match="substring") == [["cat", "Catalog", "category", "concat"]]
+
+
+def test_search_treats_like_wildcards_literally(database):
+    _add(database, "50%", "500", "a_b", "axb")
+    assert _walk(database, limit=10, query="50%") == [["50%"]]
+    assert _walk(database, limit=10, query="a_") == [["a_b"]]
+    assert database.count_vocabulary(USER_ID, query="%") == 0
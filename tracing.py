@@ -0,0 +1,200 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import SpanLimits, SpanProcessor
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import StatusCode
+
+
+def tracing_settings() -> dict:
+    """Span export, sampling and attribute limits, from the environment."""
+    return {
+        # Head sampling decides at span start; unsampled traces cost almost nothing but errors in them are lost too.
+        "head_sample_ratio": float(os.environ.get("TRACE_HEAD_SAMPLE_RATIO", 1.0)),
+        # Tail sampling decides when a trace's local root ends: error traces are always exported, successes at this ratio.
+        "success_sample_ratio": float(os.environ.get("TRACE_SUCCESS_SAMPLE_RATIO", 1.0)),
+        "max_queue_size": int(os.environ.get("TRACE_MAX_QUEUE_SIZE", 2048)),
+        "max_export_batch_size": int(os.environ.get("TRACE_EXPORT_BATCH_SIZE", 256)),
+        "schedule_delay_millis": float(os.environ.get("TRACE_EXPORT_DELAY_MS", 2000)),
+        "export_timeout_millis": float(os.environ.get("TRACE_EXPORT_TIMEOUT_MS", 10000)),
+        "max_attribute_length": int(os.environ.get("TRACE_MAX_ATTRIBUTE_LENGTH", 4096)),
+        "max_span_attributes": int(os.environ.get("TRACE_MAX_SPAN_ATTRIBUTES", 64)),
+        "max_events": int(os.environ.get("TRACE_MAX_SPAN_EVENTS", 32)),
+    }
+
+
+class SamplingSpanProcessor(SpanProcessor):
+    """Tail sampler in front of an export processor: keeps every error trace and a ratio of the rest.
+
+    Ended spans are buffered per trace until the trace's local root (a span with
+    no parent, or a remote one) ends; then the whole trace is kept if any of its
+    spans errored, otherwise by trace id at success_ratio, and forwarded at once.
+    Spans that end after their root follow the decision already made (an error
+    is always kept). At most max_traces traces are buffered; when a new one would
+    exceed that, the oldest is decided early on what it holds so far.
+    """
+
+    def __init__(self, processor: SpanProcessor, success_ratio: float = 1.0, max_traces: int = 1024,
+                 max_trace_spans: int = 1024):
+        self.processor = processor
+        self.success_ratio = success_ratio
+        self._bound = round(max(0.0, min(success_ratio, 1.0)) * (1 << 64))
+        self._max_traces = max_traces
+        self._max_trace_spans = max_trace_spans
+        self._pending = OrderedDict()
+        self._decisions = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"exported": 0, "dropped": 0, "errors": 0, "early_decisions": 0}
+
+    def _sampled(self, trace_id: int) -> bool:
+        return (trace_id & 0xFFFFFFFFFFFFFFFF) < self._bound
+
+    def _decide(self, trace_id: int, buffered: dict) -> list:
+        """Record the decision for a buffered trace; returns the spans to forward. Caller holds the lock."""
+        keep = buffered["error"] or self._sampled(trace_id)
+        self._decisions[trace_id] = keep
+        while len(self._decisions) > self._max_traces:
+            self._decisions.popitem(last=False)
+        self._stats["exported" if keep else "dropped"] += len(buffered["spans"])
+        return buffered["spans"] if keep else []
+
+    def on_start(self, span, parent_context=None):
+        self.processor.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span):
+        trace_id = span.context.trace_id
+        error = span.status.status_code == StatusCode.ERROR
+        local_root = span.parent is None or span.parent.is_remote
+        forward = []
+        with self._lock:
+            if error:
+                self._stats["errors"] += 1
+            decision = self._decisions.get(trace_id)
+            if decision is not None and trace_id not in self._pending:
+                keep = decision or error
+                self._stats["exported" if keep else "dropped"] += 1
+                forward = [span] if keep else []
+            else:
+                buffered = self._pending.get(trace_id)
+                if buffered is None:
+                    buffered = self._pending[trace_id] = {"spans": [], "error": False}
+                    if len(self._pending) > self._max_traces:
+                        oldest_id, oldest = self._pending.popitem(last=False)
+                        self._stats["early_decisions"] += 1
+                        forward = self._decide(oldest_id, oldest)
+                buffered["error"] = buffered["error"] or error
+                buffered["spans"].append(span)
+                if local_root or len(buffered["spans"]) >= self._max_trace_spans:
+                    if not local_root:
+                        self._stats["early_decisions"] += 1
+                    del self._pending[trace_id]
+                    forward = forward + self._decide(trace_id, buffered)
+        for kept in forward:
+            self.processor.on_end(kept)
+
+    def _drain(self):
+        with self._lock:
+            pending = list(self._pending.items())
+            self._pending.clear()
+            forward = [span for trace_id, buffered in pending for span in self._decide(trace_id, buffered)]
+        for span in forward:
+            self.processor.on_end(span)
+
+    def shutdown(self):
+        self._drain()
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.processor.force_flush(timeout_millis)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, pending_traces=len(self._pending))
+
+
+class _TruncationWarningFilter(logging.Filter):
+    """Drops the SDK's per-value truncation warning; prompts and generations routinely exceed max_attribute_length.
+
+    Other opentelemetry.attributes warnings (invalid types, dropped attributes) still get through.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not record.getMessage().startswith("String attribute value exceeds max length")
+
+
+_TRUNCATION_FILTER = _TruncationWarningFilter()
+
+
+def build_tracer_provider(endpoint: str, settings: dict = None):
+    """Phoenix TracerProvider exporting to endpoint through a bounded batch queue, with sampling and span limits.
+
+    The batch processor exports on its own thread; when its queue is full new
+    spans are dropped rather than blocking the request that ended them.
+    """
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from phoenix.otel import HTTPSpanExporter, TracerProvider
+
+    settings = settings or tracing_settings()
+    # addFilter ignores a filter that is already installed.
+    logging.getLogger("opentelemetry.attributes").addFilter(_TRUNCATION_FILTER)
+    provider = TracerProvider(
+        endpoint=endpoint,
+        verbose=False,
+        sampler=ParentBased(TraceIdRatioBased(settings["head_sample_ratio"])),
+        span_limits=SpanLimits(
+            max_span_attributes=settings["max_span_attributes"],
+            max_span_attribute_length=settings["max_attribute_length"],
+            max_events=settings["max_events"],
+        ),
+    )
+    batch = BatchSpanProcessor(
+        HTTPSpanExporter(endpoint=endpoint),
+        max_queue_size=settings["max_queue_size"],
+        max_export_batch_size=min(settings["max_export_batch_size"], settings["max_queue_size"]),
+        schedule_delay_millis=settings["schedule_delay_millis"],
+        export_timeout_millis=settings["export_timeout_millis"],
+    )
+    provider.add_span_processor(SamplingSpanProcessor(batch, settings["success_sample_ratio"]))
+    return provider
+
+
+class DeferredTracer:
+    """Tracer proxy that records nothing until a real tracer is installed with set_tracer().
+
+    PhoenixTracking hands this out immediately and swaps in the Phoenix tracer once
+    tracing has started in the background, so requests never wait for it. Spans
+    started before the swap are no-ops. openinference_span_kind is only passed on
+    to tracers that understand it (Phoenix's OITracer); plain OpenTelemetry tracers
+    reject unknown keyword arguments.
+    """
+
+    def __init__(self):
+        # (tracer, accepts_span_kind), replaced as one tuple so readers never see a mixed pair.
+        self._target = (trace.NoOpTracer(), False)
+        self._ready = threading.Event()
+
+    def set_tracer(self, tracer):
+        self._target = (tracer, type(tracer).__name__ == "OITracer")
+        self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _resolve(self, kwargs: dict):
+        tracer, accepts_span_kind = self._target
+        if not accepts_span_kind:
+            kwargs.pop("openinference_span_kind", None)
+        return tracer
+
+    def start_span(self, name: str, **kwargs):
+        return self._resolve(kwargs).start_span(name, **kwargs)
+
+    def start_as_current_span(self, name: str, **kwargs):
+        return self._resolve(kwargs).start_as_current_span(name, **kwargs)
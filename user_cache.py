@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserProfileCache:
+    """User profiles memoized per request and cached process-wide for ttl_seconds.
+
+    Profiles come from Database.get_user_profile and never include password_hash.
+    Handlers that change a profile call invalidate(user_id); other worker
+    processes pick the change up once their entry expires.
+    """
+
+    def __init__(self, db, ttl_seconds: float = 60.0, max_entries: int = 1024):
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"request_hits": 0, "hits": 0, "misses": 0, "invalidations": 0}
+
+    async def get(self, request, user_id: int):
+        """Return a copy of the user's profile dict, or None if the user does not exist."""
+        memo = getattr(request.state, "user_profiles", None)
+        if memo is None:
+            memo = {}
+            request.state.user_profiles = memo
+        if user_id in memo:
+            self._count("request_hits")
+            return dict(memo[user_id]) if memo[user_id] else None
+
+        profile = self._cached(user_id)
+        if profile is None:
+            self._count("misses")
+            profile = await self.db.get_user_profile(user_id)
+            if profile:
+                self._store(user_id, profile)
+        else:
+            self._count("hits")
+        memo[user_id] = profile
+        return dict(profile) if profile else None
+
+    def _cached(self, user_id: int):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, profile = entry
+            if now >= expires_at:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return profile
+
+    def _store(self, user_id: int, profile: dict):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, dict(profile))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int, request=None):
+        """Drop a user's cached profile (and the current request's memo, if given)."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._stats["invalidations"] += 1
+        memo = getattr(request.state, "user_profiles", None) if request is not None else None
+        if memo:
+            memo.pop(user_id, None)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, size=len(self._entries), max_size=self.max_entries)
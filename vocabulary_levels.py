@@ -0,0 +1,31 @@
+import csv
+from functools import lru_cache
+from pathlib import Path
+
+VOCABULARY_PROFILE = Path(__file__).resolve().parent / "datasets" / "voc_combined.csv"
+
+# Sort key for vocabulary_word.cefr_level; words missing from the profile sort after C2.
+VOCABULARY_LEVEL_KEY = "IFNULL(cefr_level, 'Z')"
+
+
+@lru_cache(maxsize=1)
+def _levels_by_headword() -> dict:
+    levels = {}
+    if not VOCABULARY_PROFILE.exists():
+        return levels
+    with open(VOCABULARY_PROFILE, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            level = (row.get("CEFR") or "").strip().upper()
+            if not level:
+                continue
+            for headword in (row.get("headword") or "").split("/"):
+                key = headword.strip().lower()
+                # A headword listed under several parts of speech keeps its easiest level.
+                if key and (key not in levels or level < levels[key]):
+                    levels[key] = level
+    return levels
+
+
+def lookup_cefr_level(word: str):
+    """CEFR level of a word from the CEFR-J/Octanove vocabulary profile, or None if it is not listed."""
+    return _levels_by_headword().get(word.strip().lower())
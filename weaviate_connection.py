@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+
+class WeaviateConnection:
+    """Long-lived, lazily connected Weaviate clients (sync and async) with cached collection handles."""
+
+    def __init__(self, host: str = "localhost", port: int = 8080, grpc_port: int = 50051,
+                 health_check_interval: float = 30.0):
+        self.host = host
+        self.port = port
+        self.grpc_port = grpc_port
+        self.health_check_interval = health_check_interval
+
+        self._client = None
+        self._collections = {}
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+        self._async_client = None
+        self._async_collections = {}
+        self._async_last_check = 0.0
+        self._async_lock = None
+
+        self._stats = {
+            "connects": 0,
+            "reconnects": 0,
+            "reuses": 0,
+            "health_checks": 0,
+            "failures": 0,
+        }
+
+    def _due_for_check(self, last_check: float) -> bool:
+        return time.monotonic() - last_check >= self.health_check_interval
+
+    def _close_sync(self):
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception:
+                pass
+        self._client = None
+        self._collections = {}
+
+    async def _close_async(self):
+        if self._async_client is not None:
+            try:
+                await self._async_client.close()
+            except Exception:
+                pass
+        self._async_client = None
+        self._async_collections = {}
+
+    def _is_healthy(self) -> bool:
+        self._stats["health_checks"] += 1
+        try:
+            return self._client.is_connected() and self._client.is_ready()
+        except Exception:
+            return False
+
+    async def _ais_healthy(self) -> bool:
+        self._stats["health_checks"] += 1
+        try:
+            return self._async_client.is_connected() and await self._async_client.is_ready()
+        except Exception:
+            return False
+
+    def get_collection(self, name: str):
+        """Return (collection, reused) from the shared sync client, connecting or reconnecting as needed."""
+        with self._lock:
+            reused = self._client is not None
+            if reused and self._due_for_check(self._last_check):
+                self._last_check = time.monotonic()
+                if not self._is_healthy():
+                    self._stats["reconnects"] += 1
+                    self._close_sync()
+                    reused = False
+
+            if self._client is None:
+                import weaviate
+                self._client = weaviate.connect_to_local(host=self.host, port=self.port, grpc_port=self.grpc_port)
+                self._last_check = time.monotonic()
+                self._stats["connects"] += 1
+            else:
+                self._stats["reuses"] += 1
+
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = self._client.collections.get(name)
+                self._collections[name] = collection
+            return collection, reused
+
+    async def aget_collection(self, name: str):
+        """Async counterpart of get_collection backed by a shared WeaviateAsyncClient."""
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            reused = self._async_client is not None
+            if reused and self._due_for_check(self._async_last_check):
+                self._async_last_check = time.monotonic()
+                if not await self._ais_healthy():
+                    self._stats["reconnects"] += 1
+                    await self._close_async()
+                    reused = False
+
+            if self._async_client is None:
+                import weaviate
+                client = weaviate.use_async_with_local(host=self.host, port=self.port, grpc_port=self.grpc_port)
+                await client.connect()
+                self._async_client = client
+                self._async_last_check = time.monotonic()
+                self._stats["connects"] += 1
+            else:
+                self._stats["reuses"] += 1
+
+            collection = self._async_collections.get(name)
+            if collection is None:
+                collection = self._async_client.collections.get(name)
+                self._async_collections[name] = collection
+            return collection, reused
+
+    def mark_failed(self):
+        """Force a health check on next use, e.g. after a query error."""
+        self._stats["failures"] += 1
+        self._last_check = 0.0
+        self._async_last_check = 0.0
+
+    def stats(self) -> dict:
+        return dict(self._stats)
+
+    def close(self):
+        with self._lock:
+            self._close_sync()
+
+    async def aclose(self):
+        await self._close_async()
+        self.close()
@@ -4,6 +4,9 @@ import pandas as pd
 import weaviate
 from weaviate.classes.config import Configure, DataType, Property
 
+from module_store import GENERATED_MODULE_COLLECTION
+from retrieval_cache import invalidate_collection
+
 
 def recreate_collection(
     client: weaviate.WeaviateClient,
@@ -18,13 +21,15 @@ def recreate_collection(
     if client.collections.exists(name):
         client.collections.delete(name)
 
-    return client.collections.create(
+    collection = client.collections.create(
         name=name,
         vector_config=vector_config,
         vectorizer_config=vectorizer_config,
         reranker_config=reranker_config,
         properties=properties,
     )
+    invalidate_collection(name)
+    return collection
 
 DATASET_PATH = Path("datasets") / "voc_combined.csv"
 CEFR_TEXT_DATASET = Path("datasets") / "cefr_leveled_texts.csv"
@@ -150,9 +155,28 @@ def _ingest_grammar_profile(client):
     print(f"Imported {len(records)} grammar rows into {GRAMMAR_COLLECTION}")
 
 
+def ensure_generated_module_collection(client):
+    """Create the GeneratedModules collection used for module reuse; existing entries are kept."""
+    if client.collections.exists(GENERATED_MODULE_COLLECTION):
+        return client.collections.get(GENERATED_MODULE_COLLECTION)
+    return client.collections.create(
+        name=GENERATED_MODULE_COLLECTION,
+        vectorizer_config=Configure.Vectorizer.text2vec_ollama(
+            api_endpoint="http://ollama:11434",
+            model="nomic-embed-text",
+        ),
+        properties=[
+            Property(name="text", data_type=DataType.TEXT),
+            Property(name="level", data_type=DataType.TEXT, skip_vectorization=True),
+            Property(name="signature", data_type=DataType.TEXT, skip_vectorization=True),
+            Property(name="module_id", data_type=DataType.INT, skip_vectorization=True),
+        ],
+    )
+
 
 if __name__ == "__main__":
     with weaviate.connect_to_local() as client:
         _ingest_vocabulary(client)
         _ingest_cefr_texts(client)
-        _ingest_grammar_profile(client)
\ No newline at end of file
+        _ingest_grammar_profile(client)
+        ensure_generated_module_collection(client)
\ No newline at end of file